@@ -1,23 +1,32 @@
 # Gunicorn configuration for ARQ application
-# Variant A deployment on Beget hosting (Python 2.7 compatible)
+# Async FastAPI app: uvicorn workers (uvloop + httptools) managed by gunicorn
+#
+#   cd src && gunicorn --config ../config/gunicorn_config.py main:app
+#   python src/serving.py --server gunicorn
 
 import os
-import multiprocessing
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from serving import default_workers  # noqa: E402
 
 # Server socket
-bind = '127.0.0.1:8000'
+bind = os.getenv('GUNICORN_BIND', '127.0.0.1:8000')
 backlog = 2048
 
 # Worker processes
-workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = 'sync'
-worker_connections = 1000
+# One async worker per core: LLM calls are IO-bound and multiplexed on each event loop
+workers = default_workers()
+worker_class = 'serving.ArqUvicornWorker'
+# Liveness heartbeat, not a request timeout: long streaming/LLM responses are fine
 timeout = 60
-keepalive = 2
+graceful_timeout = int(os.getenv('GRACEFUL_TIMEOUT', '30'))
+keepalive = 5
 
 # Logging
-accesslog = '/home/romasaw4/logs/gunicorn_access.log'
-errorlog = '/home/romasaw4/logs/gunicorn_error.log'
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '/home/romasaw4/logs/gunicorn_access.log')
+errorlog = os.getenv('GUNICORN_ERROR_LOG', '/home/romasaw4/logs/gunicorn_error.log')
 loglevel = 'info'
 access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s'
 
@@ -26,7 +35,7 @@ proc_name = 'arq_gunicorn'
 
 # Server mechanics
 daemon = False
-pidfile = '/home/romasaw4/run/gunicorn.pid'
+pidfile = os.getenv('GUNICORN_PIDFILE', '/home/romasaw4/run/gunicorn.pid')
 umask = 0
 user = None
 group = None
@@ -38,9 +47,12 @@ tmp_upload_dir = None
 # ssl_version = 'TLSv1_2'
 
 # Application behavior
-preload_app = False
-max_requests = 1000
-max_requests_jitter = 50
+# Import the app once in the master; workers fork with modules already loaded.
+# Sockets, pools and threads are created per worker (lifespan / after-fork hooks).
+preload_app = True
+# Graceful recycling: a worker finishes in-flight requests, then is replaced
+max_requests = int(os.getenv('MAX_REQUESTS', '10000'))
+max_requests_jitter = int(os.getenv('MAX_REQUESTS_JITTER', '1000'))
 
 # Server hooks
 def on_starting(server):
@@ -49,11 +61,21 @@ def on_starting(server):
 def when_ready(server):
     print("Gunicorn server is ready. Spawning workers")
 
+def post_fork(server, worker):
+    # Resources opened by the preloaded app are reset by os.register_at_fork hooks
+    # in logging_pipeline, http_clients and the SQLite stores
+    server.log.info("Worker spawned (pid: %s)", worker.pid)
+
+def worker_exit(server, worker):
+    server.log.info("Worker exited (pid: %s)", worker.pid)
+
 def on_exit(server):
     print("Gunicorn server has exited")
 
 # Environment
 raw_env = [
     'ENVIRONMENT=production',
-    'LOG_LEVEL=info'
+    'LOG_LEVEL=INFO',
+    # Database pools are sized per worker from the shared connection budget
+    f'WEB_CONCURRENCY={workers}',
 ]
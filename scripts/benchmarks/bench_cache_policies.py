@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Trace-driven hit ratios for the RAM tier's eviction policies (LRU vs W-TinyLFU)
+
+Replays key streams through one RAM shard: each miss is inserted, as a read
+promoted from SQLite would be. Traces are text files with one key per line
+(e.g. keys logged from HybridLocalCache.get); without --trace, synthetic
+workloads are generated.
+
+    python scripts/benchmarks/bench_cache_policies.py --sizes 100 1000
+    python scripts/benchmarks/bench_cache_policies.py --trace keys.log --sizes 5000
+"""
+
+import argparse
+import os
+import random
+import sys
+from typing import Dict, Iterable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from browser_automation.cache_policies import EVICTION_POLICIES  # noqa: E402
+from browser_automation.local_cache import CacheEntry, MemoryShard  # noqa: E402
+
+
+def zipf_keys(count: int, universe: int, skew: float, rng: random.Random) -> List[str]:
+    weights = [1 / (rank ** skew) for rank in range(1, universe + 1)]
+    return [f"hot:{i}" for i in rng.choices(range(universe), weights=weights, k=count)]
+
+
+def synthetic_traces(length: int, seed: int = 7) -> Dict[str, List[str]]:
+    rng = random.Random(seed)
+    zipf = zipf_keys(length, 20000, 0.9, rng)
+    # Workflow reads of a skewed hot set, interrupted by page-snapshot scans
+    # of one-shot keys
+    scan: List[str] = []
+    hot = zipf_keys(length, 5000, 0.9, rng)
+    one_shot = 0
+    for start in range(0, length, 5000):
+        scan.extend(hot[start:start + 4000])
+        scan.extend(f"snapshot:{one_shot + i}" for i in range(1000))
+        one_shot += 1000
+    # Popularity shifts halfway through
+    shifted = zipf_keys(length // 2, 20000, 0.9, rng)
+    shifted += [key.replace("hot:", "new:") for key in zipf_keys(length // 2, 20000, 0.9, rng)]
+    return {"zipf": zipf, "zipf + scans": scan, "shifting zipf": shifted}
+
+
+def load_trace(path: str) -> List[str]:
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def hit_ratio(keys: Iterable[str], policy: str, size: int) -> float:
+    shard = MemoryShard(max_memory=float("inf"), max_entries=size, policy=policy)
+    hits = requests = 0
+    for key in keys:
+        requests += 1
+        if shard.lookup(key) is not None:
+            hits += 1
+        else:
+            shard.put(CacheEntry(key, None, size=1))
+    return hits / requests if requests else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--trace", action="append", help="key-per-line trace file (repeatable)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--length", type=int, default=200000, help="synthetic trace length")
+    args = parser.parse_args()
+
+    traces = (
+        {os.path.basename(path): load_trace(path) for path in args.trace}
+        if args.trace else synthetic_traces(args.length)
+    )
+    policies = list(EVICTION_POLICIES)
+    print(f"{'trace':<16}{'size':>7}" + "".join(f"{name:>10}" for name in policies))
+    for name, keys in traces.items():
+        for size in args.sizes:
+            ratios = [hit_ratio(keys, policy, size) for policy in policies]
+            print(f"{name:<16}{size:>7}" + "".join(f"{ratio:>10.1%}" for ratio in ratios))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Outbound call latency: new httpx client per call vs the shared registry client
+
+Starts a local keep-alive HTTP server and times sequential requests, which
+isolates the connection setup that a per-call client pays every time.
+
+    python scripts/benchmarks/bench_http_clients.py --requests 2000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+import httpx  # noqa: E402
+
+from http_clients import HTTPClientRegistry  # noqa: E402
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # avoid 40ms delayed-ACK stalls skewing both sides
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = b'{"response": "ok", "done": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    latencies.sort()
+    return {
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+    }
+
+
+async def per_call(url: str, requests: int) -> Dict[str, float]:
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        async with httpx.AsyncClient(timeout=60.0) as client:
+            (await client.post(url, json={"prompt": "x"})).raise_for_status()
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+async def shared(url: str, requests: int) -> Dict[str, float]:
+    registry = HTTPClientRegistry()
+    client = registry.get("ollama")
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        (await client.post(url, json={"prompt": "x"})).raise_for_status()
+        latencies.append(time.perf_counter() - start)
+    result = summarize(latencies)
+    result["reuse_ratio"] = next(iter(registry.stats()["hosts"].values()))["reuse_ratio"]
+    await registry.aclose()
+    return result
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{httpd.server_address[1]}/api/generate"
+
+    print(f"{args.requests} sequential POSTs to a local keep-alive server")
+    print(f"{'client':<12}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    results = {"per-call": await per_call(url, args.requests), "shared": await shared(url, args.requests)}
+    for name, result in results.items():
+        print(f"{name:<12}{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}{result['mean_ms']:>10.3f}")
+    print(f"shared client connection reuse: {results['shared']['reuse_ratio']:.1%}")
+    httpd.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
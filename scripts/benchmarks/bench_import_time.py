@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Import-time cost of the package and entry-point modules (``python -X importtime``)
+
+Each target is imported in a fresh interpreter several times; the best run's
+cumulative time is reported with the heaviest modules it pulled in.
+
+    python scripts/benchmarks/bench_import_time.py src arq_worker main --runs 5
+    python scripts/benchmarks/bench_import_time.py src --budget-ms 50   # exit 1 if over
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, NamedTuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC = os.path.join(ROOT, "src")
+
+
+class ImportTiming(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+def parse_importtime(stderr: str) -> List[ImportTiming]:
+    """Parse ``-X importtime`` lines: ``import time: self [us] | cumulative | imported package``"""
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header line
+        timings.append(ImportTiming(fields[2].strip(), int(fields[0]), int(fields[1])))
+    return timings
+
+
+def measure(target: str, runs: int = 5) -> Dict[str, object]:
+    """Best-of-``runs`` cumulative import time for ``target`` plus every module it loaded.
+
+    ``src`` is imported as a package from the repo root; other targets by
+    their flat name from ``src/``, the way the app and workers import them.
+    """
+    cwd = ROOT if target == "src" or target.startswith("src.") else SRC
+    best: List[ImportTiming] = []
+    best_us = None
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+            cwd=cwd, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {target} failed:\n{proc.stderr[-2000:]}")
+        timings = parse_importtime(proc.stderr)
+        total = next(t.cumulative_us for t in reversed(timings) if t.module.strip() == target)
+        if best_us is None or total < best_us:
+            best_us, best = total, timings
+    return {
+        "target": target,
+        "cumulative_ms": best_us / 1000,
+        "modules": {t.module.strip() for t in best},
+        "heaviest": sorted(best, key=lambda t: t.self_us, reverse=True)[:5],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("targets", nargs="*", default=["src", "arq_worker", "serving", "main"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=0.0, help="fail if any target exceeds this")
+    args = parser.parse_args()
+
+    over = []
+    print(f"{'target':<14}{'import ms':>11}{'modules':>9}   heaviest (self ms)")
+    for target in args.targets:
+        result = measure(target, args.runs)
+        heaviest = ", ".join(f"{t.module.strip()} {t.self_us / 1000:.1f}" for t in result["heaviest"])
+        print(f"{target:<14}{result['cumulative_ms']:>11.2f}{len(result['modules']):>9}   {heaviest}")
+        if args.budget_ms and result["cumulative_ms"] > args.budget_ms:
+            over.append(target)
+    if over:
+        print(f"over the {args.budget_ms} ms budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+HybridLocalCache disk-tier throughput: connection per call, persistent connection, write-behind
+
+"connect-per-call" reproduces the old behaviour (a fresh default-journal
+connection for every statement); "persistent" is the cache as shipped;
+"write-behind" batches persisted sets in the background. Set throughput
+includes the final flush, so every row is on disk when the clock stops.
+Cold gets drop the RAM tier first so every read goes to SQLite.
+The codec table compares value encodings on a page-snapshot sized value.
+The batch table loads a workflow's keys from disk with a get/set loop vs
+get_many/set_many. The threaded table runs readers mixing RAM hits with disk misses; the
+"global lock" row holds one lock across the whole get, as before sharding.
+The async table compares AsyncHybridLocalCache with wrapping every call in
+run_in_executor, for RAM hits and for a stampede of awaits on one cold key.
+
+    python scripts/benchmarks/bench_local_cache.py --ops 5000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from browser_automation.async_local_cache import AsyncHybridLocalCache  # noqa: E402
+from browser_automation.cache_codecs import COMPRESSORS, SERIALIZERS, CacheCodec  # noqa: E402
+from browser_automation.local_cache import CacheEntry, HybridLocalCache  # noqa: E402
+
+
+class ConnectPerCallCache(HybridLocalCache):
+    """Baseline: a new connection per statement, default journal and sync"""
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, isolation_level=None)
+
+
+def ops_per_sec(ops: int, op: Callable[[int], None]) -> float:
+    start = time.perf_counter()
+    for i in range(ops):
+        op(i)
+    return ops / (time.perf_counter() - start)
+
+
+def run(cache_cls, ops: int, **kwargs) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = cache_cls(cache_dir=cache_dir, max_entries=ops * 2, **kwargs)
+        value = {"url": "https://example.com/page", "title": "Example", "links": list(range(20))}
+
+        def set_all() -> None:
+            for i in range(ops):
+                cache.set(f"page:{i}", value)
+            cache.flush()
+
+        result = {"set": ops_per_sec(1, lambda _: set_all()) * ops}
+
+        def cold_get(i: int) -> None:
+            cache.clear_memory()
+            cache.get(f"page:{i}")
+
+        result["cold get"] = ops_per_sec(ops, cold_get)
+        result["hot get"] = ops_per_sec(ops, lambda i: cache.get("page:0"))
+        result["get_stats"] = ops_per_sec(min(ops, 1000), lambda i: cache.get_stats())
+        cache.close()
+    return result
+
+
+class GlobalLockCache(HybridLocalCache):
+    """Baseline: one lock held across RAM lookup and disk fallback"""
+
+    def get(self, key):
+        with self.lock:
+            return super().get(key)
+
+
+def threaded_table(ops: int, threads: int) -> None:
+    print(f"\n{threads} threads, 90% RAM hits / 10% disk misses")
+    print(f"{'ram tier':<18}{'ops/sec':>12}{'hit p99 us':>12}")
+    for name, cache_cls, shards in [("global lock", GlobalLockCache, 1), ("1 shard", HybridLocalCache, 1),
+                                    ("16 shards", HybridLocalCache, 16)]:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = cache_cls(cache_dir=cache_dir, num_shards=shards)
+            for i in range(100):
+                cache.set(f"hot:{i}", {"i": i})
+            hit_latencies: List[float] = []
+
+            def reader(seed: int) -> None:
+                latencies = []
+                for i in range(ops):
+                    if i % 10 == 0:
+                        cache.get(f"missing:{seed}:{i}")
+                    else:
+                        start = time.perf_counter()
+                        cache.get(f"hot:{(seed + i) % 100}")
+                        latencies.append(time.perf_counter() - start)
+                hit_latencies.extend(latencies)
+
+            workers = [threading.Thread(target=reader, args=(n,)) for n in range(threads)]
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - start
+            hit_latencies.sort()
+            p99 = hit_latencies[int(len(hit_latencies) * 0.99)] * 1e6
+            print(f"{name:<18}{threads * ops / elapsed:>12,.0f}{p99:>12.1f}")
+            cache.close()
+
+
+def batch_table(keys: int, rounds: int = 20) -> None:
+    print(f"\n{keys} keys per call, ms")
+    print(f"{'':<28}{'loop':>10}{'batch':>10}")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = HybridLocalCache(cache_dir=cache_dir, max_entries=keys * 4)
+        names = [f"workflow:42:step:{i}" for i in range(keys)]
+        value = {"status": "done", "output": "x" * 200}
+
+        def timed(op: Callable[[], None], cold: bool) -> float:
+            total = 0.0
+            for _ in range(rounds):
+                if cold:
+                    cache.clear_memory()
+                start = time.perf_counter()
+                op()
+                total += time.perf_counter() - start
+            return total / rounds * 1000
+
+        set_loop = timed(lambda: [cache.set(name, value) for name in names], cold=False)
+        set_batch = timed(lambda: cache.set_many(dict.fromkeys(names, value)), cold=False)
+        get_loop = timed(lambda: [cache.get(name) for name in names], cold=True)
+        get_batch = timed(lambda: cache.get_many(names), cold=True)
+        print(f"{'set':<28}{set_loop:>10.2f}{set_batch:>10.2f}")
+        print(f"{'cold get':<28}{get_loop:>10.2f}{get_batch:>10.2f}")
+        cache.close()
+
+
+def async_table(ops: int, stampede: int = 100) -> None:
+    print(f"\nasync, {stampede} concurrent awaits per cold key")
+    print(f"{'':<18}{'hit us':>10}{'cold ms':>10}{'disk reads':>12}")
+
+    async def bench(cache_dir: str) -> None:
+        facade = AsyncHybridLocalCache(cache_dir=cache_dir)
+        cache = facade.cache
+        loop = asyncio.get_running_loop()
+        reads = []
+        read = cache._read_from_db
+        cache._read_from_db = lambda key: reads.append(key) or read(key)
+        for name, get in (
+            ("run_in_executor", lambda key: loop.run_in_executor(None, cache.get, key)),
+            ("async facade", facade.get),
+        ):
+            await facade.set("page:0", {"status": "done"})
+            start = time.perf_counter()
+            for _ in range(ops):
+                await get("page:0")
+            hit_us = (time.perf_counter() - start) / ops * 1e6
+            reads.clear()
+            cold_ms = 0.0
+            for i in range(20):
+                await facade.set(f"cold:{i}", "x" * 200)
+                cache.clear_memory()
+                start = time.perf_counter()
+                await asyncio.gather(*(get(f"cold:{i}") for _ in range(stampede)))
+                cold_ms += (time.perf_counter() - start) * 1000 / 20
+            print(f"{name:<18}{hit_us:>10.1f}{cold_ms:>10.2f}{len(reads) / 20:>12.1f}")
+        await facade.aclose()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        asyncio.run(bench(cache_dir))
+
+
+def codec_table(ops: int) -> None:
+    snapshot = {
+        "url": "https://example.com/catalog?page=3",
+        "title": "Catalog",
+        "links": [{"href": f"/item/{i}", "text": f"Item {i}"} for i in range(200)],
+        "html": "<div class='item'><span>price</span></div>" * 300,
+    }
+    print(f"\n{'codec':<18}{'bytes':>10}{'encode us':>12}{'decode us':>12}")
+    json_start = time.perf_counter()
+    for _ in range(ops):
+        # Old set path: CacheEntry sized by json.dumps twice, then json.dumps for the row
+        CacheEntry("k", snapshot)
+        CacheEntry("k", snapshot)
+        json.dumps(snapshot)
+    json_us = (time.perf_counter() - json_start) / ops * 1e6
+    print(f"{'json text (old)':<18}{len(json.dumps(snapshot)):>10}{json_us:>12.1f}{'':>12}")
+    for serializer in SERIALIZERS:
+        for compression in [None, *COMPRESSORS]:
+            try:
+                codec = CacheCodec(serializer, compression, compress_threshold=1024)
+            except ImportError:
+                continue  # optional package not installed
+            data = codec.encode(snapshot)
+            start = time.perf_counter()
+            for _ in range(ops):
+                codec.encode(snapshot)
+            encode_us = (time.perf_counter() - start) / ops * 1e6
+            start = time.perf_counter()
+            for _ in range(ops):
+                codec.decode(data)
+            decode_us = (time.perf_counter() - start) / ops * 1e6
+            name = serializer + (f"+{compression}" if compression else "")
+            print(f"{name:<18}{len(data):>10}{encode_us:>12.1f}{decode_us:>12.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--ops", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    results = {
+        "connect-per-call": run(ConnectPerCallCache, args.ops),
+        "persistent": run(HybridLocalCache, args.ops),
+        "write-behind": run(HybridLocalCache, args.ops, write_behind=True),
+    }
+    ops = list(results["persistent"])
+    print(f"{'ops/sec':<18}" + "".join(f"{name:>14}" for name in ops) + f"{'set speedup':>14}")
+    base = results["connect-per-call"]["set"]
+    for name, result in results.items():
+        row = "".join(f"{result[op]:>14,.0f}" for op in ops)
+        print(f"{name:<18}{row}{result['set'] / base:>13.1f}x")
+    codec_table(min(args.ops, 1000))
+    batch_table(500)
+    threaded_table(args.ops, args.threads)
+    async_table(args.ops)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Middleware overhead benchmark: BaseHTTPMiddleware stack vs fused pure-ASGI pipeline
+
+Drives each app in-process through httpx's ASGI transport, so the numbers
+isolate middleware cost from sockets and server workers.
+
+    python scripts/benchmarks/bench_middleware.py --requests 5000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import StreamingResponse  # noqa: E402
+
+from middleware import (  # noqa: E402
+    CORSMiddleware,
+    ErrorHandlingMiddleware,
+    LoggingMiddleware,
+    PerformanceMonitoringMiddleware,
+    RequestIDMiddleware,
+    RequestPipelineMiddleware,
+)
+
+
+def _routes(app: FastAPI) -> FastAPI:
+    @app.get("/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    @app.get("/stream")
+    async def stream():
+        return StreamingResponse((b"x" * 1024 for _ in range(16)), media_type="text/plain")
+
+    return app
+
+
+def build_apps() -> Dict[str, FastAPI]:
+    legacy = FastAPI()
+    legacy.add_middleware(PerformanceMonitoringMiddleware)
+    legacy.add_middleware(CORSMiddleware)
+    legacy.add_middleware(ErrorHandlingMiddleware)
+    legacy.add_middleware(LoggingMiddleware)
+    legacy.add_middleware(RequestIDMiddleware)
+
+    fused = FastAPI()
+    fused.add_middleware(RequestPipelineMiddleware)
+
+    bare = FastAPI()
+    return {"none": _routes(bare), "basehttp x5": _routes(legacy), "fused asgi": _routes(fused)}
+
+
+async def run(app: FastAPI, path: str, requests: int, concurrency: int) -> Dict[str, float]:
+    transport = httpx.ASGITransport(app=app)
+    latencies: List[float] = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(min(200, requests)):
+            await client.get(path)  # warm-up
+
+        queue = iter(range(requests))
+
+        async def worker():
+            for _ in queue:
+                start = time.perf_counter()
+                response = await client.get(path, headers={"origin": "http://bench"})
+                await response.aread()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "req_s": requests / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--path", default="/ping", choices=["/ping", "/stream"])
+    parser.add_argument("--log-level", default="WARNING", help="level for the middleware logger")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level)
+    print(f"{args.requests} requests to {args.path}, concurrency {args.concurrency}")
+    print(f"{'stack':<14}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+
+    results = {}
+    for name, app in build_apps().items():
+        results[name] = result = await run(app, args.path, args.requests, args.concurrency)
+        print(f"{name:<14}{result['req_s']:>10.0f}{result['p50_ms']:>10.2f}"
+              f"{result['p99_ms']:>10.2f}{result['mean_ms']:>10.2f}")
+
+    speedup = results["fused asgi"]["req_s"] / results["basehttp x5"]["req_s"]
+    print(f"fused vs BaseHTTPMiddleware stack: {speedup:.2f}x throughput")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
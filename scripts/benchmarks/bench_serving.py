@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Serving configuration load test: event loop / HTTP parser / worker model
+
+Starts each server configuration as a real subprocess on a local port and
+drives it over sockets with a fixed number of concurrent clients.
+
+    python scripts/benchmarks/bench_serving.py --requests 3000 --concurrency 100
+    python scripts/benchmarks/bench_serving.py --path "/llm?delay_ms=200" --concurrency 500
+
+gunicorn's ``sync`` worker class is not included: it cannot run an ASGI app.
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(os.path.dirname(HERE))
+APP = "serving_app:app"
+
+
+def configurations(workers: int) -> Dict[str, List[str]]:
+    uvicorn = [sys.executable, "-m", "uvicorn", APP, "--app-dir", HERE, "--no-access-log",
+               "--log-level", "warning"]
+    gunicorn = [sys.executable, "-m", "gunicorn", "--config", os.path.join(ROOT, "config", "gunicorn_config.py"),
+                "--chdir", HERE, "--access-logfile", "-", "--error-logfile", "-", "--pid", os.devnull,
+                "--log-level", "warning"]
+    return {
+        "uvicorn asyncio+h11 x1": uvicorn + ["--loop", "asyncio", "--http", "h11"],
+        "uvicorn uvloop+httptools x1": uvicorn + ["--loop", "uvloop", "--http", "httptools"],
+        f"uvicorn uvloop+httptools x{workers}": uvicorn + ["--loop", "uvloop", "--http", "httptools",
+                                                          "--workers", str(workers)],
+        f"gunicorn+uvicorn workers x{workers}": gunicorn + ["--workers", str(workers)],
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start(command: List[str], port: int) -> subprocess.Popen:
+    if "gunicorn" in command[2]:
+        command = command + ["--bind", f"127.0.0.1:{port}", APP]
+    else:
+        command = command + ["--host", "127.0.0.1", "--port", str(port)]
+    env = {**os.environ, "LOG_LEVEL": "WARNING", "GUNICORN_ACCESS_LOG": "-", "GUNICORN_ERROR_LOG": "-"}
+    return subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)
+
+
+def wait_ready(port: int, timeout: float = 20) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/ping", timeout=1, trust_env=False).status_code == 200:
+                return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def stop(process: subprocess.Popen) -> None:
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(15)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+
+
+async def load(port: int, path: str, requests: int, concurrency: int) -> Dict[str, float]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60,
+                                 trust_env=False) as client:
+        queue = iter(range(requests))
+
+        async def worker():
+            nonlocal errors
+            for _ in queue:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "req_s": requests / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "errors": errors,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--path", default="/ping")
+    parser.add_argument("--workers", type=int, default=max(2, min(4, os.cpu_count() or 1)))
+    parser.add_argument("--only", help="substring of a configuration name to run")
+    args = parser.parse_args(argv)
+
+    print(f"{args.requests} requests to {args.path}, concurrency {args.concurrency}")
+    print(f"{'configuration':<34}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'mean ms':>9}{'errors':>8}")
+    for name, command in configurations(args.workers).items():
+        if args.only and args.only not in name:
+            continue
+        port = free_port()
+        process = start(command, port)
+        try:
+            wait_ready(port)
+            asyncio.run(load(port, args.path, min(200, args.requests), args.concurrency))  # warm-up
+            result = asyncio.run(load(port, args.path, args.requests, args.concurrency))
+        finally:
+            stop(process)
+        print(f"{name:<34}{result['req_s']:>9.0f}{result['p50_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+              f"{result['mean_ms']:>9.2f}{result['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Minimal app for bench_serving.py: the production middleware plus stand-in endpoints
+
+/ping is pure framework overhead; /llm holds the request open for ``delay_ms``
+like a proxied local-model call, which is what ARQ workers spend their time on.
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from fastapi import FastAPI  # noqa: E402
+
+from middleware import RequestPipelineMiddleware  # noqa: E402
+
+app = FastAPI()
+app.add_middleware(RequestPipelineMiddleware)
+
+
+@app.get("/ping")
+async def ping():
+    return {"status": "ok"}
+
+
+@app.get("/llm")
+async def llm(delay_ms: int = 200):
+    await asyncio.sleep(delay_ms / 1000)
+    return {"response": "x" * 512}
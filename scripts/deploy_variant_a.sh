@@ -1,6 +1,6 @@
 #!/bin/bash
 # Variant A Deployment Script for ARQ Application
-# Python 2.7 + Gunicorn + Nginx deployment on Beget hosting
+# Python 3 + Gunicorn + Nginx deployment on Beget hosting
 # Usage: bash deploy_variant_a.sh
 
 set -e
@@ -37,10 +37,10 @@ else
 fi
 echo -e "${GREEN}✓ Repository ready${NC}"
 
-# 3. Create Python 2.7 virtual environment
-echo -e "${YELLOW}Step 3: Creating Python 2.7 virtual environment...${NC}"
+# 3. Create Python 3 virtual environment
+echo -e "${YELLOW}Step 3: Creating Python 3 virtual environment...${NC}"
 if [ ! -d "$VENV_PATH" ]; then
-    virtualenv -p /usr/bin/python2.7 $VENV_PATH
+    python3 -m venv $VENV_PATH
 fi
 echo -e "${GREEN}✓ Virtual environment ready${NC}"
 
@@ -48,8 +48,7 @@ echo -e "${GREEN}✓ Virtual environment ready${NC}"
 echo -e "${YELLOW}Step 4: Installing Python dependencies...${NC}"
 source $VENV_PATH/bin/activate
 pip install --upgrade pip
-pip install gunicorn==19.9.0
-pip install gevent
+pip install "gunicorn>=22" "uvicorn[standard]"
 # Add other dependencies from requirements.txt if exists
 if [ -f "$APP_HOME/requirements.txt" ]; then
     pip install -r $APP_HOME/requirements.txt
@@ -83,7 +82,7 @@ echo -e "${GREEN}✓ Log rotation configured${NC}"
 echo -e "${YELLOW}Step 7: Starting Gunicorn application server...${NC}"
 cd $APP_HOME
 source $VENV_PATH/bin/activate
-gunicorn --config config/gunicorn_config.py src.main:app &
+gunicorn --config config/gunicorn_config.py --chdir src main:app &
 echo $! > $GUNICORN_PID
 deactivate
 echo -e "${GREEN}✓ Gunicorn started (PID: $(cat $GUNICORN_PID))${NC}"
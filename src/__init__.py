@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-"""ARQ Package Initialization - Exports all core modules.
+"""ARQ Package Initialization - Exports all core modules (loaded lazily).
 
 This package provides the core infrastructure for the ARQ AI Assistant system,
 including database models, configuration management, memory systems, session handling,
@@ -13,43 +13,84 @@ Modules:
     sessions: Session management with secure token generation
     utils: API utilities and helper functions
     middleware: Middleware for logging, error handling, and monitoring
+
+Exports are resolved on first attribute access, so importing the package
+does not pull in SQLAlchemy, pydantic-settings or FastAPI.
 """
 
-from typing import Any
-
-# Import all core modules
-from .models import (
-    User,
-    Session,
-    Message,
-    MessageEmbedding,
-    Memory,
-    ContextSnapshot,
-    APILog,
-    Configuration,
-    SystemEvent,
-)
-from .database import DatabaseConfig, DatabaseManager
-from .config import Environment, Settings
-from .memory import MemoryType, MemoryManager
-from .sessions import SessionManager
-from .utils import (
-    ErrorResponse,
-    SuccessResponse,
-    PaginationHelper,
-    CacheHelper,
-    ValidationHelper,
-    TokenHelper,
-    PerformanceHelper,
-    LoggingHelper,
-)
-from .middleware import (
-    RequestIDMiddleware,
-    LoggingMiddleware,
-    ErrorHandlingMiddleware,
-    CORSMiddleware,
-    PerformanceMonitoringMiddleware,
-)
+import importlib
+import os
+import sys
+from typing import TYPE_CHECKING, Any, Dict, List
+
+# Public name -> module that defines it. Nothing below is imported until first
+# attribute access (PEP 562), so ``import src`` stays cheap for workers and CLI
+# tools that never touch SQLAlchemy, pydantic-settings or FastAPI.
+_LAZY_EXPORTS: Dict[str, str] = {
+    # Models
+    "User": "models",
+    "Session": "models",
+    "Message": "models",
+    "MessageEmbedding": "models",
+    "Memory": "models",
+    "ContextSnapshot": "models",
+    "APILog": "models",
+    "Configuration": "models",
+    "SystemEvent": "models",
+    # Database
+    "DatabaseConfig": "database",
+    "DatabaseManager": "database",
+    # Configuration
+    "Settings": "config",
+    "settings": "config",
+    # Memory Management
+    "MemoryType": "memory",
+    "MemoryManager": "memory",
+    # Session Management
+    "SessionManager": "sessions",
+    # Utilities
+    "ErrorResponse": "utils",
+    "SuccessResponse": "utils",
+    "PaginationHelper": "utils",
+    "CacheHelper": "utils",
+    "ValidationHelper": "utils",
+    "TokenHelper": "utils",
+    "PerformanceHelper": "utils",
+    "LoggingHelper": "utils",
+    # Middleware
+    "RequestIDMiddleware": "middleware",
+    "LoggingMiddleware": "middleware",
+    "ErrorHandlingMiddleware": "middleware",
+    "CORSMiddleware": "middleware",
+    "PerformanceMonitoringMiddleware": "middleware",
+    "RequestPipelineMiddleware": "middleware",
+}
+
+_SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+if TYPE_CHECKING:
+    from database import DatabaseManager
+    from memory import MemoryManager
+    from sessions import SessionManager
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Core modules import each other by flat name (``from models import Base``),
+    # so resolve them the same way: a second copy under ``src.models`` would
+    # redefine the ORM metadata.
+    if _SRC_DIR not in sys.path:
+        sys.path.insert(0, _SRC_DIR)
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
+
 
 __version__ = "1.0.0"
 __author__ = "ARQ Development Team"
@@ -71,8 +112,8 @@ __all__ = [
     "DatabaseConfig",
     "DatabaseManager",
     # Configuration
-    "Environment",
     "Settings",
+    "settings",
     # Memory Management
     "MemoryType",
     "MemoryManager",
@@ -93,10 +134,10 @@ __all__ = [
     "ErrorHandlingMiddleware",
     "CORSMiddleware",
     "PerformanceMonitoringMiddleware",
+    "RequestPipelineMiddleware",
 ]
 
-# Lazy loading of heavy modules if needed
-def get_database_manager(config: Settings) -> DatabaseManager:
+def get_database_manager(config: Any) -> "DatabaseManager":
     """Initialize database manager with configuration.
     
     Args:
@@ -105,19 +146,19 @@ def get_database_manager(config: Settings) -> DatabaseManager:
     Returns:
         DatabaseManager instance
     """
-    return DatabaseManager(config)
+    return __getattr__("DatabaseManager")(config)
 
 
-def get_memory_manager() -> MemoryManager:
+def get_memory_manager() -> "MemoryManager":
     """Initialize memory manager.
     
     Returns:
         MemoryManager instance
     """
-    return MemoryManager()
+    return __getattr__("MemoryManager")()
 
 
-def get_session_manager(db_manager: DatabaseManager) -> SessionManager:
+def get_session_manager(db_manager: "DatabaseManager") -> "SessionManager":
     """Initialize session manager with database manager.
     
     Args:
@@ -126,4 +167,4 @@ def get_session_manager(db_manager: DatabaseManager) -> SessionManager:
     Returns:
         SessionManager instance
     """
-    return SessionManager(db_manager)
+    return __getattr__("SessionManager")(db_manager)
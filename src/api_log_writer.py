@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+ARQ - AI Assistant with Memory & Context Management
+Batched background writer persisting API request logs
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, NamedTuple, Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from models import APILog
+
+logger = logging.getLogger(__name__)
+
+
+class APILogRecord(NamedTuple):
+    """One request as captured by the middleware (mirrors the api_logs columns)"""
+    endpoint: str
+    method: str
+    status_code: int
+    processing_time: float  # milliseconds
+    created_at: datetime
+    request_size: Optional[int] = None
+    response_size: Optional[int] = None
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+    user_id: Optional[int] = None
+    error_message: Optional[str] = None
+
+
+class APILogWriter:
+    """Bounded in-memory buffer drained into api_logs by one background task.
+
+    ``submit`` never blocks or awaits: when the buffer is full the record is
+    dropped and counted. The flusher bulk-inserts every ``flush_interval_ms``
+    or as soon as ``batch_size`` records are waiting, one multi-row INSERT
+    per batch.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        capacity: int = 10000,
+        batch_size: int = 500,
+        flush_interval_ms: int = 250,
+    ):
+        self.engine = engine
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._buffer: Deque[APILogRecord] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+
+        self.submitted = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_flush_ms = 0.0
+
+    def submit(self, record: APILogRecord) -> bool:
+        """Queue a record; returns False (and counts a drop) when the buffer is full"""
+        if len(self._buffer) >= self.capacity:
+            self.dropped += 1
+            return False
+
+        self._buffer.append(record)
+        self.submitted += 1
+        if self._wakeup is not None and len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def start(self) -> None:
+        """Start the background flusher on the running event loop"""
+        if self._task:
+            return
+        self._running = True
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher after writing everything still buffered"""
+        if not self._task:
+            await self.flush()
+            return
+        self._running = False
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while self._running:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Write buffered records in batches; returns the number of rows written"""
+        written = 0
+        while self._buffer:
+            batch = self._take_batch()
+            start = time.perf_counter()
+            try:
+                async with self.engine.begin() as conn:
+                    await conn.execute(APILog.__table__.insert(), [record._asdict() for record in batch])
+            except Exception as e:
+                # Logging must never take the API down; the batch is counted and discarded
+                self.failed += len(batch)
+                logger.error(f"Failed to write {len(batch)} API log records: {str(e)}")
+                continue
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+            self.batches += 1
+            self.written += len(batch)
+            written += len(batch)
+        return written
+
+    def _take_batch(self) -> List[APILogRecord]:
+        count = min(self.batch_size, len(self._buffer))
+        return [self._buffer.popleft() for _ in range(count)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "pending": len(self._buffer),
+            "capacity": self.capacity,
+            "submitted": self.submitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+        }
+
+
+# Global writer instance
+_api_log_writer: Optional[APILogWriter] = None
+
+
+def get_api_log_writer() -> Optional[APILogWriter]:
+    """Return the global writer, or None when request logging is not enabled"""
+    return _api_log_writer
+
+
+def init_api_log_writer(engine: AsyncEngine, settings: Any) -> Optional[APILogWriter]:
+    """Create and start the global writer from Settings (no-op when API_LOG_ENABLED is false)"""
+    global _api_log_writer
+    if not settings.API_LOG_ENABLED:
+        return None
+    _api_log_writer = APILogWriter(
+        engine,
+        capacity=settings.API_LOG_BUFFER_SIZE,
+        batch_size=settings.API_LOG_BATCH_SIZE,
+        flush_interval_ms=settings.API_LOG_FLUSH_INTERVAL_MS,
+    )
+    _api_log_writer.start()
+    return _api_log_writer
+
+
+async def shutdown_api_log_writer() -> None:
+    """Flush and stop the global writer"""
+    global _api_log_writer
+    if _api_log_writer:
+        await _api_log_writer.stop()
+        _api_log_writer = None
@@ -1,94 +1,177 @@
-import httpx
 import asyncio
-from fastapi import APIRouter, BackgroundTasks
-from pydantic import BaseModel
-from datetime import datetime
 import json
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 import os
+from typing import Optional
+
+from config import settings
+from http_clients import get_http_clients
+from job_queue import open_job_queue
+from task_engine import TaskEngine
+from task_store import TaskStore, open_task_store
 
 router = APIRouter(prefix="/api/v1/arq", tags=["ARQ AI Engine"])
 
 # Настройки
-DATA_DIR = "/app/data"
-TASKS_DB_PATH = os.path.join(DATA_DIR, "tasks_db.json")
+DATA_DIR = settings.ARQ_DATA_DIR
+# Старый JSON-файл импортируется в SQLite при первом запуске
+LEGACY_TASKS_DB_PATH = os.path.join(DATA_DIR, "tasks_db.json")
+EVENTS_POLL_INTERVAL = 0.5  # как часто SSE-поток проверяет новые переходы статусов
+EVENTS_KEEPALIVE = 15.0  # комментарий-пинг, чтобы прокси не рвали соединение
 OLLAMA_URL = "http://host.docker.internal:11434/api/generate" # Для связи из Docker с хостом
+OLLAMA_MODEL = "llama3.1:latest"
 
 class DevelopmentGoal(BaseModel):
     title: str
     description: str = ""
     max_iterations: int = 5
 
-# Вспомогательные функции для БД (упрощено для краткости)
-def load_db():
-    if os.path.exists(TASKS_DB_PATH):
-        with open(TASKS_DB_PATH, "r") as f: return json.load(f)
-    return {}
+# Хранилище задач (SQLite WAL): атомарные обновления, индекс по статусу
+_task_store: Optional[TaskStore] = None
 
-def save_db(data):
-    with open(TASKS_DB_PATH, "w") as f: json.dump(data, f, indent=4)
+def get_task_store() -> TaskStore:
+    global _task_store
+    if _task_store is None:
+        _task_store = open_task_store(DATA_DIR, LEGACY_TASKS_DB_PATH)
+    return _task_store
 
-# --- ГЛАВНАЯ МАГИЯ: ФОНОВЫЙ AI-ПРОЦЕСС ---
-async def run_ai_task(task_id: str, prompt: str):
-    db = load_db()
-    if task_id not in db: return
+# Очередь задач: выполняют отдельные процессы arq_worker.py
+_job_queue = None
 
-    try:
-        # 1. Обновляем статус: ИИ начал думать
-        db[task_id]["status"] = "running"
-        save_db(db)
-
-        # 2. Запрос к Ollama
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(OLLAMA_URL, json={
-                "model": "llama3.1:latest",
-                "prompt": f"Context: You are ARQ AI. Task: {prompt}. Give a concise technical plan.",
-                "stream": False
-            })
-            
-            if response.status_code == 200:
-                result = response.json().get("response", "No response from AI")
-                db = load_db()
-                db[task_id]["status"] = "completed"
-                db[task_id]["iterations"] = db[task_id]["goal"]["max_iterations"]
-                db[task_id]["results"] = [result]
-            else:
-                db[task_id]["status"] = "failed"
-                
-        save_db(db)
-    except Exception as e:
-        db = load_db()
-        db[task_id]["status"] = f"error: {str(e)}"
-        save_db(db)
+def get_job_queue():
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = open_job_queue(settings)
+    return _job_queue
+
+# --- ГЛАВНАЯ МАГИЯ: ФОНОВЫЙ AI-ПРОЦЕСС (выполняется воркером) ---
+async def ollama_generate(prompt: str, on_chunk) -> str:
+    """Потоковый запрос к Ollama; on_chunk получает каждый новый фрагмент.
+
+    Клиент общий (http_clients): соединение с Ollama переиспользуется между вызовами.
+    """
+    parts = []
+    client = get_http_clients().get("ollama")
+    async with client.stream("POST", OLLAMA_URL, json={
+        "model": OLLAMA_MODEL,
+        "prompt": prompt,
+        "stream": True
+    }, timeout=60.0) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            parts.append(chunk.get("response", ""))
+            on_chunk(parts[-1])
+            if chunk.get("done"):
+                break
+    return "".join(parts) or "No response from AI"
+
+# Движок итераций: один на процесс, общий лимит одновременных LLM-вызовов
+_task_engine: Optional[TaskEngine] = None
+
+def get_task_engine() -> TaskEngine:
+    global _task_engine
+    if _task_engine is None:
+        _task_engine = TaskEngine(
+            get_task_store(),
+            ollama_generate,
+            concurrency=settings.ARQ_LLM_CONCURRENCY,
+            max_steps=settings.ARQ_MAX_SUBSTEPS,
+        )
+    return _task_engine
+
+async def run_ai_task(task_id: str, prompt: str):
+    """Ошибки пробрасываются: воркер повторит задачу с последнего чекпоинта или пометит её как error"""
+    await get_task_engine().run(task_id)
 
 # --- ЭНДПОИНТЫ ---
 
 @router.post("/start-development")
-async def start_dev(goal: DevelopmentGoal, background_tasks: BackgroundTasks):
-    db = load_db()
-    task_id = f"task-{len(db) + 1}"
-    
-    new_task = {
-        "task_id": task_id,
-        "goal": goal.dict(),
-        "status": "pending",
-        "iterations": 0,
-        "start_time": datetime.now().isoformat(),
-        "results": []
-    }
-    
-    db[task_id] = new_task
-    save_db(db)
+async def start_dev(goal: DevelopmentGoal):
+    # Вызовы SQLite синхронные: выполняем в потоке, чтобы не блокировать event loop
+    task = await asyncio.to_thread(get_task_store().create_task, goal.dict())
+    task_id = task["task_id"]
     
-    # Запускаем ИИ в фоне, чтобы не вешать фронтенд
-    background_tasks.add_task(run_ai_task, task_id, goal.title)
+    # Ставим в очередь: задача переживёт рестарт и не нагружает веб-процесс
+    await asyncio.to_thread(get_job_queue().enqueue, task_id, {"prompt": goal.title})
     
     return {"status": "accepted", "task_id": task_id}
 
 @router.get("/health")
 async def health():
-    db = load_db()
+    # Дешёвая проверка: один COUNT по индексу (status, start_time)
     return {
         "status": "healthy",
-        "active_tasks": len([t for t in db.values() if t["status"] == "running"]),
-        "tasks": list(db.values())
+        "active_tasks": await asyncio.to_thread(get_task_store().count_tasks, status="running"),
+    }
+
+@router.get("/tasks")
+async def list_tasks(
+    status: Optional[str] = Query(None, description="Only tasks in this status"),
+    since: Optional[str] = Query(None, description="Started at or after (ISO timestamp)"),
+    until: Optional[str] = Query(None, description="Started before (ISO timestamp)"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page"),
+):
+    try:
+        items, next_cursor = await asyncio.to_thread(
+            get_task_store().list_tasks_page, status, limit, cursor, since, until
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor, "has_more": next_cursor is not None}
+
+@router.get("/tasks/stats")
+async def task_stats():
+    return {
+        "tasks": await asyncio.to_thread(get_task_store().status_counts),
+        "queue": await asyncio.to_thread(get_job_queue().stats),
     }
+
+@router.get("/tasks/{task_id}")
+async def get_task(task_id: str):
+    task = await asyncio.to_thread(get_task_store().get_task, task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail=f"Task not found: {task_id}")
+    return task
+
+@router.get("/events")
+async def task_events(
+    request: Request,
+    task_id: Optional[str] = Query(None, description="Only transitions of this task"),
+    after: Optional[int] = Query(None, description="Resume after this event id"),
+    last_event_id: Optional[int] = Header(None),
+):
+    """SSE-поток переходов статусов (пишут триггеры task_store, в т.ч. из воркеров).
+
+    Без ``after``/Last-Event-ID поток начинается с текущего момента.
+    """
+    store = get_task_store()
+    start = after if after is not None else last_event_id
+    if start is None:
+        start = await asyncio.to_thread(store.last_event_id)
+
+    async def stream():
+        last_id, idle = start, 0.0
+        while not await request.is_disconnected():
+            events = await asyncio.to_thread(store.events_after, last_id, task_id)
+            for event in events:
+                last_id = event["id"]
+                yield f"id: {last_id}\nevent: status\ndata: {json.dumps(event)}\n\n"
+            if events:
+                idle = 0.0
+                continue
+            if idle >= EVENTS_KEEPALIVE:
+                idle = 0.0
+                yield ": keepalive\n\n"
+            await asyncio.sleep(EVENTS_POLL_INTERVAL)
+            idle += EVENTS_POLL_INTERVAL
+
+    return StreamingResponse(
+        stream(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
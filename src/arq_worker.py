@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+ARQ - AI Assistant with Memory & Context Management
+Worker process pool draining the ARQ job queue
+
+    python src/arq_worker.py --processes 2 --concurrency 4
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+from typing import IO, Any, Awaitable, Callable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, every caller gets the pool lock
+    fcntl = None
+
+from http_clients import init_http_clients, shutdown_http_clients
+from job_queue import Job, open_job_queue
+from logging_pipeline import setup_logging, shutdown_logging
+from task_store import TaskStore
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Job], Awaitable[None]]
+
+
+class JobWorker:
+    """Runs up to ``concurrency`` jobs at once on one event loop.
+
+    Queue and task store calls are short SQLite/Redis round-trips and run in
+    the default executor so a busy database never stalls running jobs. While a job runs
+    its lease is renewed every third of the visibility timeout; failures are
+    retried with exponential backoff and the task record follows each step.
+    """
+
+    def __init__(
+        self,
+        queue: Any,
+        store: TaskStore,
+        handler: JobHandler,
+        concurrency: int = 4,
+        visibility_timeout: float = 120,
+        retry_backoff: float = 5,
+        poll_interval: float = 1.0,
+        name: Optional[str] = None,
+    ):
+        self.queue = queue
+        self.store = store
+        self.handler = handler
+        self.concurrency = concurrency
+        self.visibility_timeout = visibility_timeout
+        self.retry_backoff = retry_backoff
+        self.poll_interval = poll_interval
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self._running: set = set()
+
+    async def run(self, stop: asyncio.Event) -> None:
+        logger.info(f"Worker {self.name} started (concurrency {self.concurrency})")
+        while not stop.is_set():
+            await self._reap()
+            job = None
+            if len(self._running) < self.concurrency:
+                job = await asyncio.to_thread(self.queue.claim, self.name, self.visibility_timeout)
+            if job is not None:
+                task = asyncio.create_task(self._process(job))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+                continue
+            try:
+                await asyncio.wait_for(stop.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+        # Let in-flight jobs finish; anything cut short is reclaimed after its lease expires
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        logger.info(f"Worker {self.name} stopped")
+
+    async def _reap(self) -> None:
+        for job in await asyncio.to_thread(self.queue.reap_expired):
+            logger.warning(f"Job {job.id} for {job.task_id} timed out on its last attempt")
+            await asyncio.to_thread(
+                self.store.update_task, job.task_id, status="error", error="visibility timeout expired"
+            )
+
+    async def _heartbeat(self, job: Job) -> None:
+        while True:
+            await asyncio.sleep(self.visibility_timeout / 3)
+            if not await asyncio.to_thread(self.queue.extend, job, self.name, self.visibility_timeout):
+                logger.warning(f"Lost lease on job {job.id}")
+                return
+
+    async def _process(self, job: Job) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            await self.handler(job)
+        except Exception as e:
+            delay = self.retry_backoff * 2 ** (job.attempts - 1)
+            retry = job.attempts < job.max_attempts
+            # Record the outcome before requeueing: once the job is back in the
+            # queue another attempt may run, and this write must not land after it
+            status = "retrying" if retry else "error"
+            await asyncio.to_thread(self.store.update_task, job.task_id, status=status, error=str(e))
+            await asyncio.to_thread(self.queue.fail, job, self.name, str(e), delay)
+            if retry:
+                logger.warning(f"Job {job.id} attempt {job.attempts} failed, retrying in {delay:.0f}s: {e}")
+            else:
+                logger.error(f"Job {job.id} failed after {job.attempts} attempts: {e}")
+        else:
+            await asyncio.to_thread(self.queue.complete, job, self.name)
+        finally:
+            heartbeat.cancel()
+
+
+async def run_arq_job(job: Job) -> None:
+    from arq_endpoints import run_ai_task
+
+    await run_ai_task(job.task_id, job.payload["prompt"])
+
+
+def run_worker_process(concurrency: Optional[int] = None) -> None:
+    """Entry point of one pool process: drain the queue until SIGTERM/SIGINT"""
+    from arq_endpoints import get_task_store
+    from config import settings
+
+    # Spawned interpreters start without the parent's logging setup
+    setup_logging(settings.LOG_LEVEL, settings.LOG_FORMAT, settings.LOG_QUEUE_SIZE)
+    queue = open_job_queue(settings)
+    worker = JobWorker(
+        queue,
+        get_task_store(),
+        run_arq_job,
+        concurrency=concurrency or settings.ARQ_WORKER_CONCURRENCY,
+        visibility_timeout=settings.ARQ_JOB_VISIBILITY_TIMEOUT,
+        retry_backoff=settings.ARQ_JOB_RETRY_BACKOFF,
+        poll_interval=settings.ARQ_WORKER_POLL_INTERVAL,
+    )
+
+    async def main() -> None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+        init_http_clients(settings)
+        try:
+            await worker.run(stop)
+        finally:
+            await shutdown_http_clients()
+
+    try:
+        asyncio.run(main())
+    finally:
+        queue.close()
+        shutdown_logging()
+
+
+def start_worker_pool(processes: int, concurrency: Optional[int] = None) -> List[multiprocessing.Process]:
+    """Spawn ``processes`` fresh interpreters running run_worker_process"""
+    context = multiprocessing.get_context("spawn")
+    pool = []
+    for index in range(processes):
+        process = context.Process(
+            target=run_worker_process, args=(concurrency,), name=f"arq-worker-{index}", daemon=True
+        )
+        process.start()
+        pool.append(process)
+    return pool
+
+
+def acquire_pool_lock(path: str) -> Optional[IO]:
+    """Take an exclusive lock on ``path``; None if another process holds it.
+
+    Keep the returned file open for as long as the pool runs. The lock is
+    released when it is closed or the process exits, however it exits.
+    """
+    handle = open(path, "a")
+    if fcntl is not None:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return None
+    return handle
+
+
+def stop_worker_pool(pool: List[multiprocessing.Process], timeout: float = 30) -> None:
+    """SIGTERM every worker, wait for in-flight jobs, then kill stragglers"""
+    for process in pool:
+        if process.is_alive():
+            process.terminate()
+    for process in pool:
+        process.join(timeout)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+
+def main() -> None:
+    from config import settings
+
+    parser = argparse.ArgumentParser(description="ARQ job worker pool")
+    parser.add_argument("--processes", type=int, default=settings.ARQ_WORKER_PROCESSES)
+    parser.add_argument("--concurrency", type=int, default=settings.ARQ_WORKER_CONCURRENCY)
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        run_worker_process(args.concurrency)
+        return
+
+    pool = start_worker_pool(args.processes, args.concurrency)
+    signal.signal(signal.SIGTERM, lambda *_: stop_worker_pool(pool))
+    try:
+        for process in pool:
+            process.join()
+    except KeyboardInterrupt:
+        stop_worker_pool(pool)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Async facade over HybridLocalCache for event-loop code
+
+RAM hits are served inline: a shard lock is held only for a dict lookup
+and never across I/O, so awaiting a thread would cost more than the hit.
+Disk work leaves the loop:
+
+- writes go to one dedicated writer thread, so they reach SQLite in the
+  order they were issued and never contend with each other for the lock;
+- reads go to a small reader pool (WAL lets readers run alongside the
+  writer).
+
+Concurrent awaits for the same missing key share one load (stampede
+protection). One instance belongs to one event loop.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional
+
+from .local_cache import CacheEntry, HybridLocalCache
+
+
+class AsyncHybridLocalCache:
+    """Awaitable HybridLocalCache with inline RAM hits and off-loop disk I/O"""
+
+    def __init__(self, cache: Optional[HybridLocalCache] = None, readers: int = 2, **kwargs: Any):
+        self.cache = cache if cache is not None else HybridLocalCache(**kwargs)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="arq-cache-writer")
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="arq-cache-reader")
+        self._loads: Dict[str, asyncio.Future] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get value; a RAM hit returns without leaving the event loop"""
+        shard = self.cache._shard(key)
+        with shard.lock:
+            entry = shard.lookup(key)
+        if entry is not None:
+            return entry.value
+
+        load = self._loads.get(key)
+        if load is None:
+            load = asyncio.get_running_loop().run_in_executor(self._readers, self.cache._load, key, shard)
+            self._loads[key] = load
+            load.add_done_callback(lambda done: self._forget_load(key, done))
+        # Shielded: one caller being cancelled must not cancel the shared load
+        return await asyncio.shield(load)
+
+    def _forget_load(self, key: str, load: asyncio.Future) -> None:
+        if self._loads.get(key) is load:
+            del self._loads[key]
+
+    def _forget_loads(self, keys: Iterable[str]) -> None:
+        """Keep later gets from joining loads that started before a write"""
+        for key in keys:
+            self._loads.pop(key, None)
+            self.cache._invalidate_load(key)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get several values; RAM hits inline, all misses in one disk round trip"""
+        result: Dict[str, Any] = {}
+        misses = []
+        for index, shard_keys in self.cache._by_shard(dict.fromkeys(keys)).items():
+            shard = self.cache.shards[index]
+            with shard.lock:
+                for key in shard_keys:
+                    entry = shard.lookup(key)
+                    if entry is not None:
+                        result[key] = entry.value
+                    else:
+                        misses.append(key)
+        if misses:
+            loop = asyncio.get_running_loop()
+            result.update(await loop.run_in_executor(self._readers, self.cache._load_many, misses))
+        return result
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        persist: bool = True
+    ) -> None:
+        """Set value: RAM immediately, then the row on the writer thread"""
+        cache = self.cache
+        data = cache.codec.encode(value)
+        entry = CacheEntry(key, value, ttl, size=len(data))
+        shard = cache._shard(key)
+        with shard.lock:
+            shard.expire(time.time())
+            shard.put(entry)
+        if persist:
+            await asyncio.get_running_loop().run_in_executor(
+                self._writer, self._write, shard, key, data, entry, ttl
+            )
+        self._forget_loads([key])
+
+    def _write(self, shard, key: str, data: bytes, entry: CacheEntry, ttl: Optional[int]) -> None:
+        # Writer thread. Under the stripe's write lock, skip rows a newer
+        # set (sync or async) has already superseded in RAM; an entry that
+        # was evicted meanwhile is still written
+        with shard.write_lock:
+            with shard.lock:
+                current = shard.entries.get(key)
+            if current is None or current is entry:
+                self.cache._add_to_db(key, data, entry, ttl)
+
+    async def set_many(
+        self,
+        items: Dict[str, Any],
+        ttl: Optional[int] = None,
+        persist: bool = True
+    ) -> None:
+        self._forget_loads(items)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._writer, lambda: self.cache.set_many(items, ttl, persist))
+
+    async def delete(self, key: str) -> None:
+        self._forget_loads([key])
+        shard = self.cache._shard(key)
+        with shard.lock:
+            shard.drop(key)
+        await asyncio.get_running_loop().run_in_executor(self._writer, self.cache.delete, key)
+
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        self._forget_loads(keys)
+        await asyncio.get_running_loop().run_in_executor(self._writer, self.cache.delete_many, keys)
+
+    async def clear(self) -> None:
+        self._loads.clear()
+        self.cache.clear_memory()
+        await asyncio.get_running_loop().run_in_executor(self._writer, self.cache.clear)
+
+    async def flush(self) -> int:
+        return await asyncio.get_running_loop().run_in_executor(self._writer, self.cache.flush)
+
+    async def get_stats(self) -> Dict[str, Any]:
+        return await asyncio.get_running_loop().run_in_executor(self._readers, self.cache.get_stats)
+
+    async def aclose(self) -> None:
+        """Finish queued writes, close the cache and stop the I/O threads"""
+        await asyncio.get_running_loop().run_in_executor(self._writer, self.cache.close)
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+
+    async def __aenter__(self) -> "AsyncHybridLocalCache":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
@@ -0,0 +1,118 @@
+"""Value codecs for the local cache's SQLite tier
+
+Values are encoded once per ``set`` into a self-describing BLOB: one header
+byte (serializer in the low nibble, compression in the high nibble) followed
+by the payload. Readers decode by the header, so changing the configured
+codec never strands existing rows. Rows written before BLOB storage hold
+JSON TEXT and are still readable.
+
+Serializers: pickle (protocol 5, stdlib), msgpack (optional), json.
+Compression above a size threshold: zstd or lz4 (optional), zlib (stdlib).
+Pickle is only safe because the cache file is private to this application;
+do not point the cache at a database other processes can write.
+"""
+
+import json
+import pickle
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def _msgpack() -> Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]:
+    import msgpack  # optional dependency, only needed for this codec
+
+    return (
+        lambda value: msgpack.packb(value, use_bin_type=True),
+        lambda data: msgpack.unpackb(data, raw=False, strict_map_key=False),
+    )
+
+
+def _pickle() -> Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]:
+    return (lambda value: pickle.dumps(value, protocol=5), pickle.loads)
+
+
+def _json() -> Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]:
+    return (lambda value: json.dumps(value, separators=(",", ":")).encode("utf-8"), json.loads)
+
+
+def _zstd() -> Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    import zstandard  # optional dependency
+
+    compressor, decompressor = zstandard.ZstdCompressor(level=3), zstandard.ZstdDecompressor()
+    return (compressor.compress, decompressor.decompress)
+
+
+def _lz4() -> Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    import lz4.frame  # optional dependency
+
+    return (lz4.frame.compress, lz4.frame.decompress)
+
+
+def _zlib() -> Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    return (lambda data: zlib.compress(data, 1), zlib.decompress)
+
+
+# name -> (header id, loader); ids are stored on disk and must never change
+SERIALIZERS: Dict[str, Tuple[int, Callable]] = {"json": (0, _json), "pickle": (1, _pickle), "msgpack": (2, _msgpack)}
+COMPRESSORS: Dict[str, Tuple[int, Callable]] = {"zlib": (1, _zlib), "zstd": (2, _zstd), "lz4": (3, _lz4)}
+
+
+class CacheCodec:
+    """Encode values to BLOBs with one serializer and optional compression"""
+
+    def __init__(
+        self,
+        serializer: str = "pickle",
+        compression: Optional[str] = None,
+        compress_threshold: int = 4096
+    ):
+        if serializer not in SERIALIZERS:
+            raise ValueError(f"Unknown cache serializer: {serializer}")
+        if compression is not None and compression not in COMPRESSORS:
+            raise ValueError(f"Unknown cache compression: {compression}")
+        self.serializer = serializer
+        self.compression = compression
+        self.compress_threshold = compress_threshold
+
+        self._serializer_id, loader = SERIALIZERS[serializer]
+        self._dumps, _ = loader()
+        self._compressor_id, self._compress = 0, None
+        if compression is not None:
+            self._compressor_id, loader = COMPRESSORS[compression]
+            self._compress, _ = loader()
+        # Decoders are resolved per header on first use
+        self._loads: Dict[int, Callable[[bytes], Any]] = {}
+        self._decompressors: Dict[int, Callable[[bytes], bytes]] = {}
+
+    def encode(self, value: Any) -> bytes:
+        payload = self._dumps(value)
+        if self._compress is not None and len(payload) >= self.compress_threshold:
+            compressed = self._compress(payload)
+            if len(compressed) < len(payload):
+                return bytes((self._compressor_id << 4 | self._serializer_id,)) + compressed
+        return bytes((self._serializer_id,)) + payload
+
+    def decode(self, data: Any) -> Any:
+        if isinstance(data, str):
+            return json.loads(data)  # JSON TEXT row from before BLOB storage
+        header = data[0]
+        payload = memoryview(data)[1:]
+        if header >> 4:
+            payload = self._decompressor(header >> 4)(payload)
+        loads = self._loads.get(header & 0x0F)
+        if loads is None:
+            loads = self._loads[header & 0x0F] = self._loader(SERIALIZERS, header & 0x0F)[1]
+        return loads(bytes(payload) if loads is json.loads else payload)
+
+    def _decompressor(self, compressor_id: int) -> Callable[[bytes], bytes]:
+        decompress = self._decompressors.get(compressor_id)
+        if decompress is None:
+            decompress = self._decompressors[compressor_id] = self._loader(COMPRESSORS, compressor_id)[1]
+        return decompress
+
+    @staticmethod
+    def _loader(registry: Dict[str, Tuple[int, Callable]], header_id: int) -> Tuple[Callable, Callable]:
+        for name, (known_id, loader) in registry.items():
+            if known_id == header_id:
+                return loader()
+        raise ValueError(f"Unknown cache value header id: {header_id}")
@@ -0,0 +1,147 @@
+"""Hit/miss counters and latency histograms for the local cache
+
+Counters are kept per key namespace: the prefix before the first ``:``
+(``utils.CacheHelper.generate_cache_key("workflow", id)`` -> ``workflow``).
+Keys without a prefix, and namespaces beyond ``max_namespaces``, are
+counted under ``other`` so label cardinality stays bounded.
+
+Latencies go into fixed power-of-two microsecond buckets (1us .. ~1s, then
++Inf): one ``bit_length`` per observation, nothing sorted or retained.
+
+A ``CacheMetrics`` is not locked; its owner serialises updates (each RAM
+shard updates its own under the shard lock). ``merge`` combines them for
+export.
+"""
+
+from typing import Dict, List, Tuple
+
+COUNTERS = ("hits", "misses", "promotions", "evictions")
+HIT, MISS, PROMOTION, EVICTION = range(len(COUNTERS))
+OTHER_NAMESPACE = "other"
+
+# Bucket i counts durations under 2**i microseconds; the last is +Inf
+LATENCY_BUCKETS = 21
+
+
+def key_namespace(key: str) -> str:
+    prefix, separator, _ = key.partition(":")
+    return prefix if separator and prefix else OTHER_NAMESPACE
+
+
+class LatencyHistogram:
+    """Durations counted in log2 microsecond buckets"""
+
+    __slots__ = ("counts", "total")
+
+    def __init__(self):
+        self.counts = [0] * (LATENCY_BUCKETS + 1)
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[min(int(seconds * 1e6).bit_length(), LATENCY_BUCKETS)] += 1
+        self.total += seconds
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        self.total += other.total
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    @staticmethod
+    def upper_bounds() -> List[float]:
+        """Bucket upper bounds in seconds, excluding +Inf"""
+        return [2 ** i / 1e6 for i in range(LATENCY_BUCKETS)]
+
+
+class CacheMetrics:
+    """Per-namespace counters and per-(tier, op) latency histograms"""
+
+    def __init__(self, max_namespaces: int = 64):
+        self.max_namespaces = max_namespaces
+        self.counters: Dict[str, List[int]] = {}
+        self.latency: Dict[Tuple[str, str], LatencyHistogram] = {}
+
+    def row(self, key: str) -> List[int]:
+        """Counter row for ``key``'s namespace; callers may keep it and increment in place"""
+        namespace = key_namespace(key)
+        row = self.counters.get(namespace)
+        if row is None:
+            if len(self.counters) >= self.max_namespaces:
+                namespace = OTHER_NAMESPACE
+                row = self.counters.get(namespace)
+            if row is None:
+                row = self.counters[namespace] = [0] * len(COUNTERS)
+        return row
+
+    def count(self, key: str, counter: int, amount: int = 1) -> None:
+        self.row(key)[counter] += amount
+
+    def observe(self, tier: str, op: str, seconds: float) -> None:
+        histogram = self.latency.get((tier, op))
+        if histogram is None:
+            histogram = self.latency[(tier, op)] = LatencyHistogram()
+        histogram.observe(seconds)
+
+    def merge(self, other: "CacheMetrics") -> "CacheMetrics":
+        """Add ``other`` into this instance and return it"""
+        for namespace, row in other.counters.items():
+            if namespace not in self.counters and len(self.counters) >= self.max_namespaces:
+                namespace = OTHER_NAMESPACE
+            mine = self.counters.setdefault(namespace, [0] * len(COUNTERS))
+            for index, value in enumerate(row):
+                mine[index] += value
+        for labels, histogram in other.latency.items():
+            self.latency.setdefault(labels, LatencyHistogram()).merge(histogram)
+        return self
+
+    def totals(self) -> Dict[str, int]:
+        return {
+            name: sum(row[index] for row in self.counters.values())
+            for index, name in enumerate(COUNTERS)
+        }
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render_prometheus(
+    metrics: CacheMetrics,
+    gauges: Dict[str, Tuple[str, float]],
+    prefix: str = "arq_local_cache"
+) -> str:
+    """Prometheus text exposition (format 0.0.4) of counters, histograms and ``gauges``
+
+    ``gauges`` maps a metric name (without prefix) to ``(help, value)``.
+    """
+    lines: List[str] = []
+    for index, name in enumerate(COUNTERS):
+        metric = f"{prefix}_{name}_total"
+        lines.append(f"# HELP {metric} RAM tier {name} by key namespace")
+        lines.append(f"# TYPE {metric} counter")
+        for namespace, row in sorted(metrics.counters.items()):
+            lines.append(f'{metric}{{namespace="{_label(namespace)}"}} {row[index]}')
+
+    metric = f"{prefix}_latency_seconds"
+    lines.append(f"# HELP {metric} Cache operation latency by tier")
+    lines.append(f"# TYPE {metric} histogram")
+    bounds = LatencyHistogram.upper_bounds()
+    for (tier, op), histogram in sorted(metrics.latency.items()):
+        labels = f'tier="{_label(tier)}",op="{_label(op)}"'
+        cumulative = 0
+        for bound, count in zip(bounds, histogram.counts):
+            cumulative += count
+            lines.append(f'{metric}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+        cumulative += histogram.counts[-1]
+        lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {cumulative}')
+        lines.append(f"{metric}_sum{{{labels}}} {histogram.total:.9g}")
+        lines.append(f"{metric}_count{{{labels}}} {cumulative}")
+
+    for name, (help_text, value) in gauges.items():
+        metric = f"{prefix}_{name}"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {value:g}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,163 @@
+"""Eviction policies for the local cache's RAM shards
+
+A policy tracks key order for one shard; the shard keeps the entries.
+``admit`` is called for every new key and returns the keys to evict so the
+shard stays within its entry limit; ``evict`` picks one victim when the
+shard is over its memory limit instead.
+
+- ``LRUPolicy``: plain least-recently-used.
+- ``WTinyLFUPolicy``: a small LRU admission window in front of a segmented
+  LRU main region. A key leaving the window only displaces a main-region
+  victim if a count-min sketch says it is used more often, so a scan of
+  one-shot keys (page snapshots, crawls) cannot flush the hot set.
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Optional, Type
+
+# bytes.translate table halving every 4-bit counter (aging)
+_HALVE = bytes(value >> 1 for value in range(256))
+_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+_MASK64 = (1 << 64) - 1
+
+
+class CountMinSketch:
+    """Approximate access frequency with 4 rows of saturating 4-bit counters.
+
+    Counters are halved after ``sample_size`` increments, so estimates
+    follow recent popularity rather than all-time totals.
+    """
+
+    def __init__(self, capacity: int, sample_size: Optional[int] = None):
+        width = 16
+        while width < capacity:
+            width <<= 1
+        self.width = width
+        self._mask = width - 1
+        self._table = bytearray(width * len(_SEEDS))
+        self.sample_size = sample_size or 10 * max(capacity, 1)
+        self._additions = 0
+
+    def _indexes(self, key: str) -> List[int]:
+        h = hash(key) & _MASK64
+        return [
+            row * self.width + (((h * seed) & _MASK64) >> 40 & self._mask)
+            for row, seed in enumerate(_SEEDS)
+        ]
+
+    def increment(self, key: str) -> None:
+        table = self._table
+        for index in self._indexes(key):
+            if table[index] < 15:
+                table[index] += 1
+        self._additions += 1
+        if self._additions >= self.sample_size:
+            self._table = bytearray(self._table.translate(_HALVE))
+            self._additions //= 2
+
+    def estimate(self, key: str) -> int:
+        table = self._table
+        return min(table[index] for index in self._indexes(key))
+
+
+class LRUPolicy:
+    """Evict the least recently used key"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._order: OrderedDict = OrderedDict()
+
+    def access(self, key: str) -> None:
+        self._order.move_to_end(key)
+
+    def admit(self, key: str) -> List[str]:
+        evicted = []
+        while len(self._order) >= self.max_entries and self._order:
+            evicted.append(self._order.popitem(last=False)[0])
+        self._order[key] = None
+        return evicted
+
+    def remove(self, key: str) -> None:
+        self._order.pop(key, None)
+
+    def evict(self) -> Optional[str]:
+        return self._order.popitem(last=False)[0] if self._order else None
+
+    def clear(self) -> None:
+        self._order.clear()
+
+
+class WTinyLFUPolicy:
+    """Window TinyLFU: LRU window (~1%) + frequency-gated segmented LRU main region"""
+
+    def __init__(self, max_entries: int, window_ratio: float = 0.01, protected_ratio: float = 0.8):
+        self.max_entries = max_entries
+        self.window_capacity = max(1, int(max_entries * window_ratio))
+        self.main_capacity = max(0, max_entries - self.window_capacity)
+        self.protected_capacity = int(self.main_capacity * protected_ratio)
+        self.sketch = CountMinSketch(max_entries)
+        self._window: OrderedDict = OrderedDict()
+        self._probation: OrderedDict = OrderedDict()
+        self._protected: OrderedDict = OrderedDict()
+
+    def access(self, key: str) -> None:
+        self.sketch.increment(key)
+        if key in self._window:
+            self._window.move_to_end(key)
+        elif key in self._protected:
+            self._protected.move_to_end(key)
+        elif key in self._probation:
+            # A second hit in the main region promotes to protected
+            del self._probation[key]
+            self._protected[key] = None
+            if len(self._protected) > self.protected_capacity:
+                demoted = self._protected.popitem(last=False)[0]
+                self._probation[demoted] = None
+
+    def admit(self, key: str) -> List[str]:
+        self.sketch.increment(key)
+        self._window[key] = None
+        if len(self._window) <= self.window_capacity:
+            return []
+        candidate = self._window.popitem(last=False)[0]
+        if len(self._probation) + len(self._protected) < self.main_capacity:
+            self._probation[candidate] = None
+            return []
+        main = self._probation if self._probation else self._protected
+        if not main:
+            return [candidate]
+        victim = next(iter(main))
+        # Admission: the window's LRU key only displaces the main region's
+        # victim when it has been seen more often recently
+        if self.sketch.estimate(candidate) > self.sketch.estimate(victim):
+            del main[victim]
+            self._probation[candidate] = None
+            return [victim]
+        return [candidate]
+
+    def remove(self, key: str) -> None:
+        for region in (self._window, self._probation, self._protected):
+            if key in region:
+                del region[key]
+                return
+
+    def evict(self) -> Optional[str]:
+        for region in (self._probation, self._window, self._protected):
+            if region:
+                return region.popitem(last=False)[0]
+        return None
+
+    def clear(self) -> None:
+        self._window.clear()
+        self._probation.clear()
+        self._protected.clear()
+
+
+EVICTION_POLICIES: Dict[str, Type] = {"lru": LRUPolicy, "tinylfu": WTinyLFUPolicy}
+
+
+def create_policy(name: str, max_entries: int):
+    """Instantiate the eviction policy registered under ``name``"""
+    if name not in EVICTION_POLICIES:
+        raise ValueError(f"Unknown cache eviction policy: {name}")
+    return EVICTION_POLICIES[name](max_entries)
@@ -17,29 +17,124 @@ Advantages:
 
 import sqlite3
 import json
+import os
 import threading
 import time
-from datetime import datetime, timedelta
-from typing import Any, Dict, Optional, List, Tuple
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, List, Tuple
 from pathlib import Path
 import hashlib
+import heapq
+import random
 from collections import OrderedDict
+from contextlib import contextmanager
 import logging
 
+from .cache_codecs import CacheCodec
+from .cache_metrics import COUNTERS, EVICTION, HIT, MISS, PROMOTION, CacheMetrics, LatencyHistogram, render_prometheus
+from .cache_policies import create_policy
+
 logger = logging.getLogger(__name__)
 
+# Statements are module constants so every call reuses the same SQL text and
+# hits each connection's prepared-statement cache
+SQL_SELECT = "SELECT value, expires_at FROM cache_entries WHERE key = ?"
+SQL_UPSERT = """
+    INSERT OR REPLACE INTO cache_entries
+    (key, value, created_at, accessed_at, ttl, access_count, size, hash, expires_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_DELETE = "DELETE FROM cache_entries WHERE key = ?"
+SQL_DELETE_EXPIRED = "DELETE FROM cache_entries WHERE expires_at <= ?"
+SQL_COUNT = "SELECT entries FROM cache_counts WHERE id = 0"
+# Keys per ``WHERE key IN (...)`` statement, below SQLite's bound-parameter limit
+SQL_IN_CHUNK = 500
+
+# Cross-process mode: every change to cache_entries, from any process, is
+# logged by triggers with the writer's origin; other processes poll
+# PRAGMA data_version and drop the logged keys from their RAM tier
+SHARED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_invalidations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    origin INTEGER,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cache_invalidations_at ON cache_invalidations (at);
+CREATE TRIGGER IF NOT EXISTS trg_cache_insert AFTER INSERT ON cache_entries
+BEGIN
+    INSERT INTO cache_invalidations (key, origin, at)
+    VALUES (NEW.key, cache_origin(), (julianday('now') - 2440587.5) * 86400.0);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_cache_update AFTER UPDATE OF value, expires_at ON cache_entries
+BEGIN
+    INSERT INTO cache_invalidations (key, origin, at)
+    VALUES (NEW.key, cache_origin(), (julianday('now') - 2440587.5) * 86400.0);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_cache_delete AFTER DELETE ON cache_entries
+BEGIN
+    INSERT INTO cache_invalidations (key, origin, at)
+    VALUES (OLD.key, cache_origin(), (julianday('now') - 2440587.5) * 86400.0);
+END;
+"""
+
+# Row count kept by triggers, so stats never scan the table. The BEFORE
+# INSERT trigger sees the old row, so INSERT OR REPLACE of an existing key
+# (which does not fire DELETE triggers) leaves the count unchanged. Seeded
+# once from COUNT(*) for databases created before the table existed.
+COUNT_SCHEMA = """
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS cache_counts (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_counts (id, entries) SELECT 0, COUNT(*) FROM cache_entries;
+CREATE TRIGGER IF NOT EXISTS trg_count_insert BEFORE INSERT ON cache_entries
+WHEN NOT EXISTS (SELECT 1 FROM cache_entries WHERE key = NEW.key)
+BEGIN
+    UPDATE cache_counts SET entries = entries + 1 WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_count_delete AFTER DELETE ON cache_entries
+BEGIN
+    UPDATE cache_counts SET entries = entries - 1 WHERE id = 0;
+END;
+COMMIT;
+"""
+
+# One in this many RAM lookups is timed for the latency histogram (power of two)
+RAM_LATENCY_SAMPLE_MASK = 15
+
+# Columns added after the first release, created on open for existing databases
+ADDED_COLUMNS = {
+    "expires_at": "REAL",  # absolute epoch seconds; NULL never expires
+}
+
 
 class CacheEntry:
     """Represents a single cache entry with metadata"""
     
-    def __init__(self, key: str, value: Any, ttl: Optional[int] = None):
+    def __init__(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        size: Optional[int] = None,
+        expires_at: Optional[float] = None
+    ):
         self.key = key
         self.value = value
         self.created_at = datetime.now()
         self.accessed_at = datetime.now()
         self.ttl = ttl  # Time to live in seconds
+        # Absolute deadline; entries promoted from disk keep their original one
+        if expires_at is None and ttl is not None:
+            expires_at = time.time() + ttl
+        self.expires_at = expires_at
         self.access_count = 0
-        self.size = self._estimate_size(value)
+        # Encoded length when the caller already serialized the value
+        self.size = size if size is not None else self._estimate_size(value)
+        # Namespace counter row, attached by the shard holding the entry
+        self.counters: Optional[List[int]] = None
     
     def _estimate_size(self, obj: Any) -> int:
         """Estimate object size in bytes"""
@@ -50,10 +145,7 @@ class CacheEntry:
     
     def is_expired(self) -> bool:
         """Check if entry has expired"""
-        if self.ttl is None:
-            return False
-        elapsed = (datetime.now() - self.created_at).total_seconds()
-        return elapsed > self.ttl
+        return self.expires_at is not None and time.time() >= self.expires_at
     
     def touch(self) -> None:
         """Update access metadata"""
@@ -61,6 +153,138 @@ class CacheEntry:
         self.access_count += 1
 
 
+class MemoryShard:
+    """One lock-striped segment of the RAM tier.
+    
+    Keys map to a shard by hash, so threads working on different keys
+    rarely contend. The eviction policy ("lru" or "tinylfu") decides which
+    keys leave. Methods assume the caller holds ``lock``; ``write_lock``
+    is only taken by writers, to order RAM and disk updates of one stripe.
+    """
+    
+    def __init__(self, max_memory: float, max_entries: int, policy: str = "lru"):
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.entries: Dict[str, CacheEntry] = {}
+        self.current_memory = 0
+        self.max_memory = max_memory
+        self.max_entries = max_entries
+        self.policy = create_policy(policy, max_entries)
+        # Updated under ``lock`` like everything else here
+        self.metrics = CacheMetrics()
+        self._read_latency = self.metrics.latency[("ram", "read")] = LatencyHistogram()
+        self._lookups = 0
+        # Min-heap of (expires_at, seq, entry) so expired RAM entries are
+        # reclaimed in deadline order, not only when read
+        self._expiry_heap: List[Tuple[float, int, CacheEntry]] = []
+        self._expiry_seq = 0
+    
+    def lookup(self, key: str) -> Optional[CacheEntry]:
+        """Live entry for ``key`` marked as recently used, or None"""
+        # Timing costs more than the lookup itself, so only a sample is timed
+        self._lookups += 1
+        timed = not self._lookups & RAM_LATENCY_SAMPLE_MASK
+        if timed:
+            start = time.perf_counter()
+        entry = self.entries.get(key)
+        if entry is not None and entry.is_expired():
+            self.drop(key)
+            entry = None
+        if entry is None:
+            self.metrics.count(key, MISS)
+        else:
+            entry.touch()
+            self.policy.access(key)
+            entry.counters[HIT] += 1
+        if timed:
+            self._read_latency.observe(time.perf_counter() - start)
+        return entry
+    
+    def put(self, entry: CacheEntry) -> None:
+        """Add entry, evicting what the policy chooses"""
+        key = entry.key
+        
+        old = self.entries.pop(key, None)
+        if old is not None:
+            # Overwrite: the key keeps its policy position (a protected key stays protected)
+            self.current_memory -= old.size
+            self.policy.access(key)
+        else:
+            # Admission is decided first, so a rejected key costs no other entry
+            for evicted_key in self.policy.admit(key):
+                if evicted_key == key:
+                    return  # not admitted: the key is used less than what it would displace
+                self._evict(evicted_key)
+        
+        # Then make room in bytes
+        while self.current_memory + entry.size > self.max_memory and self.entries:
+            victim = self.policy.evict()
+            if victim == key:
+                return  # the entry alone does not fit next to what the policy keeps
+            self._evict(victim)
+        
+        # Add new entry
+        entry.counters = self.metrics.row(key)
+        self.entries[key] = entry
+        self.current_memory += entry.size
+        if entry.expires_at is not None:
+            self._expiry_seq += 1
+            heapq.heappush(self._expiry_heap, (entry.expires_at, self._expiry_seq, entry))
+            # Overwritten and evicted entries leave stale heap items; compact
+            # once they outnumber the live entries
+            if len(self._expiry_heap) > 2 * len(self.entries) + 64:
+                self._expiry_heap = [
+                    item for item in self._expiry_heap if self.entries.get(item[2].key) is item[2]
+                ]
+                heapq.heapify(self._expiry_heap)
+    
+    def promote(self, entry: CacheEntry) -> None:
+        """Put an entry read from disk, counting it if the policy admits it"""
+        self.put(entry)
+        if self.entries.get(entry.key) is entry:
+            entry.counters[PROMOTION] += 1
+    
+    def drop(self, key: str) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.current_memory -= entry.size
+            self.policy.remove(key)
+    
+    def _evict(self, key: str) -> None:
+        entry = self.entries.pop(key)
+        self.current_memory -= entry.size
+        entry.counters[EVICTION] += 1
+        logger.debug(f"Evicted {key} from RAM cache")
+    
+    def expire(self, now: float) -> int:
+        """Pop expired entries off the deadline heap; cost is proportional to what expired"""
+        heap = self._expiry_heap
+        expired = 0
+        while heap and heap[0][0] <= now:
+            entry = heapq.heappop(heap)[2]
+            if self.entries.get(entry.key) is entry:
+                self.drop(entry.key)
+                expired += 1
+        return expired
+    
+    def clear(self) -> None:
+        self.entries.clear()
+        self.policy.clear()
+        self.current_memory = 0
+        self._expiry_heap = []
+
+
+class _PendingLoad:
+    """A disk read in progress that other threads missing the same key wait on"""
+    
+    __slots__ = ("event", "value", "stale")
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.stale = False
+
+
 class HybridLocalCache:
     """Hybrid local cache combining RAM and persistent storage"""
     
@@ -69,7 +293,21 @@ class HybridLocalCache:
         cache_dir: str = ".arq_cache",
         max_memory_mb: int = 256,
         max_entries: int = 10000,
-        cleanup_interval: int = 300
+        cleanup_interval: int = 300,
+        mmap_size_mb: int = 64,
+        cached_statements: int = 64,
+        busy_timeout_ms: int = 5000,
+        write_behind: bool = False,
+        flush_interval_ms: int = 50,
+        max_pending_writes: int = 10000,
+        serializer: str = "pickle",
+        compression: Optional[str] = None,
+        compress_threshold: int = 4096,
+        num_shards: int = 16,
+        eviction_policy: str = "lru",
+        shared: bool = False,
+        sync_interval_ms: int = 100,
+        invalidation_retention: int = 300
     ):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
@@ -78,84 +316,297 @@ class HybridLocalCache:
         self.max_entries = max_entries
         self.cleanup_interval = cleanup_interval
         
-        # RAM cache with LRU eviction
-        self.memory_cache: OrderedDict = OrderedDict()
-        self.current_memory = 0
+        # Values are encoded once per set; the BLOB length is the entry size
+        self.codec = CacheCodec(serializer, compression, compress_threshold)
+        
+        # RAM cache: LRU shards, each with its own lock and share of the limits
+        self.shards = [
+            MemoryShard(self.max_memory / num_shards, max(1, -(-max_entries // num_shards)), eviction_policy)
+            for _ in range(num_shards)
+        ]
+        # Disk reads in progress, so concurrent misses on one key share a read
+        self._inflight: Dict[str, _PendingLoad] = {}
+        self._inflight_lock = threading.Lock()
+        # Disk-tier latencies; RAM counters live on the shards
+        self._disk_metrics = CacheMetrics()
+        self._metrics_lock = threading.Lock()
         
-        # SQLite for persistent storage
+        # SQLite for persistent storage: one long-lived connection per thread
         self.db_path = self.cache_dir / "cache.db"
+        self.mmap_size = mmap_size_mb * 1024 * 1024
+        self.cached_statements = cached_statements
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        # Owning thread -> connection, so connections of finished threads can be closed
+        self._connections: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._connections_lock = threading.Lock()
+        # Identifies this instance's writes in the invalidation log
+        self._origin = random.getrandbits(62)
+        self.shared = shared
         self._init_db()
         
         # Threading
         self.lock = threading.RLock()
+        self._closed = threading.Event()
         self.cleanup_thread = None
         self._start_cleanup_thread()
+        
+        # Write-behind: persisted sets are queued (last write per key wins) and
+        # flushed by a background writer in one transaction per interval
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending_writes = max_pending_writes
+        self._dirty: OrderedDict = OrderedDict()
+        self._dirty_cond = threading.Condition(threading.Lock())
+        self._flush_lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self.writer_thread = None
+        if write_behind:
+            self._start_writer_thread()
+        
+        # Cross-process mode: keep this process's RAM tier consistent with
+        # writes made by other workers on the same cache.db
+        self.sync_interval = sync_interval_ms / 1000
+        self.invalidation_retention = invalidation_retention
+        self._sync_lock = threading.Lock()
+        self._last_invalidation = 0
+        self.sync_thread = None
+        if shared:
+            self._last_invalidation = self._connect().execute(
+                "SELECT COALESCE(MAX(id), 0) FROM cache_invalidations"
+            ).fetchone()[0]
+            self._start_sync_thread()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening and tuning it on first use"""
+        conn = getattr(self._local, "conn", None)
+        # A connection inherited across fork must not be used by the child
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=self.busy_timeout_ms / 1000,
+                isolation_level=None,
+                check_same_thread=False,
+                cached_statements=self.cached_statements,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            # Called by the invalidation triggers; every connection needs it
+            # once any process has enabled shared mode on this file
+            conn.create_function("cache_origin", 0, lambda: self._origin)
+            if getattr(self._local, "pid", None) not in (None, os.getpid()):
+                # Forked child: its writes must invalidate the parent's RAM too
+                self._origin = random.getrandbits(62)
+                if self.shared and not (self.sync_thread and self.sync_thread.is_alive()):
+                    self._start_sync_thread()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            self._local.data_version = None
+            with self._connections_lock:
+                self._connections[threading.current_thread()] = conn
+            self._close_dead_connections()
+        return conn
+    
+    def _close_dead_connections(self) -> None:
+        """Close connections whose owning thread has exited
+
+        Short-lived threads would otherwise each leave an open connection
+        (and its file descriptors) behind until close().
+        """
+        with self._connections_lock:
+            dead = [thread for thread in self._connections if not thread.is_alive()]
+            connections = [self._connections.pop(thread) for thread in dead]
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.error(f"Error closing cache connection: {e}")
+    
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush pending writes, stop background threads and close every connection
+
+        The cleanup and sync threads are joined (up to ``timeout`` seconds
+        each) first, so neither is mid-query when its connection closes.
+        """
+        self._closed.set()
+        for thread in (self.cleanup_thread, self.sync_thread):
+            if thread is not None and thread is not threading.current_thread():
+                thread.join(timeout)
+                if thread.is_alive():
+                    logger.warning(f"Cache thread {thread.name} still running after {timeout}s")
+        if self.writer_thread is not None:
+            self._flush_requested.set()
+            self.writer_thread.join()
+            self.writer_thread = None
+        self.flush()
+        with self._connections_lock:
+            connections, self._connections = self._connections, {}
+        for conn in connections.values():
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.error(f"Error closing cache connection: {e}")
+        self._local = threading.local()
     
     def _init_db(self) -> None:
         """Initialize SQLite database schema"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS cache_entries (
-                    key TEXT PRIMARY KEY,
-                    value TEXT NOT NULL,
-                    created_at TEXT,
-                    accessed_at TEXT,
-                    ttl INTEGER,
-                    access_count INTEGER DEFAULT 0,
-                    size INTEGER,
-                    hash TEXT UNIQUE
-                )
-            """)
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_accessed_at 
-                ON cache_entries(accessed_at)
-            """)
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_created_at 
-                ON cache_entries(created_at)
-            """)
-            conn.commit()
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                created_at TEXT,
+                accessed_at TEXT,
+                ttl INTEGER,
+                access_count INTEGER DEFAULT 0,
+                size INTEGER,
+                hash TEXT UNIQUE
+            )
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_accessed_at 
+            ON cache_entries(accessed_at)
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_created_at 
+            ON cache_entries(created_at)
+        """)
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(cache_entries)")}
+        for name, definition in ADDED_COLUMNS.items():
+            if name not in existing:
+                conn.execute(f"ALTER TABLE cache_entries ADD COLUMN {name} {definition}")
+        if "expires_at" not in existing:
+            # Backfill deadlines for rows written with only ttl + created_at
+            rows = conn.execute(
+                "SELECT key, ttl, created_at FROM cache_entries WHERE ttl IS NOT NULL"
+            ).fetchall()
+            conn.executemany(
+                "UPDATE cache_entries SET expires_at = ? WHERE key = ?",
+                [(datetime.fromisoformat(created_at).timestamp() + ttl, key) for key, ttl, created_at in rows]
+            )
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_expires_at
+            ON cache_entries(expires_at) WHERE expires_at IS NOT NULL
+        """)
+        conn.executescript(COUNT_SCHEMA)
+        if self.shared:
+            conn.executescript(SHARED_SCHEMA)
+    
+    def _shard(self, key: str) -> "MemoryShard":
+        return self.shards[hash(key) % len(self.shards)]
     
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache (RAM first, then DB)"""
-        with self.lock:
+        shard = self._shard(key)
+        with shard.lock:
             # Check RAM cache first (hot path)
-            if key in self.memory_cache:
-                entry = self.memory_cache[key]
-                if not entry.is_expired():
-                    entry.touch()
-                    # Move to end (LRU)
-                    self.memory_cache.move_to_end(key)
-                    return entry.value
-                else:
-                    del self.memory_cache[key]
-                    self.current_memory -= entry.size
-            
-            # Check persistent storage
+            entry = shard.lookup(key)
+        if entry is not None:
+            return entry.value
+        return self._load(key, shard)
+    
+    def _load(self, key: str, shard: "MemoryShard") -> Optional[Any]:
+        """Read a RAM miss from disk and promote it; concurrent misses share one read"""
+        with self._inflight_lock:
+            load = self._inflight.get(key)
+            leader = load is None
+            if leader:
+                load = self._inflight[key] = _PendingLoad()
+        if not leader:
+            load.event.wait()
+            return load.value
+        
+        try:
+            # No shard lock is held here, so RAM hits on this shard carry on
+            entry = self._read_from_db(key)
+            if entry is not None:
+                with shard.lock:
+                    # A set or delete that raced with the read wins
+                    if not load.stale and key not in shard.entries:
+                        shard.promote(entry)
+                load.value = entry.value
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+            load.event.set()
+        return load.value
+    
+    def _read_from_db(self, key: str) -> Optional[CacheEntry]:
+        """Entry for ``key`` from the write-behind queue or SQLite, None if absent or expired"""
+        # Check persistent storage (queued writes first: they are newer)
+        try:
+            row = self._pending_row(key)
+            if row is None:
+                start = time.perf_counter()
+                row = self._connect().execute(SQL_SELECT, (key,)).fetchone()
+                self._observe_disk("read", start)
+            if row:
+                data, expires_at = row
+                # Check TTL
+                if expires_at is not None and expires_at <= time.time():
+                    self._remove_from_db(key)
+                    return None
+                
+                value = self.codec.decode(data)
+                return CacheEntry(key, value, size=len(data), expires_at=expires_at)
+        except Exception as e:
+            logger.error(f"Error retrieving from DB: {e}")
+        
+        return None
+    
+    def _read_many_from_db(self, keys: List[str]) -> Dict[str, CacheEntry]:
+        """Entries for ``keys`` from the write-behind queue, then chunked ``IN`` queries"""
+        rows: Dict[str, Tuple] = {}
+        try:
+            for key in keys:
+                row = self._pending_row(key)
+                if row is not None:
+                    rows[key] = row
+            remaining = [key for key in keys if key not in rows]
+            start = time.perf_counter()
+            conn = self._connect()
+            for offset in range(0, len(remaining), SQL_IN_CHUNK):
+                chunk = remaining[offset:offset + SQL_IN_CHUNK]
+                cursor = conn.execute(
+                    "SELECT key, value, expires_at FROM cache_entries "
+                    f"WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                for key, data, expires_at in cursor:
+                    rows[key] = (data, expires_at)
+            if remaining:
+                self._observe_disk("read", start)
+        except Exception as e:
+            logger.error(f"Error retrieving {len(keys)} entries from DB: {e}")
+        
+        now = time.time()
+        entries: Dict[str, CacheEntry] = {}
+        expired = []
+        for key, (data, expires_at) in rows.items():
+            if expires_at is not None and expires_at <= now:
+                expired.append(key)
+                continue
             try:
-                with sqlite3.connect(self.db_path) as conn:
-                    cursor = conn.execute(
-                        "SELECT value, ttl, created_at FROM cache_entries WHERE key = ?",
-                        (key,)
-                    )
-                    row = cursor.fetchone()
-                    if row:
-                        value_json, ttl, created_at = row
-                        # Check TTL
-                        if ttl:
-                            created = datetime.fromisoformat(created_at)
-                            if (datetime.now() - created).total_seconds() > ttl:
-                                self._remove_from_db(key)
-                                return None
-                        
-                        value = json.loads(value_json)
-                        # Promote to RAM cache
-                        self._add_to_memory(key, value, ttl)
-                        return value
+                entries[key] = CacheEntry(key, self.codec.decode(data), size=len(data), expires_at=expires_at)
             except Exception as e:
-                logger.error(f"Error retrieving from DB: {e}")
-            
-            return None
+                logger.error(f"Error decoding cache entry {key}: {e}")
+        if expired:
+            self._remove_many_from_db(expired)
+        return entries
+    
+    def _observe_disk(self, op: str, start: float) -> None:
+        elapsed = time.perf_counter() - start
+        with self._metrics_lock:
+            self._disk_metrics.observe("disk", op, elapsed)
+    
+    def _invalidate_load(self, key: str) -> None:
+        """Stop an in-flight disk read of ``key`` from promoting what it read"""
+        with self._inflight_lock:
+            load = self._inflight.get(key)
+            if load is not None:
+                load.stale = True
     
     def set(
         self,
@@ -165,176 +616,513 @@ class HybridLocalCache:
         persist: bool = True
     ) -> None:
         """Set value in cache (RAM and optionally DB)"""
-        with self.lock:
-            entry = CacheEntry(key, value, ttl)
-            
-            # Add to RAM cache
-            self._add_to_memory(key, value, ttl)
+        data = self.codec.encode(value)
+        entry = CacheEntry(key, value, ttl, size=len(data))
+        shard = self._shard(key)
+        # write_lock orders writers of this stripe across the disk write;
+        # readers only ever take shard.lock
+        with shard.write_lock:
+            with shard.lock:
+                shard.expire(time.time())
+                # Add to RAM cache
+                shard.put(entry)
             
             # Add to persistent storage
             if persist:
-                self._add_to_db(key, value, entry, ttl)
+                self._add_to_db(key, data, entry, ttl)
+        self._invalidate_load(key)
     
-    def _add_to_memory(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
-        """Add entry to RAM cache with LRU eviction"""
-        entry = CacheEntry(key, value, ttl)
-        
-        # Remove old entry if exists
-        if key in self.memory_cache:
-            old_entry = self.memory_cache.pop(key)
-            self.current_memory -= old_entry.size
-        
-        # Check if need to evict
-        while (
-            (self.current_memory + entry.size > self.max_memory or 
-             len(self.memory_cache) >= self.max_entries) and
-            self.memory_cache
-        ):
-            # Evict least recently used
-            evicted_key, evicted_entry = self.memory_cache.popitem(last=False)
-            self.current_memory -= evicted_entry.size
-            logger.debug(f"Evicted {evicted_key} from RAM cache")
-        
-        # Add new entry
-        self.memory_cache[key] = entry
-        self.current_memory += entry.size
+    def _add_to_memory(self, entry: CacheEntry) -> None:
+        """Add entry to its RAM shard"""
+        shard = self._shard(entry.key)
+        with shard.lock:
+            shard.put(entry)
+    
+    def _expire_memory(self, now: Optional[float] = None) -> int:
+        """Drop expired RAM entries from every shard"""
+        now = time.time() if now is None else now
+        expired = 0
+        for shard in self.shards:
+            with shard.lock:
+                expired += shard.expire(now)
+        return expired
+    
+    def clear_memory(self) -> None:
+        """Drop the RAM tier; the persistent tier is untouched"""
+        for shard in self.shards:
+            with shard.lock:
+                shard.clear()
+    
+    @property
+    def memory_cache(self) -> Dict[str, CacheEntry]:
+        """Snapshot of every RAM entry across shards"""
+        snapshot: Dict[str, CacheEntry] = {}
+        for shard in self.shards:
+            with shard.lock:
+                snapshot.update(shard.entries)
+        return snapshot
+    
+    @property
+    def current_memory(self) -> int:
+        return sum(shard.current_memory for shard in self.shards)
     
     def _add_to_db(
         self,
         key: str,
-        value: Any,
+        data: bytes,
         entry: CacheEntry,
         ttl: Optional[int] = None
     ) -> None:
-        """Add entry to persistent SQLite storage"""
+        """Add an encoded entry to persistent SQLite storage (or the write-behind queue)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                value_json = json.dumps(value)
-                key_hash = hashlib.sha256(key.encode()).hexdigest()
-                
-                conn.execute("""
-                    INSERT OR REPLACE INTO cache_entries 
-                    (key, value, created_at, accessed_at, ttl, access_count, size, hash)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    key,
-                    value_json,
-                    entry.created_at.isoformat(),
-                    entry.accessed_at.isoformat(),
-                    ttl,
-                    entry.access_count,
-                    entry.size,
-                    key_hash
-                ))
-                conn.commit()
+            row = self._db_row(key, data, entry, ttl)
+            if self.write_behind:
+                self._enqueue_write(key, row)
+            else:
+                start = time.perf_counter()
+                self._connect().execute(SQL_UPSERT, row)
+                self._observe_disk("write", start)
         except Exception as e:
             logger.error(f"Error storing to DB: {e}")
     
+    def _add_many_to_db(self, rows: List[Tuple]) -> None:
+        """Write rows in one transaction (or queue them for the write-behind flusher)"""
+        try:
+            if self.write_behind:
+                for row in rows:
+                    self._enqueue_write(row[0], row)
+                return
+            start = time.perf_counter()
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(SQL_UPSERT, rows)
+                conn.execute("COMMIT")
+                self._observe_disk("write", start)
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+        except Exception as e:
+            logger.error(f"Error storing {len(rows)} entries to DB: {e}")
+    
+    @staticmethod
+    def _db_row(key: str, data: bytes, entry: CacheEntry, ttl: Optional[int]) -> Tuple:
+        return (
+            key,
+            data,
+            entry.created_at.isoformat(),
+            entry.accessed_at.isoformat(),
+            ttl,
+            entry.access_count,
+            entry.size,
+            hashlib.sha256(key.encode()).hexdigest(),
+            entry.expires_at
+        )
+    
+    def _enqueue_write(self, key: str, row: Tuple) -> None:
+        """Queue a row for the writer, blocking while the queue is full"""
+        with self._dirty_cond:
+            while (
+                key not in self._dirty
+                and len(self._dirty) >= self.max_pending_writes
+                and not self._closed.is_set()
+            ):
+                # Backpressure: wake the writer now and wait for it to drain
+                self._flush_requested.set()
+                self._dirty_cond.wait()
+            self._dirty.pop(key, None)
+            self._dirty[key] = row
+    
+    def _pending_row(self, key: str) -> Optional[Tuple]:
+        """(value, expires_at) of a queued write not yet on disk"""
+        if not self.write_behind:
+            return None
+        with self._dirty_cond:
+            row = self._dirty.get(key)
+        return None if row is None else (row[1], row[8])
+    
+    def flush(self) -> int:
+        """Write every queued row in one transaction; returns rows written"""
+        with self._flush_lock:
+            with self._dirty_cond:
+                batch = list(self._dirty.items())
+            if not batch:
+                return 0
+            start = time.perf_counter()
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(SQL_UPSERT, [row for _, row in batch])
+                conn.execute("COMMIT")
+                self._observe_disk("write", start)
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                logger.error(f"Error flushing {len(batch)} cache writes: {e}")
+                return 0
+            # Rows stay queued (and readable) until committed; drop only the
+            # ones not overwritten by a newer set meanwhile
+            with self._dirty_cond:
+                for key, row in batch:
+                    if self._dirty.get(key) is row:
+                        del self._dirty[key]
+                self._dirty_cond.notify_all()
+            return len(batch)
+    
+    def _start_writer_thread(self) -> None:
+        """Start the background write-behind flusher"""
+        def writer_worker():
+            while not self._closed.is_set():
+                self._flush_requested.wait(self.flush_interval)
+                self._flush_requested.clear()
+                self.flush()
+        
+        self.writer_thread = threading.Thread(target=writer_worker, daemon=True)
+        self.writer_thread.start()
+    
     def _remove_from_db(self, key: str) -> None:
         """Remove expired entry from database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
-                conn.commit()
+            # Under the flush lock, so an in-flight batch cannot re-insert the key
+            with self._flush_lock:
+                with self._dirty_cond:
+                    self._dirty.pop(key, None)
+                    self._dirty_cond.notify_all()
+                self._connect().execute(SQL_DELETE, (key,))
         except Exception as e:
             logger.error(f"Error removing from DB: {e}")
     
+    def _remove_many_from_db(self, keys: List[str]) -> None:
+        """Delete keys with chunked ``WHERE key IN (...)`` statements in one transaction"""
+        try:
+            with self._flush_lock:
+                with self._dirty_cond:
+                    for key in keys:
+                        self._dirty.pop(key, None)
+                    self._dirty_cond.notify_all()
+                conn = self._connect()
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    for offset in range(0, len(keys), SQL_IN_CHUNK):
+                        chunk = keys[offset:offset + SQL_IN_CHUNK]
+                        conn.execute(
+                            f"DELETE FROM cache_entries WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                        )
+                    conn.execute("COMMIT")
+                except Exception:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    raise
+        except Exception as e:
+            logger.error(f"Error removing {len(keys)} entries from DB: {e}")
+    
     def delete(self, key: str) -> None:
         """Delete entry from both caches"""
-        with self.lock:
-            if key in self.memory_cache:
-                entry = self.memory_cache.pop(key)
-                self.current_memory -= entry.size
-            
+        shard = self._shard(key)
+        with shard.write_lock:
+            with shard.lock:
+                shard.drop(key)
             self._remove_from_db(key)
+        self._invalidate_load(key)
+    
+    def _by_shard(self, keys: Iterable[str]) -> Dict[int, List[str]]:
+        """Group keys by shard index"""
+        groups: Dict[int, List[str]] = {}
+        count = len(self.shards)
+        for key in keys:
+            groups.setdefault(hash(key) % count, []).append(key)
+        return groups
+    
+    @contextmanager
+    def _write_locked(self, shard_indexes: Iterable[int]):
+        """Hold several shards' write locks, always taken in index order"""
+        shards = [self.shards[index] for index in sorted(shard_indexes)]
+        for shard in shards:
+            shard.write_lock.acquire()
+        try:
+            yield
+        finally:
+            for shard in reversed(shards):
+                shard.write_lock.release()
+    
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get several values; missing and expired keys are absent from the result.
+        
+        RAM hits are collected with one lock acquisition per shard, then all
+        misses are read from SQLite together and promoted.
+        """
+        result: Dict[str, Any] = {}
+        misses: List[str] = []
+        for index, shard_keys in self._by_shard(dict.fromkeys(keys)).items():
+            shard = self.shards[index]
+            with shard.lock:
+                for key in shard_keys:
+                    entry = shard.lookup(key)
+                    if entry is not None:
+                        result[key] = entry.value
+                    else:
+                        misses.append(key)
+        if misses:
+            result.update(self._load_many(misses))
+        return result
+    
+    def _load_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Batch version of ``_load``: one disk round trip for the keys no one else is reading"""
+        owned: Dict[str, _PendingLoad] = {}
+        waiting: Dict[str, _PendingLoad] = {}
+        with self._inflight_lock:
+            for key in keys:
+                load = self._inflight.get(key)
+                if load is None:
+                    owned[key] = self._inflight[key] = _PendingLoad()
+                else:
+                    waiting[key] = load
+        
+        entries: Dict[str, CacheEntry] = {}
+        try:
+            entries = self._read_many_from_db(list(owned))
+            for index, shard_keys in self._by_shard(entries).items():
+                shard = self.shards[index]
+                with shard.lock:
+                    for key in shard_keys:
+                        if not owned[key].stale and key not in shard.entries:
+                            shard.promote(entries[key])
+            for key, entry in entries.items():
+                owned[key].value = entry.value
+        finally:
+            with self._inflight_lock:
+                for key in owned:
+                    del self._inflight[key]
+            for load in owned.values():
+                load.event.set()
+        
+        result = {key: entry.value for key, entry in entries.items()}
+        for key, load in waiting.items():
+            load.event.wait()
+            if load.value is not None:
+                result[key] = load.value
+        return result
+    
+    def set_many(
+        self,
+        items: Dict[str, Any],
+        ttl: Optional[int] = None,
+        persist: bool = True
+    ) -> None:
+        """Set several values; persisted rows are written in one transaction"""
+        encoded = {key: self.codec.encode(value) for key, value in items.items()}
+        entries = {
+            key: CacheEntry(key, items[key], ttl, size=len(data)) for key, data in encoded.items()
+        }
+        groups = self._by_shard(entries)
+        with self._write_locked(groups):
+            now = time.time()
+            for index, shard_keys in groups.items():
+                shard = self.shards[index]
+                with shard.lock:
+                    shard.expire(now)
+                    for key in shard_keys:
+                        shard.put(entries[key])
+            if persist and entries:
+                self._add_many_to_db([
+                    self._db_row(key, encoded[key], entry, ttl) for key, entry in entries.items()
+                ])
+        for key in entries:
+            self._invalidate_load(key)
+    
+    def delete_many(self, keys: Iterable[str]) -> None:
+        """Delete several keys from both tiers"""
+        keys = list(dict.fromkeys(keys))
+        groups = self._by_shard(keys)
+        with self._write_locked(groups):
+            for index, shard_keys in groups.items():
+                shard = self.shards[index]
+                with shard.lock:
+                    for key in shard_keys:
+                        shard.drop(key)
+            if keys:
+                self._remove_many_from_db(keys)
+        for key in keys:
+            self._invalidate_load(key)
     
     def clear(self) -> None:
         """Clear all cache entries"""
         with self.lock:
-            self.memory_cache.clear()
-            self.current_memory = 0
+            self.clear_memory()
+            with self._inflight_lock:
+                for load in self._inflight.values():
+                    load.stale = True
             
             try:
-                with sqlite3.connect(self.db_path) as conn:
-                    conn.execute("DELETE FROM cache_entries")
-                    conn.commit()
+                with self._flush_lock:
+                    with self._dirty_cond:
+                        self._dirty.clear()
+                        self._dirty_cond.notify_all()
+                    self._connect().execute("DELETE FROM cache_entries")
             except Exception as e:
                 logger.error(f"Error clearing cache: {e}")
     
     def _cleanup_expired(self) -> None:
-        """Remove expired entries from database"""
+        """Remove expired entries from RAM and the database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                # Find and remove expired entries
-                cursor = conn.execute("""
-                    SELECT key, ttl, created_at FROM cache_entries 
-                    WHERE ttl IS NOT NULL
-                """)
-                
-                expired_keys = []
-                for key, ttl, created_at in cursor.fetchall():
-                    created = datetime.fromisoformat(created_at)
-                    if (datetime.now() - created).total_seconds() > ttl:
-                        expired_keys.append(key)
-                
-                # Delete expired entries
-                for key in expired_keys:
-                    with self.lock:
-                        self._remove_from_db(key)
-                
-                if expired_keys:
-                    logger.debug(f"Cleaned up {len(expired_keys)} expired entries")
+            now = time.time()
+            ram_expired = self._expire_memory(now)
+            # One ranged DELETE over idx_expires_at
+            db_expired = self._connect().execute(SQL_DELETE_EXPIRED, (now,)).rowcount
+            if self.shared:
+                self._connect().execute(
+                    "DELETE FROM cache_invalidations WHERE at < ?", (now - self.invalidation_retention,)
+                )
+            
+            if ram_expired or db_expired:
+                logger.debug(f"Cleaned up {ram_expired} RAM and {db_expired} DB expired entries")
         except Exception as e:
             logger.error(f"Error in cleanup: {e}")
     
+    def sync(self) -> int:
+        """Drop RAM entries other processes changed since the last sync.
+        
+        ``PRAGMA data_version`` only moves when another connection commits,
+        so an idle cache costs one pragma per interval. Returns the number
+        of invalidated keys.
+        """
+        conn = self._connect()
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._local.data_version:
+            return 0
+        self._local.data_version = version
+        with self._sync_lock:
+            first = conn.execute("SELECT MIN(id) FROM cache_invalidations").fetchone()[0]
+            rows = conn.execute(
+                "SELECT id, key, origin FROM cache_invalidations WHERE id > ? ORDER BY id",
+                (self._last_invalidation,)
+            ).fetchall()
+            if not rows:
+                return 0
+            # Log pruned past our position: we cannot tell what changed
+            lost = first is not None and first > self._last_invalidation + 1
+            self._last_invalidation = rows[-1][0]
+            keys = {key for _, key, origin in rows if origin != self._origin}
+            if lost or len(keys) > self.max_entries:
+                self.clear_memory()
+                with self._inflight_lock:
+                    for load in self._inflight.values():
+                        load.stale = True
+                return len(keys)
+            for index, shard_keys in self._by_shard(keys).items():
+                shard = self.shards[index]
+                with shard.lock:
+                    for key in shard_keys:
+                        shard.drop(key)
+            for key in keys:
+                self._invalidate_load(key)
+            return len(keys)
+    
+    def _start_sync_thread(self) -> None:
+        """Start the cross-process invalidation poller"""
+        def sync_worker():
+            while not self._closed.wait(self.sync_interval):
+                try:
+                    self.sync()
+                except Exception as e:
+                    logger.error(f"Cache sync error: {e}")
+        
+        self.sync_thread = threading.Thread(target=sync_worker, daemon=True)
+        self.sync_thread.start()
+    
     def _start_cleanup_thread(self) -> None:
         """Start background cleanup thread"""
         def cleanup_worker():
-            while True:
+            while not self._closed.wait(self.cleanup_interval):
                 try:
-                    time.sleep(self.cleanup_interval)
                     self._cleanup_expired()
+                    self._close_dead_connections()
                 except Exception as e:
                     logger.error(f"Cleanup thread error: {e}")
         
         self.cleanup_thread = threading.Thread(target=cleanup_worker, daemon=True)
         self.cleanup_thread.start()
     
+    def collect_metrics(self) -> CacheMetrics:
+        """Counters and latency histograms merged across shards and the disk tier"""
+        merged = CacheMetrics()
+        for shard in self.shards:
+            with shard.lock:
+                merged.merge(shard.metrics)
+        with self._metrics_lock:
+            merged.merge(self._disk_metrics)
+        return merged
+    
+    def _counter_totals(self) -> Dict[str, int]:
+        """Counter totals across namespaces, without merging histograms"""
+        totals = [0] * len(COUNTERS)
+        for shard in self.shards:
+            with shard.lock:
+                rows = list(shard.metrics.counters.values())
+            for row in rows:
+                totals = [total + value for total, value in zip(totals, row)]
+        return dict(zip(COUNTERS, totals))
+    
+    def export_prometheus(self, prefix: str = "arq_local_cache") -> str:
+        """Metrics and size gauges in Prometheus text format"""
+        stats = self.get_stats()
+        gauges = {
+            "memory_bytes": ("Bytes held by the RAM tier", self.current_memory),
+            "memory_limit_bytes": ("RAM tier byte limit", self.max_memory),
+            "ram_entries": ("Entries in the RAM tier", stats["ram_entries"]),
+            "db_entries": ("Rows in the SQLite tier", stats["db_entries"]),
+            "pending_writes": ("Write-behind rows not yet on disk", stats["pending_writes"]),
+        }
+        return render_prometheus(self.collect_metrics(), gauges, prefix)
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
-        with self.lock:
-            try:
-                with sqlite3.connect(self.db_path) as conn:
-                    cursor = conn.execute("SELECT COUNT(*) FROM cache_entries")
-                    db_entries = cursor.fetchone()[0]
-            except:
-                db_entries = 0
-            
-            return {
-                "memory_used_mb": self.current_memory / (1024 * 1024),
-                "memory_limit_mb": self.max_memory / (1024 * 1024),
-                "ram_entries": len(self.memory_cache),
-                "db_entries": db_entries,
-                "total_entries": len(self.memory_cache) + db_entries,
-                "memory_usage_percent": (self.current_memory / self.max_memory * 100) if self.max_memory > 0 else 0
-            }
+        try:
+            db_entries = self._connect().execute(SQL_COUNT).fetchone()[0]
+        except:
+            db_entries = 0
+        
+        current_memory = self.current_memory
+        ram_entries = sum(len(shard.entries) for shard in self.shards)
+        totals = self._counter_totals()
+        lookups = totals["hits"] + totals["misses"]
+        return {
+            **totals,
+            "hit_ratio": totals["hits"] / lookups if lookups else 0.0,
+            "memory_used_mb": current_memory / (1024 * 1024),
+            "memory_limit_mb": self.max_memory / (1024 * 1024),
+            "ram_entries": ram_entries,
+            "ram_shards": len(self.shards),
+            "db_entries": db_entries,
+            "pending_writes": len(self._dirty),
+            "total_entries": ram_entries + db_entries,
+            "memory_usage_percent": (current_memory / self.max_memory * 100) if self.max_memory > 0 else 0
+        }
     
     def __enter__(self):
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.clear()
+        self.close()
 
 
 # Global cache instance
 _global_cache = None
 
 
-def get_cache(cache_dir: str = ".arq_cache") -> HybridLocalCache:
-    """Get or create global cache instance"""
+def get_cache(cache_dir: str = ".arq_cache", shared: Optional[bool] = None) -> HybridLocalCache:
+    """Get or create global cache instance.
+    
+    Shared (cross-process) mode defaults on when WEB_CONCURRENCY says
+    several workers serve the app over the same cache directory.
+    """
     global _global_cache
     if _global_cache is None:
-        _global_cache = HybridLocalCache(cache_dir=cache_dir)
+        if shared is None:
+            shared = int(os.getenv("WEB_CONCURRENCY", "1") or 1) > 1
+        _global_cache = HybridLocalCache(cache_dir=cache_dir, shared=shared)
     return _global_cache
 
 
@@ -355,3 +1143,4 @@ if __name__ == "__main__":
     
     # Cleanup
     cache.clear()
+    cache.close()
@@ -16,9 +16,42 @@ class Settings(BaseSettings):
     # Database settings
     DATABASE_URL: str = os.getenv(
         "DATABASE_URL",
-        "sqlite:///./arq_memory.db"
+        "sqlite+aiosqlite:///./arq_memory.db"
     )
     DATABASE_ECHO: bool = DEBUG
+    # Server-side connection budget shared by all worker processes
+    DATABASE_MAX_CONNECTIONS: int = int(os.getenv("DATABASE_MAX_CONNECTIONS", "90"))
+    # Explicit per-worker pool size; derived from the budget when unset
+    DATABASE_POOL_SIZE: Optional[int] = (
+        int(os.getenv("DATABASE_POOL_SIZE")) if os.getenv("DATABASE_POOL_SIZE") else None
+    )
+    DATABASE_MAX_OVERFLOW: Optional[int] = (
+        int(os.getenv("DATABASE_MAX_OVERFLOW")) if os.getenv("DATABASE_MAX_OVERFLOW") else None
+    )
+    DATABASE_POOL_TIMEOUT: int = int(os.getenv("DATABASE_POOL_TIMEOUT", "30"))
+    DATABASE_POOL_RECYCLE: int = int(os.getenv("DATABASE_POOL_RECYCLE", "1800"))
+    DATABASE_STATEMENT_CACHE_SIZE: int = int(os.getenv("DATABASE_STATEMENT_CACHE_SIZE", "256"))
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    # Comma-separated read replica URLs; reads fall back to the primary when empty/unhealthy
+    DATABASE_REPLICA_URLS: str = os.getenv("DATABASE_REPLICA_URLS", "")
+    DATABASE_REPLICA_HEALTH_INTERVAL: float = float(os.getenv("DATABASE_REPLICA_HEALTH_INTERVAL", "10"))
+    DATABASE_REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("DATABASE_REPLICA_MAX_LAG_SECONDS", "30"))
+    # Reads for a key written this recently go to the primary
+    DATABASE_READ_YOUR_WRITES_SECONDS: float = float(os.getenv("DATABASE_READ_YOUR_WRITES_SECONDS", "5"))
+    # Monthly partition retention for append-only tables (0 keeps history forever)
+    MESSAGE_RETENTION_MONTHS: int = int(os.getenv("MESSAGE_RETENTION_MONTHS", "0"))
+    API_LOG_RETENTION_MONTHS: int = int(os.getenv("API_LOG_RETENTION_MONTHS", "3"))
+    SYSTEM_EVENT_RETENTION_MONTHS: int = int(os.getenv("SYSTEM_EVENT_RETENTION_MONTHS", "6"))
+    PARTITION_PREMAKE_MONTHS: int = int(os.getenv("PARTITION_PREMAKE_MONTHS", "2"))
+    PARTITION_MAINTENANCE_INTERVAL: float = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL", "3600"))
+    # Worker processes serving the app (gunicorn/uvicorn convention)
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "1"))
+    
+    # Outbound HTTP (shared keep-alive clients, see http_clients.py)
+    HTTP_CLIENT_TIMEOUT: float = float(os.getenv("HTTP_CLIENT_TIMEOUT", "60"))
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
     
     # Redis (optional)
     REDIS_URL: Optional[str] = os.getenv("REDIS_URL")
@@ -34,6 +67,42 @@ class Settings(BaseSettings):
     MEMORY_TTL_SECONDS: int = int(os.getenv("MEMORY_TTL_SECONDS", "86400"))
     MAX_CONTEXT_MESSAGES: int = int(os.getenv("MAX_CONTEXT_MESSAGES", "20"))
     
+    # API request log (batched background writer)
+    API_LOG_ENABLED: bool = os.getenv("API_LOG_ENABLED", "True").lower() == "true"
+    API_LOG_BUFFER_SIZE: int = int(os.getenv("API_LOG_BUFFER_SIZE", "10000"))
+    API_LOG_BATCH_SIZE: int = int(os.getenv("API_LOG_BATCH_SIZE", "500"))
+    API_LOG_FLUSH_INTERVAL_MS: int = int(os.getenv("API_LOG_FLUSH_INTERVAL_MS", "250"))
+    
+    # Logging pipeline (queue-backed, JSON lines)
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")  # json | text
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # Share of successful requests written to the access log (errors/slow always kept)
+    LOG_SUCCESS_SAMPLE_RATE: float = float(os.getenv("LOG_SUCCESS_SAMPLE_RATE", "1.0"))
+    # Per-route overrides, longest prefix wins: "/health=0,/status=0.1"
+    LOG_ROUTE_SAMPLE_RATES: str = os.getenv("LOG_ROUTE_SAMPLE_RATES", "/health=0")
+    LOG_SLOW_REQUEST_MS: float = float(os.getenv("LOG_SLOW_REQUEST_MS", "1000"))
+    
+    # ARQ development tasks (task store + durable job queue)
+    ARQ_DATA_DIR: str = os.getenv("ARQ_DATA_DIR", "/app/data")
+    ARQ_QUEUE_BACKEND: str = os.getenv("ARQ_QUEUE_BACKEND", "sqlite")  # sqlite | redis
+    ARQ_WORKER_PROCESSES: int = int(os.getenv("ARQ_WORKER_PROCESSES", "2"))
+    # Jobs run concurrently inside each worker process
+    ARQ_WORKER_CONCURRENCY: int = int(os.getenv("ARQ_WORKER_CONCURRENCY", "4"))
+    # Worker processes spawned by the web app itself (0: run arq_worker.py separately).
+    # Only one server process per ARQ_DATA_DIR starts them, however many gunicorn workers run
+    ARQ_EMBEDDED_WORKERS: int = int(os.getenv("ARQ_EMBEDDED_WORKERS", "0"))
+    ARQ_WORKER_POLL_INTERVAL: float = float(os.getenv("ARQ_WORKER_POLL_INTERVAL", "1.0"))
+    # A job whose lease is not renewed within this window is handed to another worker
+    ARQ_JOB_VISIBILITY_TIMEOUT: float = float(os.getenv("ARQ_JOB_VISIBILITY_TIMEOUT", "120"))
+    ARQ_JOB_MAX_ATTEMPTS: int = int(os.getenv("ARQ_JOB_MAX_ATTEMPTS", "3"))
+    # Retry delay doubles per attempt: backoff, 2 * backoff, ...
+    ARQ_JOB_RETRY_BACKOFF: float = float(os.getenv("ARQ_JOB_RETRY_BACKOFF", "5"))
+    # In-flight LLM calls per worker process, shared by all tasks it runs
+    ARQ_LLM_CONCURRENCY: int = int(os.getenv("ARQ_LLM_CONCURRENCY", "2"))
+    # Independent sub-steps a goal is split into (1 disables planning)
+    ARQ_MAX_SUBSTEPS: int = int(os.getenv("ARQ_MAX_SUBSTEPS", "4"))
+    
     # Telegram settings (optional)
     TELEGRAM_TOKEN: Optional[str] = os.getenv("TELEGRAM_TOKEN")
     TELEGRAM_BOT_ID: Optional[str] = os.getenv("TELEGRAM_BOT_ID")
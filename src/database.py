@@ -4,23 +4,39 @@ ARQ - AI Assistant with Memory & Context Management
 Database connection and session management module
 """
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator, Optional
+from typing import AsyncGenerator, List, Optional
 
+from fastapi import Request
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
-    create_async_engine,
     AsyncSession,
     async_sessionmaker
 )
-from sqlalchemy.pool import NullPool, QueuePool
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+from sqlalchemy.orm import Session as SyncSession
 
 from models import Base
+from schema_migrations import run_migrations
+from engine_factory import create_engine_from_config, pool_size_for_workers, pool_status
+from partitioning import DEFAULT_PARTITION_POLICIES, PartitionManager, PartitionPolicy, policies_from_settings
+from replicas import Replica, ReplicaRouter, WriteTracker
 
 logger = logging.getLogger(__name__)
 
 
+class TrackedSession(SyncSession):
+    """Session that records whether it flushed any writes (for read-your-writes routing)"""
+
+
+@event.listens_for(TrackedSession, "after_flush")
+def _mark_session_wrote(session, flush_context) -> None:
+    session.info["wrote"] = True
+
+
 class DatabaseConfig:
     """Database configuration holder"""
     def __init__(
@@ -31,7 +47,15 @@ class DatabaseConfig:
         max_overflow: int = 0,
         pool_timeout: int = 30,
         pool_recycle: int = 3600,
-        connect_args: Optional[dict] = None
+        connect_args: Optional[dict] = None,
+        statement_cache_size: int = 256,
+        sqlite_mmap_size: int = 256 * 1024 * 1024,
+        replica_urls: Optional[List[str]] = None,
+        replica_health_interval: float = 10.0,
+        replica_max_lag_seconds: float = 30.0,
+        read_your_writes_seconds: float = 5.0,
+        partition_policies: Optional[List[PartitionPolicy]] = None,
+        partition_maintenance_interval: float = 3600.0,
     ):
         self.url = url
         self.echo = echo
@@ -40,6 +64,40 @@ class DatabaseConfig:
         self.pool_timeout = pool_timeout
         self.pool_recycle = pool_recycle
         self.connect_args = connect_args or {}
+        self.statement_cache_size = statement_cache_size
+        self.sqlite_mmap_size = sqlite_mmap_size
+        self.replica_urls = replica_urls or []
+        self.replica_health_interval = replica_health_interval
+        self.replica_max_lag_seconds = replica_max_lag_seconds
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self.partition_policies = list(partition_policies or DEFAULT_PARTITION_POLICIES)
+        self.partition_maintenance_interval = partition_maintenance_interval
+
+    @classmethod
+    def from_settings(cls, settings) -> "DatabaseConfig":
+        """Build config from Settings, sizing the pool from the per-worker connection budget"""
+        sizing = pool_size_for_workers(settings.DATABASE_MAX_CONNECTIONS, settings.WEB_CONCURRENCY)
+        if settings.DATABASE_POOL_SIZE is not None:
+            sizing["pool_size"] = settings.DATABASE_POOL_SIZE
+        if settings.DATABASE_MAX_OVERFLOW is not None:
+            sizing["max_overflow"] = settings.DATABASE_MAX_OVERFLOW
+
+        return cls(
+            url=settings.DATABASE_URL,
+            echo=settings.DATABASE_ECHO,
+            pool_size=sizing["pool_size"],
+            max_overflow=sizing["max_overflow"],
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+            pool_recycle=settings.DATABASE_POOL_RECYCLE,
+            statement_cache_size=settings.DATABASE_STATEMENT_CACHE_SIZE,
+            sqlite_mmap_size=settings.SQLITE_MMAP_SIZE,
+            replica_urls=[url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()],
+            replica_health_interval=settings.DATABASE_REPLICA_HEALTH_INTERVAL,
+            replica_max_lag_seconds=settings.DATABASE_REPLICA_MAX_LAG_SECONDS,
+            read_your_writes_seconds=settings.DATABASE_READ_YOUR_WRITES_SECONDS,
+            partition_policies=policies_from_settings(settings),
+            partition_maintenance_interval=settings.PARTITION_MAINTENANCE_INTERVAL,
+        )
 
 
 class DatabaseManager:
@@ -49,37 +107,44 @@ class DatabaseManager:
         self.config = config
         self.engine = None
         self.session_factory = None
+        self.replica_router: Optional[ReplicaRouter] = None
+        self.write_tracker = WriteTracker(config.read_your_writes_seconds)
+        self.partitions = PartitionManager(config.partition_policies)
+        self._health_task: Optional[asyncio.Task] = None
+        self._maintenance_task: Optional[asyncio.Task] = None
 
     async def initialize(self) -> None:
         """Initialize database engine and connection pool"""
         try:
-            logger.info(f"Initializing database connection pool to {self.config.url}")
-
-            # Determine pool class based on configuration
-            pool_class = QueuePool if self.config.pool_size > 0 else NullPool
-
-            # Create async engine
-            self.engine = create_async_engine(
-                self.config.url,
-                echo=self.config.echo,
-                pool_class=pool_class,
-                pool_size=self.config.pool_size,
-                max_overflow=self.config.max_overflow,
-                pool_timeout=self.config.pool_timeout,
-                pool_recycle=self.config.pool_recycle,
-                connect_args=self.config.connect_args,
-                pool_pre_ping=True,  # Verify connections before use
-            )
+            safe_url = make_url(self.config.url).render_as_string(hide_password=True)
+            logger.info(f"Initializing database connection pool to {safe_url}")
+
+            # Async driver, pool class and dialect tuning are chosen by the factory
+            self.engine = create_engine_from_config(self.config)
 
             # Create session factory
             self.session_factory = async_sessionmaker(
                 self.engine,
                 class_=AsyncSession,
+                sync_session_class=TrackedSession,
                 expire_on_commit=False,
                 autoflush=False,
-                autocommit=False
             )
 
+            if self.config.replica_urls:
+                replicas = [
+                    Replica(
+                        make_url(url).render_as_string(hide_password=True),
+                        create_engine_from_config(self.config, url=url),
+                    )
+                    for url in self.config.replica_urls
+                ]
+                self.replica_router = ReplicaRouter(replicas, self.config.replica_max_lag_seconds)
+                self._health_task = asyncio.get_running_loop().create_task(
+                    self.replica_router.run_health_checks(self.config.replica_health_interval)
+                )
+                logger.info(f"Routing reads across {len(replicas)} replica(s)")
+
             logger.info("Database engine initialized successfully")
 
         except Exception as e:
@@ -97,6 +162,45 @@ class DatabaseManager:
             logger.error(f"Error creating database tables: {str(e)}", exc_info=True)
             raise
 
+    async def run_migrations(self) -> list:
+        """Apply pending schema migrations (indexes, etc.) to an existing database"""
+        try:
+            async with self.engine.begin() as conn:
+                applied = await conn.run_sync(run_migrations)
+            if applied:
+                logger.info(f"Applied schema migrations: {', '.join(applied)}")
+            return applied
+        except SQLAlchemyError as e:
+            logger.error(f"Error applying schema migrations: {str(e)}", exc_info=True)
+            raise
+
+    async def maintain_partitions(self) -> dict:
+        """Create upcoming partitions, rotate closed months, apply retention and refresh history views"""
+        try:
+            async with self.engine.begin() as conn:
+                result = await conn.run_sync(self.partitions.maintain)
+            if result["created"] or result["rotated"] or result["dropped"]:
+                logger.info(f"Partition maintenance: {result}")
+            return result
+        except SQLAlchemyError as e:
+            logger.error(f"Error maintaining partitions: {str(e)}", exc_info=True)
+            raise
+
+    def start_partition_maintenance(self) -> None:
+        """Run maintain_partitions every partition_maintenance_interval seconds in the background"""
+        if self._maintenance_task or self.config.partition_maintenance_interval <= 0:
+            return
+
+        async def _loop():
+            while True:
+                await asyncio.sleep(self.config.partition_maintenance_interval)
+                try:
+                    await self.maintain_partitions()
+                except SQLAlchemyError:
+                    pass  # logged; retry on the next tick
+
+        self._maintenance_task = asyncio.get_running_loop().create_task(_loop())
+
     async def drop_tables(self) -> None:
         """Drop all tables (for testing/cleanup purposes)"""
         try:
@@ -108,8 +212,14 @@ class DatabaseManager:
             logger.error(f"Error dropping database tables: {str(e)}", exc_info=True)
             raise
 
-    async def get_session(self) -> AsyncGenerator[AsyncSession, None]:
-        """Get database session with proper error handling and cleanup"""
+    async def get_session(
+        self, consistency_key: Optional[str] = None
+    ) -> AsyncGenerator[AsyncSession, None]:
+        """Get database session with proper error handling and cleanup
+
+        Committed writes mark ``consistency_key`` so that reads for the same key
+        stay on the primary for the read-your-writes window.
+        """
         if not self.session_factory:
             raise RuntimeError("Database not initialized. Call initialize() first.")
 
@@ -117,6 +227,8 @@ class DatabaseManager:
             try:
                 yield session
                 await session.commit()
+                if session.sync_session.info.pop("wrote", False):
+                    self.write_tracker.mark(consistency_key)
             except Exception as e:
                 await session.rollback()
                 logger.error(f"Database session error: {str(e)}", exc_info=True)
@@ -125,7 +237,7 @@ class DatabaseManager:
                 await session.close()
 
     @asynccontextmanager
-    async def transaction(self):
+    async def transaction(self, consistency_key: Optional[str] = None):
         """Context manager for database transactions"""
         async with self.session_factory() as session:
             async with session.begin():
@@ -135,20 +247,82 @@ class DatabaseManager:
                     await session.rollback()
                     logger.error("Transaction rolled back", exc_info=True)
                     raise
+            if session.sync_session.info.pop("wrote", False):
+                self.write_tracker.mark(consistency_key)
+
+    def read_session_factory(self, consistency_key: Optional[str] = None) -> AsyncSession:
+        """Create a session for read-only work, bound to a healthy replica when possible
+
+        Falls back to the primary when no replicas are configured or healthy,
+        or when ``consistency_key`` was written within the read-your-writes window.
+        """
+        if not self.session_factory:
+            raise RuntimeError("Database not initialized. Call initialize() first.")
+
+        replica = None
+        if self.replica_router and not self.write_tracker.is_recent(consistency_key):
+            replica = self.replica_router.choose()
+
+        if replica is None:
+            return self.session_factory()
+
+        session = self.session_factory(bind=replica.engine)
+        session.info["replica"] = replica
+        return session
+
+    @asynccontextmanager
+    async def read_session(self, consistency_key: Optional[str] = None):
+        """Context manager for a read-only session (never committed; closing rolls back)"""
+        async with self.read_session_factory(consistency_key) as session:
+            try:
+                yield session
+            except DBAPIError as e:
+                replica = session.info.get("replica")
+                if replica is not None and e.connection_invalidated:
+                    self.replica_router.mark_failed(replica, e)
+                raise
+
+    async def get_read_session(
+        self, consistency_key: Optional[str] = None
+    ) -> AsyncGenerator[AsyncSession, None]:
+        """Generator counterpart of read_session for dependency injection"""
+        async with self.read_session(consistency_key) as session:
+            yield session
 
     async def health_check(self) -> bool:
         """Check database connection health"""
         try:
             async with self.session_factory() as session:
-                await session.execute("SELECT 1")
+                await session.execute(text("SELECT 1"))
                 logger.debug("Database health check passed")
                 return True
         except Exception as e:
             logger.error(f"Database health check failed: {str(e)}")
             return False
 
+    def pool_status(self) -> dict:
+        """Connection pool occupancy and checkout wait metrics for monitoring"""
+        status = pool_status(self.engine)
+        if self.replica_router:
+            status["replicas"] = [
+                {**replica.status(), "pool": pool_status(replica.engine)}
+                for replica in self.replica_router.replicas
+            ]
+        return status
+
     async def close(self) -> None:
         """Close database engine and cleanup resources"""
+        for task in (self._health_task, self._maintenance_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._health_task = self._maintenance_task = None
+        if self.replica_router:
+            await self.replica_router.dispose()
+            self.replica_router = None
         if self.engine:
             try:
                 logger.info("Closing database connections...")
@@ -170,12 +344,78 @@ async def get_db_manager() -> DatabaseManager:
     return _db_manager
 
 
+def consistency_key_for(request: Request) -> str:
+    """Read-your-writes key for a request
+
+    Prefers the authenticated user (``request.state.user``), then the session the
+    request addresses (``X-Session-ID`` header, ``session_id`` path or query
+    parameter). The client address is shared by everyone behind a proxy, so it
+    is only the last resort.
+    """
+    user = getattr(request.state, "user", None)
+    user_id = getattr(user, "id", user)
+    if user_id is not None:
+        return f"user:{user_id}"
+    session_id = (
+        request.headers.get("x-session-id")
+        or request.path_params.get("session_id")
+        or request.query_params.get("session_id")
+    )
+    if session_id:
+        return f"session:{session_id}"
+    return f"client:{request.client.host if request.client else 'unknown'}"
+
+
+async def get_db_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """FastAPI dependency yielding a session from the global database manager"""
+    manager = await get_db_manager()
+    async for session in manager.get_session(consistency_key_for(request)):
+        yield session
+
+
+async def get_db_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """FastAPI dependency yielding a read-only (replica-routed) session
+
+    Clients that committed a write within the read-your-writes window read
+    from the primary.
+    """
+    manager = await get_db_manager()
+    async for session in manager.get_read_session(consistency_key_for(request)):
+        yield session
+
+
+@asynccontextmanager
+async def replica_read_session(fallback: AsyncSession, consistency_key: Optional[str] = None):
+    """Replica-routed session from the global manager, or ``fallback`` itself
+
+    ``fallback`` is used unless a healthy replica is available and it holds no
+    pending or flushed writes, so reads see the caller's own uncommitted work
+    and don't check out a second connection for nothing.
+    """
+    if (
+        _db_manager is None
+        or _db_manager.replica_router is None
+        or not any(replica.healthy for replica in _db_manager.replica_router.replicas)
+        or fallback.new
+        or fallback.dirty
+        or fallback.deleted
+        or fallback.sync_session.info.get("wrote")
+    ):
+        yield fallback
+        return
+    async with _db_manager.read_session(consistency_key) as session:
+        yield session
+
+
 async def init_db(config: DatabaseConfig) -> DatabaseManager:
     """Initialize global database manager"""
     global _db_manager
     _db_manager = DatabaseManager(config)
     await _db_manager.initialize()
     await _db_manager.create_tables()
+    await _db_manager.run_migrations()
+    await _db_manager.maintain_partitions()
+    _db_manager.start_partition_maintenance()
     return _db_manager
 
 
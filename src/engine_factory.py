@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+ARQ - AI Assistant with Memory & Context Management
+Async engine factory with driver selection, dialect tuning and pool metrics
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url, URL
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, StaticPool
+from sqlalchemy.util.queue import AsyncAdaptedQueue
+
+logger = logging.getLogger(__name__)
+
+# Sync driver names mapped to the async driver used with the same database
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> URL:
+    """Return ``url`` with its driver replaced by the async equivalent (asyncpg/aiosqlite)"""
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=drivername)
+
+
+def is_memory_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def pool_size_for_workers(max_connections: int, workers: int) -> Dict[str, int]:
+    """Split the server connection budget evenly across worker processes.
+
+    Two thirds of each worker's share are kept open; the rest is overflow
+    that is only opened under bursts, so pool_size + max_overflow across
+    all workers never exceeds ``max_connections``.
+    """
+    per_worker = max(1, max_connections // max(1, workers))
+    pool_size = max(1, per_worker * 2 // 3)
+    return {"pool_size": pool_size, "max_overflow": max(0, per_worker - pool_size)}
+
+
+class PoolMetrics:
+    """Checkout wait-time counters for one engine's pool (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_checkout(self, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+
+    def record_wait(self, wait_seconds: float) -> None:
+        with self._lock:
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_total": round(self.wait_seconds_total * 1000, 3),
+                "wait_ms_avg": round(self.wait_seconds_total * 1000 / attempts, 3) if attempts else 0.0,
+                "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+            }
+
+
+class _TimedQueue(AsyncAdaptedQueue):
+    """Pool queue timing each wait for a free connection.
+
+    Only the queue wait is timed: opening a new (overflow) connection,
+    pre-ping and recycle happen outside ``get`` and are not checkout waits.
+    """
+
+    metrics: Optional[PoolMetrics] = None
+
+    def get(self, block: bool = True, timeout: Optional[float] = None):
+        start = time.perf_counter()
+        try:
+            return super().get(block, timeout)
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_wait(time.perf_counter() - start)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waited"""
+
+    _queue_class = _TimedQueue
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = self._pool.metrics = PoolMetrics()
+
+    def connect(self):
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.metrics.record_checkout(timed_out=True)
+            raise
+        self.metrics.record_checkout()
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep the counters continuous
+        pool = super().recreate()
+        pool.metrics = pool._pool.metrics = self.metrics
+        return pool
+
+
+def _install_sqlite_pragmas(engine: AsyncEngine, mmap_size: int) -> None:
+    """Apply WAL, synchronous=NORMAL and mmap on every new SQLite connection"""
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        finally:
+            cursor.close()
+
+
+def create_engine_from_config(config: Any, url: Optional[str] = None) -> AsyncEngine:
+    """Build an AsyncEngine for a DatabaseConfig (or one of its replica URLs) with dialect tuning"""
+    url = to_async_url(url or config.url)
+    backend = url.get_backend_name()
+    connect_args = dict(config.connect_args)
+    engine_kwargs: Dict[str, Any] = {
+        "echo": config.echo,
+        "pool_pre_ping": True,  # Verify connections before use
+    }
+
+    if is_memory_sqlite(url):
+        # Every connection to :memory: is a separate database; share one
+        engine_kwargs["poolclass"] = StaticPool
+    elif config.pool_size <= 0:
+        engine_kwargs["poolclass"] = NullPool
+    else:
+        engine_kwargs.update(
+            poolclass=InstrumentedAsyncQueuePool,
+            pool_size=config.pool_size,
+            max_overflow=config.max_overflow,
+            pool_timeout=config.pool_timeout,
+            pool_recycle=config.pool_recycle,
+        )
+
+    if backend == "postgresql" and url.get_driver_name() == "asyncpg":
+        # asyncpg's server-side statement cache; 0 is required behind pgbouncer transaction pooling
+        connect_args.setdefault("statement_cache_size", config.statement_cache_size)
+        if "prepared_statement_cache_size" not in url.query:
+            url = url.update_query_dict(
+                {"prepared_statement_cache_size": str(config.statement_cache_size)}
+            )
+
+    engine = create_async_engine(url, connect_args=connect_args, **engine_kwargs)
+
+    if backend == "sqlite":
+        _install_sqlite_pragmas(engine, config.sqlite_mmap_size)
+
+    return engine
+
+
+def pool_status(engine: Optional[AsyncEngine]) -> Dict[str, Any]:
+    """Current pool occupancy plus accumulated checkout wait metrics"""
+    if engine is None:
+        return {"initialized": False}
+
+    pool = engine.sync_engine.pool
+    status: Dict[str, Any] = {"initialized": True, "pool_class": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            # QueuePool counts unused slots as negative overflow
+            overflow=max(0, pool.overflow()),
+            timeout_seconds=pool.timeout(),
+        )
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        status.update(metrics.snapshot())
+    return status
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+ARQ - AI Assistant with Memory & Context Management
+Application-scoped HTTP clients with keep-alive pools and per-host stats
+"""
+
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class HostStats:
+    """Counters for one origin ("scheme://host:port")"""
+
+    __slots__ = ("requests", "errors", "connections_opened", "total_ms")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.connections_opened = 0
+        self.total_ms = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        reused = self.requests - self.connections_opened
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "connections_opened": self.connections_opened,
+            "reuse_ratio": round(reused / self.requests, 3) if self.requests else 0.0,
+            "avg_response_ms": round(self.total_ms / self.requests, 3) if self.requests else 0.0,
+        }
+
+
+def _origin(url: httpx.URL) -> str:
+    return f"{url.scheme}://{url.host}:{url.port or (443 if url.scheme == 'https' else 80)}"
+
+
+class _InstrumentedAsyncClient(httpx.AsyncClient):
+    """AsyncClient reporting transport failures, which never reach response hooks"""
+
+    def __init__(
+        self, *args: Any, on_transport_error: Callable[[httpx.Request], None], **kwargs: Any
+    ):
+        super().__init__(*args, **kwargs)
+        self._on_transport_error = on_transport_error
+
+    async def send(self, request: httpx.Request, **kwargs: Any) -> httpx.Response:
+        try:
+            return await super().send(request, **kwargs)
+        except httpx.TransportError as e:
+            # After redirects the failing request is not the one passed in
+            try:
+                failed = e.request
+            except RuntimeError:
+                failed = request
+            self._on_transport_error(failed)
+            raise
+
+
+class HTTPClientRegistry:
+    """One pooled ``httpx.AsyncClient`` per named upstream, shared for the app's lifetime.
+
+    Clients are created lazily by ``get`` and keep connections alive between
+    calls, so repeated requests to the same host skip TCP (and TLS) setup.
+    Event hooks record requests, 5xx errors and time-to-headers per host;
+    transport errors and timeouts count as errors too, timed until they
+    were raised. A connection trace counts new connections, so ``stats``
+    shows how often the pool was actually reused.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 60.0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+    ):
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._hosts: Dict[str, HostStats] = {}
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "HTTPClientRegistry":
+        return cls(
+            timeout=settings.HTTP_CLIENT_TIMEOUT,
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        )
+
+    def _host(self, url: httpx.URL) -> HostStats:
+        origin = _origin(url)
+        stats = self._hosts.get(origin)
+        if stats is None:
+            stats = self._hosts[origin] = HostStats()
+        return stats
+
+    async def _on_request(self, request: httpx.Request) -> None:
+        stats = self._host(request.url)
+        stats.requests += 1
+        request.extensions["arq_started"] = time.perf_counter()
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                stats.connections_opened += 1
+
+        request.extensions["trace"] = trace
+
+    async def _on_response(self, response: httpx.Response) -> None:
+        stats = self._record_elapsed(response.request)
+        if response.status_code >= 500:
+            stats.errors += 1
+
+    def _on_transport_error(self, request: httpx.Request) -> None:
+        self._record_elapsed(request).errors += 1
+
+    def _record_elapsed(self, request: httpx.Request) -> HostStats:
+        stats = self._host(request.url)
+        started = request.extensions.get("arq_started")
+        if started is not None:
+            stats.total_ms += (time.perf_counter() - started) * 1000
+        return stats
+
+    def get(self, name: str = "default", **kwargs: Any) -> httpx.AsyncClient:
+        """Return the client registered under ``name``, creating it on first use.
+
+        ``kwargs`` (base_url, headers, transport, ...) only apply when the
+        client is created.
+        """
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            kwargs.setdefault("timeout", self.timeout)
+            kwargs.setdefault("limits", self.limits)
+            client = _InstrumentedAsyncClient(
+                event_hooks={"request": [self._on_request], "response": [self._on_response]},
+                on_transport_error=self._on_transport_error,
+                **kwargs,
+            )
+            self._clients[name] = client
+        return client
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-host request counters plus current pool occupancy per client"""
+        pools: Dict[str, Any] = {}
+        for name, client in self._clients.items():
+            pool = getattr(getattr(client, "_transport", None), "_pool", None)
+            connections = getattr(pool, "connections", [])
+            by_host: Dict[str, Dict[str, int]] = {}
+            for connection in connections:
+                origin = connection._origin
+                host = f"{origin.scheme.decode()}://{origin.host.decode()}:{origin.port}"
+                entry = by_host.setdefault(host, {"open": 0, "idle": 0})
+                entry["open"] += 1
+                entry["idle"] += connection.is_idle()
+            pools[name] = by_host
+        return {
+            "hosts": {origin: stats.as_dict() for origin, stats in self._hosts.items()},
+            "pools": pools,
+        }
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+# Global registry (created in main.lifespan / worker start, or lazily)
+_http_clients: Optional[HTTPClientRegistry] = None
+
+
+def _forget_after_fork() -> None:
+    # Pooled sockets belong to the parent; the child builds its own clients
+    global _http_clients
+    _http_clients = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_after_fork)
+
+
+def get_http_clients() -> HTTPClientRegistry:
+    """Return the global registry, creating it with defaults outside the app lifespan"""
+    global _http_clients
+    if _http_clients is None:
+        _http_clients = HTTPClientRegistry()
+    return _http_clients
+
+
+def init_http_clients(settings: Any) -> HTTPClientRegistry:
+    global _http_clients
+    _http_clients = HTTPClientRegistry.from_settings(settings)
+    return _http_clients
+
+
+async def shutdown_http_clients() -> None:
+    """Close every pooled client"""
+    global _http_clients
+    if _http_clients:
+        await _http_clients.aclose()
+        _http_clients = None
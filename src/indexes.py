@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+ARQ - AI Assistant with Memory & Context Management
+Index advisor deriving composite indexes from data access query shapes
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import Index, MetaData, Table, inspect, true
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class QueryShape:
+    """Describes the filter/sort shape of a query issued by a data access manager.
+
+    Columns are listed by role so the advisor can order them following the
+    equality -> sort -> range rule that lets one B-tree serve both the filter
+    and the ORDER BY ... LIMIT without a separate sort step.
+    """
+    name: str
+    table: str
+    source: str
+    equality: Tuple[str, ...] = ()
+    order_by: Tuple[Tuple[str, bool], ...] = ()  # (column, descending)
+    range: Tuple[str, ...] = ()
+    where_true: Tuple[str, ...] = ()  # boolean columns restricting to live rows
+    where_not_null: Tuple[str, ...] = ()  # nullable columns restricting to live rows
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """Index recommendation derived from one or more query shapes"""
+    name: str
+    table: str
+    columns: Tuple[Tuple[str, bool], ...]  # (column, descending)
+    where_true: Tuple[str, ...] = ()
+    where_not_null: Tuple[str, ...] = ()
+    sources: Tuple[str, ...] = ()
+
+    @property
+    def column_names(self) -> Tuple[str, ...]:
+        return tuple(column for column, _ in self.columns)
+
+    @property
+    def is_partial(self) -> bool:
+        return bool(self.where_true or self.where_not_null)
+
+    def covers(self, other: "IndexSpec") -> bool:
+        """Whether this index can serve every query ``other`` was derived for"""
+        if self.table != other.table or self.is_partial != other.is_partial:
+            return False
+        if (self.where_true, self.where_not_null) != (other.where_true, other.where_not_null):
+            return False
+        return self.columns[:len(other.columns)] == other.columns
+
+    def to_index(self, table: Table) -> Index:
+        """Build the SQLAlchemy ``Index`` (partial on PostgreSQL and SQLite)"""
+        expressions = [
+            table.c[column].desc() if descending else table.c[column]
+            for column, descending in self.columns
+        ]
+
+        predicate = None
+        clauses = [table.c[column] == true() for column in self.where_true]
+        clauses += [table.c[column].isnot(None) for column in self.where_not_null]
+        if clauses:
+            predicate = clauses[0]
+            for clause in clauses[1:]:
+                predicate = predicate & clause
+
+        dialect_kwargs = {}
+        if predicate is not None:
+            dialect_kwargs = {"postgresql_where": predicate, "sqlite_where": predicate}
+
+        return Index(self.name, *expressions, **dialect_kwargs)
+
+
+# Query shapes issued by MemoryManager (memory.py)
+MEMORY_QUERY_SHAPES: Tuple[QueryShape, ...] = (
+    QueryShape(
+        name="idx_memory_user_key",
+        table="memories",
+        source="MemoryManager.retrieve_memory",
+        equality=("user_id", "key"),
+        range=("expires_at",),
+    ),
+    QueryShape(
+        name="idx_memory_user_ranked",
+        table="memories",
+        source="MemoryManager.retrieve_memories/retrieve_memories_page",
+        equality=("user_id",),
+        order_by=(("importance", True), ("updated_at", True), ("id", True)),
+        range=("expires_at",),
+    ),
+    QueryShape(
+        name="idx_memory_user_ranked",
+        table="memories",
+        source="MemoryManager.search_memories",
+        # The ILIKE predicate is a residual filter either way, so only the sort prefix matters
+        equality=("user_id",),
+        order_by=(("importance", True),),
+    ),
+    QueryShape(
+        name="idx_memory_user_type_ranked",
+        table="memories",
+        source="MemoryManager.retrieve_memories(memory_type)",
+        equality=("user_id", "memory_type"),
+        order_by=(("importance", True), ("updated_at", True), ("id", True)),
+        range=("expires_at",),
+    ),
+    QueryShape(
+        name="idx_memory_user_session_ranked",
+        table="memories",
+        source="MemoryManager.retrieve_memories(session_id)",
+        equality=("user_id", "session_id"),
+        order_by=(("importance", True), ("updated_at", True), ("id", True)),
+        range=("expires_at",),
+    ),
+    QueryShape(
+        name="idx_memory_expiring",
+        table="memories",
+        source="MemoryManager.cleanup_expired_memories",
+        range=("expires_at",),
+        where_not_null=("expires_at",),
+    ),
+)
+
+# Query shapes issued by MessageManager (messages.py)
+MESSAGE_QUERY_SHAPES: Tuple[QueryShape, ...] = (
+    QueryShape(
+        name="idx_message_session_keyset",
+        table="messages",
+        source="MessageManager.get_messages_page",
+        equality=("session_id",),
+        order_by=(("created_at", False), ("id", False)),
+    ),
+)
+
+# Query shapes issued by SessionManager (sessions.py)
+SESSION_QUERY_SHAPES: Tuple[QueryShape, ...] = (
+    QueryShape(
+        name="idx_session_user_live_recent",
+        table="sessions",
+        source="SessionManager.get_user_sessions(active_only)",
+        equality=("user_id",),
+        order_by=(("created_at", True),),
+        range=("expires_at",),
+        where_true=("is_active",),
+    ),
+    QueryShape(
+        name="idx_session_expiring",
+        table="sessions",
+        source="SessionManager.cleanup_expired_sessions",
+        range=("expires_at",),
+        where_not_null=("expires_at",),
+    ),
+)
+
+DEFAULT_QUERY_SHAPES: Tuple[QueryShape, ...] = (
+    MEMORY_QUERY_SHAPES + MESSAGE_QUERY_SHAPES + SESSION_QUERY_SHAPES
+)
+
+
+class IndexAdvisor:
+    """Derives composite/partial index recommendations from query shapes"""
+
+    def __init__(self, shapes: Iterable[QueryShape] = DEFAULT_QUERY_SHAPES):
+        self.shapes = tuple(shapes)
+
+    @staticmethod
+    def derive(shape: QueryShape) -> IndexSpec:
+        """Order the shape's columns as equality, then sort keys, then range"""
+        columns: List[Tuple[str, bool]] = [(column, False) for column in shape.equality]
+        seen = set(shape.equality)
+
+        for column, descending in shape.order_by:
+            if column not in seen:
+                columns.append((column, descending))
+                seen.add(column)
+
+        for column in shape.range:
+            if column not in seen:
+                columns.append((column, False))
+                seen.add(column)
+
+        return IndexSpec(
+            name=shape.name,
+            table=shape.table,
+            columns=tuple(columns),
+            where_true=shape.where_true,
+            where_not_null=shape.where_not_null,
+            sources=(shape.source,),
+        )
+
+    def recommend(self) -> List[IndexSpec]:
+        """Return the minimal set of indexes serving every registered shape"""
+        candidates: Dict[str, IndexSpec] = {}
+        for shape in self.shapes:
+            spec = self.derive(shape)
+            existing = candidates.get(spec.name)
+            if existing is None:
+                candidates[spec.name] = spec
+                continue
+            # Shapes sharing a name must collapse onto the widest derived key
+            wider, narrower = (existing, spec) if existing.covers(spec) else (spec, existing)
+            if not wider.covers(narrower):
+                raise ValueError(f"Query shapes for {spec.name} derive incompatible indexes")
+            candidates[spec.name] = IndexSpec(
+                name=wider.name,
+                table=wider.table,
+                columns=wider.columns,
+                where_true=wider.where_true,
+                where_not_null=wider.where_not_null,
+                sources=existing.sources + spec.sources,
+            )
+
+        recommendations: List[IndexSpec] = []
+        for spec in candidates.values():
+            coverer = next(
+                (other for other in candidates.values() if other is not spec and other.covers(spec)
+                 and len(other.columns) > len(spec.columns)),
+                None,
+            )
+            if coverer is not None:
+                logger.debug(f"Index {spec.name} is a prefix of {coverer.name}; skipping")
+                continue
+            recommendations.append(spec)
+        return recommendations
+
+    def stale(self, existing: Dict[str, Sequence[dict]]) -> List[IndexSpec]:
+        """Recommendations whose name exists in the database with a different column list"""
+        stale: List[IndexSpec] = []
+        for spec in self.recommend():
+            for index in existing.get(spec.table, []):
+                if index["name"] == spec.name and tuple(index["column_names"]) != spec.column_names:
+                    stale.append(spec)
+        return stale
+
+    def missing(self, existing: Dict[str, Sequence[dict]]) -> List[IndexSpec]:
+        """Filter recommendations against reflected indexes (``Inspector.get_indexes`` per table)"""
+        missing: List[IndexSpec] = []
+        for spec in self.recommend():
+            table_indexes = existing.get(spec.table, [])
+            if any(
+                index["name"] == spec.name and tuple(index["column_names"]) == spec.column_names
+                for index in table_indexes
+            ):
+                continue
+            if not spec.is_partial and any(
+                tuple(index["column_names"][:len(spec.columns)]) == spec.column_names
+                for index in table_indexes
+            ):
+                continue
+            missing.append(spec)
+        return missing
+
+    def apply(self, connection: Connection, metadata: MetaData) -> List[str]:
+        """Create every missing recommended index on a live (sync) connection"""
+        inspector = inspect(connection)
+        tables = {spec.table for spec in self.recommend()}
+        existing = {
+            table: inspector.get_indexes(table)
+            for table in tables if inspector.has_table(table)
+        }
+
+        for spec in self.stale(existing):
+            # Shape changed since the index was built (e.g. a new tie-breaker column)
+            table = metadata.tables[spec.table].to_metadata(MetaData())
+            spec.to_index(table).drop(connection)
+            logger.info(f"Dropped stale index {spec.name} on {spec.table}")
+
+        created: List[str] = []
+        for spec in self.missing(existing):
+            if spec.table not in existing:
+                continue
+            # Build against a detached copy so the shared ORM metadata is left untouched
+            table = metadata.tables[spec.table].to_metadata(MetaData())
+            index = spec.to_index(table)
+            index.create(connection)
+            created.append(spec.name)
+            logger.info(f"Created index {spec.name} on {spec.table} for {', '.join(spec.sources)}")
+        return created
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+ARQ - AI Assistant with Memory & Context Management
+Durable job queue for ARQ development tasks (SQLite local mode, optional Redis)
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_expires REAL,
+    worker TEXT,
+    last_error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_available ON jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_lease ON jobs (status, lease_expires);
+"""
+
+# Job lifecycle: queued -> leased -> done | queued (retry) | dead
+JOB_STATUSES = ("queued", "leased", "done", "dead")
+
+
+class Job(NamedTuple):
+    id: str
+    task_id: str
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+
+
+class SQLiteJobQueue:
+    """Jobs in a SQLite (WAL) table shared by the web process and the workers.
+
+    A claim leases the oldest runnable job for ``visibility_timeout`` seconds.
+    Workers extend the lease while they run; a job whose lease expires (the
+    worker crashed or hung) becomes claimable again, until it has used up
+    ``max_attempts`` and is moved to ``dead``.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # A connection inherited across fork must not be used by the child
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> Job:
+        return Job(str(row["id"]), row["task_id"], json.loads(row["payload"]),
+                   row["attempts"], row["max_attempts"])
+
+    def enqueue(self, task_id: str, payload: Dict[str, Any], delay: float = 0) -> str:
+        now = time.time()
+        cursor = self._connect().execute(
+            "INSERT INTO jobs (task_id, payload, max_attempts, available_at, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (task_id, json.dumps(payload), self.max_attempts, now + delay, now),
+        )
+        return str(cursor.lastrowid)
+
+    def reap_expired(self) -> List[Job]:
+        """Dead-letter leased jobs that timed out on their last attempt"""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'leased' AND lease_expires <= ? "
+                "AND attempts >= max_attempts",
+                (now,),
+            ).fetchall()
+            if rows:
+                conn.executemany(
+                    "UPDATE jobs SET status = 'dead', last_error = 'visibility timeout expired' "
+                    "WHERE id = ?",
+                    [(row["id"],) for row in rows],
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return [self._to_job(row) for row in rows]
+
+    def claim(self, worker: str, visibility_timeout: float) -> Optional[Job]:
+        """Lease the oldest runnable job (queued and due, or with an expired lease)"""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE (status = 'queued' AND available_at <= ?) "
+                "OR (status = 'leased' AND lease_expires <= ? AND attempts < max_attempts) "
+                "ORDER BY available_at, id LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'leased', attempts = attempts + 1, "
+                    "lease_expires = ?, worker = ? WHERE id = ?",
+                    (now + visibility_timeout, worker, row["id"]),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        job = self._to_job(row)
+        return job._replace(attempts=job.attempts + 1)
+
+    def extend(self, job: Job, worker: str, visibility_timeout: float) -> bool:
+        """Push the lease out; False if the job was reclaimed by someone else"""
+        cursor = self._connect().execute(
+            "UPDATE jobs SET lease_expires = ? WHERE id = ? AND status = 'leased' AND worker = ?",
+            (time.time() + visibility_timeout, int(job.id), worker),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, job: Job, worker: str) -> bool:
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = 'done', lease_expires = NULL WHERE id = ? "
+            "AND status = 'leased' AND worker = ?",
+            (int(job.id), worker),
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job: Job, worker: str, error: str, retry_delay: float) -> bool:
+        """Requeue after ``retry_delay`` or dead-letter; True if the job will be retried"""
+        retry = job.attempts < job.max_attempts
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, available_at = ?, lease_expires = NULL, last_error = ? "
+            "WHERE id = ? AND status = 'leased' AND worker = ?",
+            ("queued" if retry else "dead", time.time() + retry_delay, error, int(job.id), worker),
+        )
+        return retry
+
+    def stats(self) -> Dict[str, int]:
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        for row in self._connect().execute("SELECT status, count(*) FROM jobs GROUP BY status"):
+            counts[row[0]] = row[1]
+        return counts
+
+
+# Claims atomically: promote due retries, pick a runnable id, lease it.
+# KEYS: queued list, delayed zset, leased zset, job hash prefix
+# ARGV: now, lease expiry, worker, retention seconds
+_REDIS_CLAIM = """
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])) do
+    redis.call('ZREM', KEYS[2], id)
+    redis.call('LPUSH', KEYS[1], id)
+end
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', ARGV[1])) do
+    redis.call('ZREM', KEYS[3], id)
+    redis.call('LPUSH', KEYS[1], id)
+end
+local id = redis.call('RPOP', KEYS[1])
+if not id then return false end
+local job = KEYS[4] .. id
+local attempts = redis.call('HINCRBY', job, 'attempts', 1)
+if attempts > tonumber(redis.call('HGET', job, 'max_attempts')) then
+    redis.call('HSET', job, 'status', 'dead', 'last_error', 'visibility timeout expired')
+    redis.call('EXPIRE', job, ARGV[4])
+    return {id, 'dead'}
+end
+redis.call('HSET', job, 'status', 'leased', 'worker', ARGV[3])
+redis.call('ZADD', KEYS[3], ARGV[2], id)
+return {id, 'leased'}
+"""
+
+
+class RedisJobQueue:
+    """Same contract as SQLiteJobQueue on Redis: a list of runnable ids, a
+    zset of leases scored by expiry and a zset of delayed retries.
+
+    Requires the ``redis`` package; job hashes are kept for inspection and
+    expire ``retention_seconds`` after they finish.
+    """
+
+    def __init__(self, url: str, max_attempts: int = 3, prefix: str = "arq:jobs",
+                 retention_seconds: int = 86400):
+        import redis  # optional dependency, only needed for this backend
+
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.max_attempts = max_attempts
+        self.prefix = prefix
+        self.retention_seconds = retention_seconds
+        self._claim = self.client.register_script(_REDIS_CLAIM)
+        self._reaped: List[Job] = []
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}:{name}"
+
+    def close(self) -> None:
+        self.client.close()
+
+    def _load(self, job_id: str) -> Job:
+        data = self.client.hgetall(self._key(f"job:{job_id}"))
+        return Job(job_id, data["task_id"], json.loads(data["payload"]),
+                   int(data["attempts"]), int(data["max_attempts"]))
+
+    def enqueue(self, task_id: str, payload: Dict[str, Any], delay: float = 0) -> str:
+        job_id = str(self.client.incr(self._key("next_id")))
+        pipe = self.client.pipeline()
+        pipe.hset(self._key(f"job:{job_id}"), mapping={
+            "task_id": task_id, "payload": json.dumps(payload), "status": "queued",
+            "attempts": 0, "max_attempts": self.max_attempts, "created_at": time.time(),
+        })
+        if delay > 0:
+            pipe.zadd(self._key("delayed"), {job_id: time.time() + delay})
+        else:
+            pipe.lpush(self._key("queued"), job_id)
+        pipe.execute()
+        return job_id
+
+    def reap_expired(self) -> List[Job]:
+        # Exhausted leases are dead-lettered inside the claim script
+        reaped, self._reaped = self._reaped, []
+        return reaped
+
+    def claim(self, worker: str, visibility_timeout: float) -> Optional[Job]:
+        now = time.time()
+        claimed = self._claim(
+            keys=[self._key("queued"), self._key("delayed"), self._key("leased"), self._key("job:")],
+            args=[now, now + visibility_timeout, worker, self.retention_seconds],
+        )
+        if not claimed:
+            return None
+        job_id, status = claimed
+        if status == "dead":
+            self._reaped.append(self._load(job_id))
+            return None
+        return self._load(job_id)
+
+    def _owns(self, job: Job, worker: str) -> bool:
+        return self.client.hget(self._key(f"job:{job.id}"), "worker") == worker
+
+    def extend(self, job: Job, worker: str, visibility_timeout: float) -> bool:
+        if not self._owns(job, worker):
+            return False
+        return self.client.zadd(self._key("leased"), {job.id: time.time() + visibility_timeout},
+                                xx=True, ch=True) == 1
+
+    def _finish(self, job: Job, status: str, **fields: Any) -> None:
+        key = self._key(f"job:{job.id}")
+        pipe = self.client.pipeline()
+        pipe.zrem(self._key("leased"), job.id)
+        pipe.hset(key, mapping={"status": status, **fields})
+        pipe.expire(key, self.retention_seconds)
+        pipe.execute()
+
+    def complete(self, job: Job, worker: str) -> bool:
+        if not self._owns(job, worker):
+            return False
+        self._finish(job, "done")
+        return True
+
+    def fail(self, job: Job, worker: str, error: str, retry_delay: float) -> bool:
+        retry = job.attempts < job.max_attempts
+        if not self._owns(job, worker):
+            return retry
+        if not retry:
+            self._finish(job, "dead", last_error=error)
+            return False
+        pipe = self.client.pipeline()
+        pipe.zrem(self._key("leased"), job.id)
+        pipe.hset(self._key(f"job:{job.id}"), mapping={"status": "queued", "last_error": error})
+        pipe.zadd(self._key("delayed"), {job.id: time.time() + retry_delay})
+        pipe.execute()
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self.client.llen(self._key("queued")) + self.client.zcard(self._key("delayed")),
+            "leased": self.client.zcard(self._key("leased")),
+        }
+
+
+def open_job_queue(settings: Any):
+    """Build the queue selected by ARQ_QUEUE_BACKEND ("sqlite" or "redis")"""
+    if settings.ARQ_QUEUE_BACKEND == "redis":
+        if not settings.REDIS_URL:
+            raise ValueError("ARQ_QUEUE_BACKEND=redis requires REDIS_URL")
+        return RedisJobQueue(settings.REDIS_URL, max_attempts=settings.ARQ_JOB_MAX_ATTEMPTS)
+    if settings.ARQ_QUEUE_BACKEND != "sqlite":
+        raise ValueError(f"Unknown ARQ_QUEUE_BACKEND: {settings.ARQ_QUEUE_BACKEND}")
+    os.makedirs(settings.ARQ_DATA_DIR, exist_ok=True)
+    return SQLiteJobQueue(os.path.join(settings.ARQ_DATA_DIR, "jobs.db"),
+                          max_attempts=settings.ARQ_JOB_MAX_ATTEMPTS)
@@ -5,18 +5,25 @@ LLM Integration Module for ARQ AI Assistant
 
 Phase 9: LLM Integration with OpenAI and Ollama support
 Provides streaming, context management, and retry logic
+
+Requests go through the shared keep-alive clients of http_clients
+("openai" and "ollama"), so repeated calls reuse connections.
 """
 
+import asyncio
 import json
 import os
 import time
 import logging
-from typing import Optional, List, Dict, Any, Generator
+from typing import Optional, List, Dict, Any, AsyncIterator
 from dataclasses import dataclass, asdict
 from enum import Enum
-import requests
 from datetime import datetime
 
+import httpx
+
+from http_clients import get_http_clients
+
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -93,14 +100,20 @@ class ContextManager:
 class OpenAIClient:
     """OpenAI API client wrapper"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, http_client: Optional[httpx.AsyncClient] = None):
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY not set")
         self.base_url = "https://api.openai.com/v1/chat/completions"
         self.timeout = int(os.getenv('MODEL_TIMEOUT', 30))
+        self._http_client = http_client
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Injected client, else the registry's shared "openai" client"""
+        return self._http_client or get_http_clients().get("openai")
         
-    def generate(self, request: LLMRequest) -> LLMResponse:
+    async def generate(self, request: LLMRequest) -> LLMResponse:
         """Generate response using OpenAI API"""
         try:
             start_time = time.time()
@@ -122,7 +135,7 @@ class OpenAIClient:
                 "stream": False
             }
             
-            response = requests.post(
+            response = await self.http_client.post(
                 self.base_url,
                 headers=headers,
                 json=payload,
@@ -146,7 +159,7 @@ class OpenAIClient:
             logger.error(f"OpenAI API error: {str(e)}")
             raise
     
-    def stream(self, request: LLMRequest) -> Generator[str, None, None]:
+    async def stream(self, request: LLMRequest) -> AsyncIterator[str]:
         """Stream response from OpenAI API"""
         headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -166,27 +179,27 @@ class OpenAIClient:
         }
         
         try:
-            response = requests.post(
+            async with self.http_client.stream(
+                "POST",
                 self.base_url,
                 headers=headers,
                 json=payload,
-                timeout=self.timeout,
-                stream=True
-            )
-            response.raise_for_status()
-            
-            for line in response.iter_lines():
-                if line and line.startswith(b'data: '):
-                    data_str = line[6:].decode('utf-8')
-                    if data_str == '[DONE]':
-                        break
-                    try:
-                        data = json.loads(data_str)
-                        chunk = data['choices'][0]['delta'].get('content', '')
-                        if chunk:
-                            yield chunk
-                    except:
-                        continue
+                timeout=self.timeout
+            ) as response:
+                response.raise_for_status()
+                
+                async for line in response.aiter_lines():
+                    if line and line.startswith('data: '):
+                        data_str = line[6:]
+                        if data_str == '[DONE]':
+                            break
+                        try:
+                            data = json.loads(data_str)
+                            chunk = data['choices'][0]['delta'].get('content', '')
+                            if chunk:
+                                yield chunk
+                        except:
+                            continue
         except Exception as e:
             logger.error(f"OpenAI streaming error: {str(e)}")
             raise
@@ -195,12 +208,18 @@ class OpenAIClient:
 class OllamaClient:
     """Ollama API client wrapper"""
     
-    def __init__(self, base_url: str = None):
+    def __init__(self, base_url: str = None, http_client: Optional[httpx.AsyncClient] = None):
         self.base_url = base_url or os.getenv('OLLAMA_URL', 'http://localhost:11434')
         self.model = os.getenv('OLLAMA_MODEL', 'llama2')
         self.timeout = int(os.getenv('MODEL_TIMEOUT', 30))
+        self._http_client = http_client
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Injected client, else the registry's shared "ollama" client"""
+        return self._http_client or get_http_clients().get("ollama")
         
-    def generate(self, request: LLMRequest) -> LLMResponse:
+    async def generate(self, request: LLMRequest) -> LLMResponse:
         """Generate response using Ollama API"""
         try:
             start_time = time.time()
@@ -218,7 +237,7 @@ class OllamaClient:
                 "stream": False
             }
             
-            response = requests.post(
+            response = await self.http_client.post(
                 f"{self.base_url}/api/generate",
                 json=payload,
                 timeout=self.timeout
@@ -241,7 +260,7 @@ class OllamaClient:
             logger.error(f"Ollama API error: {str(e)}")
             raise
     
-    def stream(self, request: LLMRequest) -> Generator[str, None, None]:
+    async def stream(self, request: LLMRequest) -> AsyncIterator[str]:
         """Stream response from Ollama API"""
         context_text = ""
         for msg in request.context:
@@ -257,23 +276,23 @@ class OllamaClient:
         }
         
         try:
-            response = requests.post(
+            async with self.http_client.stream(
+                "POST",
                 f"{self.base_url}/api/generate",
                 json=payload,
-                timeout=self.timeout,
-                stream=True
-            )
-            response.raise_for_status()
-            
-            for line in response.iter_lines():
-                if line:
-                    try:
-                        data = json.loads(line)
-                        chunk = data.get('response', '')
-                        if chunk:
-                            yield chunk
-                    except:
-                        continue
+                timeout=self.timeout
+            ) as response:
+                response.raise_for_status()
+                
+                async for line in response.aiter_lines():
+                    if line:
+                        try:
+                            data = json.loads(line)
+                            chunk = data.get('response', '')
+                            if chunk:
+                                yield chunk
+                        except:
+                            continue
         except Exception as e:
             logger.error(f"Ollama streaming error: {str(e)}")
             raise
@@ -289,19 +308,19 @@ class LLMIntegration:
         self.max_retries = int(os.getenv('RETRY_MAX_ATTEMPTS', 3))
         self.backoff_factor = float(os.getenv('RETRY_BACKOFF_FACTOR', 2.0))
         
-    def _retry_with_backoff(self, func, *args, **kwargs):
-        """Retry function with exponential backoff"""
+    async def _retry_with_backoff(self, func, *args, **kwargs):
+        """Retry coroutine function with exponential backoff"""
         for attempt in range(self.max_retries):
             try:
-                return func(*args, **kwargs)
+                return await func(*args, **kwargs)
             except Exception as e:
                 if attempt == self.max_retries - 1:
                     raise
                 wait_time = self.backoff_factor ** attempt
                 logger.warning(f"Retry attempt {attempt + 1} after {wait_time}s: {str(e)}")
-                time.sleep(wait_time)
+                await asyncio.sleep(wait_time)
     
-    def generate_response(self, prompt: str, model: str = "gpt-4", 
+    async def generate_response(self, prompt: str, model: str = "gpt-4", 
                          streaming: bool = False, context: List[Dict] = None) -> LLMResponse:
         """Generate LLM response"""
         context = context or []
@@ -318,11 +337,11 @@ class LLMIntegration:
         
         try:
             if 'gpt' in model:
-                response = self._retry_with_backoff(
+                response = await self._retry_with_backoff(
                     self.openai_client.generate, request
                 )
             else:
-                response = self._retry_with_backoff(
+                response = await self._retry_with_backoff(
                     self.ollama_client.generate, request
                 )
             return response
@@ -330,9 +349,9 @@ class LLMIntegration:
             logger.error(f"Failed to generate response: {str(e)}")
             raise
     
-    def stream_response(self, prompt: str, model: str = "gpt-4", 
-                       context: List[Dict] = None) -> Generator[str, None, None]:
-        """Stream LLM response"""
+    async def stream_response(self, prompt: str, model: str = "gpt-4", 
+                             context: List[Dict] = None) -> AsyncIterator[str]:
+        """Stream LLM response (not retried: chunks may already have been sent)"""
         context = context or []
         context = self.context_manager.trim_context(context)
         
@@ -344,14 +363,9 @@ class LLMIntegration:
         )
         
         try:
-            if 'gpt' in model:
-                yield from self._retry_with_backoff(
-                    self.openai_client.stream, request
-                )
-            else:
-                yield from self._retry_with_backoff(
-                    self.ollama_client.stream, request
-                )
+            client = self.openai_client if 'gpt' in model else self.ollama_client
+            async for chunk in client.stream(request):
+                yield chunk
         except Exception as e:
             logger.error(f"Failed to stream response: {str(e)}")
             raise
@@ -367,10 +381,10 @@ if __name__ == "__main__":
     
     llm = create_llm_integration()
     
-    response = llm.generate_response(
+    response = asyncio.run(llm.generate_response(
         "Hello, what is your name?",
         model="gpt-3.5-turbo"
-    )
+    ))
     
     print(f"Response: {response.content}")
     print(f"Tokens: {response.tokens_used}")
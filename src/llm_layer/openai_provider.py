@@ -1,9 +1,10 @@
 import asyncio
 import httpx
 import time
-from typing import AsyncIterator
+from typing import AsyncIterator, Optional
 import logging
 
+from http_clients import get_http_clients
 from .provider_base import (
     LLMProvider,
     CompletionRequest,
@@ -17,12 +18,28 @@ logger = logging.getLogger(__name__)
 class OpenAIProvider(LLMProvider):
     """Ollama Integration via OpenAI-compatible API"""
 
-    def __init__(self, api_key: str, model: str = "llama3.1", timeout: int = 120, max_retries: int = 3):
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "llama3.1",
+        timeout: int = 120,
+        max_retries: int = 3,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ):
         super().__init__("openai", timeout, max_retries)
         self.api_key = api_key
         # Адрес твоей локальной Олламы
         self.base_url = "http://127.0.0.1:11434/v1/chat/completions"
         self.model = model
+        # Без явного клиента берём общий "ollama" из http_clients (тот же пул, что у arq_endpoints)
+        self._http_client = http_client
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        return self._http_client or get_http_clients().get("ollama")
+
+    async def aclose(self) -> None:
+        """Nothing to close: clients are owned by the caller or the shared registry"""
 
     async def complete(self, request: CompletionRequest) -> CompletionResponse:
         start_time = time.time()
@@ -33,26 +50,25 @@ class OpenAIProvider(LLMProvider):
             "stream": False
         }
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.post(self.base_url, json=payload)
-                response.raise_for_status()
-                data = response.json()
-                
-                content = data['choices'][0]['message']['content']
-                latency_ms = (time.time() - start_time) * 1000
-                
-                return CompletionResponse(
-                    content=content,
-                    model=self.model,
-                    provider="ollama-local",
-                    tokens_used=data.get('usage', {}).get('total_tokens', 0),
-                    latency_ms=latency_ms,
-                    finish_reason="stop",
-                )
-            except Exception as e:
-                logger.error(f"Ollama Error: {e}")
-                raise
+        try:
+            response = await self.http_client.post(self.base_url, json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+            
+            content = data['choices'][0]['message']['content']
+            latency_ms = (time.time() - start_time) * 1000
+            
+            return CompletionResponse(
+                content=content,
+                model=self.model,
+                provider="ollama-local",
+                tokens_used=data.get('usage', {}).get('total_tokens', 0),
+                latency_ms=latency_ms,
+                finish_reason="stop",
+            )
+        except Exception as e:
+            logger.error(f"Ollama Error: {e}")
+            raise
 
     async def stream(self, request: CompletionRequest) -> AsyncIterator[str]:
         # Упрощенный стриминг для Олламы
@@ -64,6 +80,9 @@ class OpenAIProvider(LLMProvider):
         # Здесь будет логика обработки чанков, но для старта хватит и complete
         yield "Thinking..." # Заглушка для стрима
 
+    async def validate_model(self, model: str) -> bool:
+        return model == self.model
+
     async def get_health_status(self) -> ProviderHealth:
         return ProviderHealth(
             status=ProviderStatus.HEALTHY,
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+ARQ - AI Assistant with Memory & Context Management
+Non-blocking structured logging: queue handoff, JSON records and access-log sampling
+"""
+
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Optional, Tuple
+
+# Attributes every LogRecord has; anything else was passed via ``extra=``
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, extras, exception"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exception"] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that defers all formatting to the listener thread.
+
+    The stock ``prepare`` renders the message on the calling thread; here the
+    record is only shallow-copied, so ``%``-style arguments are interpolated
+    by the listener. A full queue drops the record and counts it instead of
+    blocking or raising on the request path.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return copy.copy(record)
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+
+class RouteSampler:
+    """Decides which successful access-log lines to keep, per route prefix.
+
+    Errors (status >= 400) and slow requests are always kept; other requests
+    are kept one in ``1 / rate`` times, counting per route so the decision is
+    deterministic and costs one dict lookup.
+    """
+
+    def __init__(
+        self,
+        default_rate: float = 1.0,
+        route_rates: Optional[Dict[str, float]] = None,
+        slow_request_ms: float = 1000,
+    ):
+        self.default_rate = default_rate
+        # Longest prefix first so "/status/database" beats "/status"
+        self.route_rates: List[Tuple[str, float]] = sorted(
+            (route_rates or {}).items(), key=lambda item: len(item[0]), reverse=True
+        )
+        self.slow_request_ms = slow_request_ms
+        self._counters: Dict[str, int] = {}
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "RouteSampler":
+        """Build from LOG_SUCCESS_SAMPLE_RATE and LOG_ROUTE_SAMPLE_RATES ("/health=0,/status=0.1")"""
+        route_rates = {}
+        for item in settings.LOG_ROUTE_SAMPLE_RATES.split(","):
+            if "=" in item:
+                route, rate = item.split("=", 1)
+                route_rates[route.strip()] = float(rate)
+        return cls(settings.LOG_SUCCESS_SAMPLE_RATE, route_rates, settings.LOG_SLOW_REQUEST_MS)
+
+    def rate_for(self, path: str) -> Tuple[str, float]:
+        for prefix, rate in self.route_rates:
+            if path.startswith(prefix):
+                return prefix, rate
+        return "", self.default_rate
+
+    def should_log(self, path: str, status_code: int, response_time_ms: float) -> bool:
+        if status_code >= 400 or response_time_ms >= self.slow_request_ms:
+            return True
+        route, rate = self.rate_for(path)
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        count = self._counters.get(route, 0)
+        self._counters[route] = count + 1
+        return count % round(1 / rate) == 0
+
+
+# Listener draining the queue on its own thread (set by setup_logging)
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+_setup_args: Optional[Tuple[str, str, int]] = None
+
+
+def setup_logging(level: str = "INFO", fmt: str = "json", queue_size: int = 10000) -> QueueListener:
+    """Route all logging through a bounded queue to a background stdout writer"""
+    global _listener, _queue_handler, _setup_args
+    shutdown_logging()
+    _setup_args = (level, fmt, queue_size)
+
+    handler = logging.StreamHandler(sys.stdout)
+    if fmt == "json":
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener, _queue_handler
+    if _listener:
+        _listener.stop()
+        _listener = None
+    if _queue_handler:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+
+
+def _restart_after_fork() -> None:
+    """The listener thread does not survive fork; give the child its own queue and listener"""
+    global _listener
+    if _listener is not None and _setup_args is not None:
+        _listener = None  # the parent's thread; nothing to stop in this process
+        setup_logging(*_setup_args)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def dropped_records() -> int:
+    return _queue_handler.dropped if _queue_handler else 0
@@ -1,11 +1,11 @@
 #!/usr/bin/env python3
 import asyncio
 import logging
+import os
 from datetime import datetime
 from typing import Optional, Dict, Any
 
 from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from pydantic import BaseModel
 
@@ -21,9 +21,35 @@ except ImportError:
     settings = Settings()
     arq_router = None
 
-logging.basicConfig(level=logging.INFO)
+from api_log_writer import init_api_log_writer, shutdown_api_log_writer
+from database import DatabaseConfig, init_db, shutdown_db
+from http_clients import init_http_clients, shutdown_http_clients
+from middleware import RequestPipelineMiddleware
+from logging_pipeline import RouteSampler, setup_logging, shutdown_logging
+
+# Log records are handed to a queue; formatting and I/O run on a listener thread
+setup_logging(
+    level=getattr(settings, "LOG_LEVEL", "INFO"),
+    fmt=getattr(settings, "LOG_FORMAT", "json"),
+    queue_size=getattr(settings, "LOG_QUEUE_SIZE", 10000),
+)
 logger = logging.getLogger(__name__)
 
+
+def pipeline_options(settings) -> Dict[str, Any]:
+    """RequestPipelineMiddleware options: CORS plus access-log sampling from LOG_* settings"""
+    options: Dict[str, Any] = {
+        "allowed_origins": ["*"],
+        "allow_credentials": False,
+        "allow_methods": ["*"],
+        "allow_headers": ["*"],
+    }
+    if hasattr(settings, "LOG_ROUTE_SAMPLE_RATES"):
+        options["sampler"] = RouteSampler.from_settings(settings)
+        options["slow_request_threshold_ms"] = settings.LOG_SLOW_REQUEST_MS
+    return options
+
+
 # Модели ответов
 class HealthResponse(BaseModel):
     status: str
@@ -34,8 +60,47 @@ class HealthResponse(BaseModel):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting ARQ AI Engine on port 8001...")
+    # Outbound clients keep connections alive across requests (closed below)
+    if hasattr(settings, "HTTP_CLIENT_TIMEOUT"):
+        init_http_clients(settings)
+    # Engine, pool sizing and replicas from the DATABASE_* settings; the app
+    # still serves its other endpoints when the database is unreachable
+    try:
+        db_manager = await init_db(DatabaseConfig.from_settings(settings))
+    except Exception as e:
+        logger.error(f"Database unavailable, continuing without it: {e}")
+    else:
+        # The pipeline middleware hands every response to this writer (api_logs)
+        init_api_log_writer(db_manager.engine, settings)
+    # Optional job workers as child processes (otherwise run src/arq_worker.py).
+    # Lifespan runs in every gunicorn/uvicorn worker, so a file lock in
+    # ARQ_DATA_DIR lets only the first server process on the host start them.
+    # That process is exempt from max_requests recycling, which would otherwise
+    # stop the pool (and its in-flight jobs) every few thousand requests
+    worker_pool, pool_lock = [], None
+    if arq_router is not None and getattr(settings, "ARQ_EMBEDDED_WORKERS", 0) > 0:
+        from arq_worker import acquire_pool_lock, start_worker_pool
+        os.makedirs(settings.ARQ_DATA_DIR, exist_ok=True)
+        pool_lock = acquire_pool_lock(os.path.join(settings.ARQ_DATA_DIR, "embedded_workers.lock"))
+        if pool_lock is not None:
+            from serving import exempt_from_recycling
+            exempt_from_recycling()
+            worker_pool = start_worker_pool(settings.ARQ_EMBEDDED_WORKERS)
+        else:
+            logger.info("Embedded ARQ workers already run in another server process")
     yield
     logger.info("Shutting down ARQ AI Engine...")
+    if worker_pool:
+        from arq_worker import stop_worker_pool
+        # Waits up to 30s for in-flight jobs; keep the loop free meanwhile
+        await asyncio.to_thread(stop_worker_pool, worker_pool)
+    if pool_lock is not None:
+        pool_lock.close()
+    # Flush buffered api_logs rows before the engine goes away
+    await shutdown_api_log_writer()
+    await shutdown_db()
+    await shutdown_http_clients()
+    shutdown_logging()
 
 app = FastAPI(
     title="ARQ - AI Engine",
@@ -43,13 +108,8 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# Разрешаем запросы (CORS)
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Request ID, access log, api_logs, error envelope and CORS in one ASGI layer
+app.add_middleware(RequestPipelineMiddleware, **pipeline_options(settings))
 
 if arq_router:
     app.include_router(arq_router)
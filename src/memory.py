@@ -6,17 +6,25 @@ Memory management system for storing and retrieving contextual information
 
 import logging
 import hashlib
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, AsyncIterator
 from enum import Enum
 from sqlalchemy import select, and_, or_, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models import Memory, Session as SessionModel, User
 from config import settings
+from database import replica_read_session
+from pagination import KeysetPaginator
 
 logger = logging.getLogger(__name__)
 
+# Ranking order doubles as the keyset: importance, then recency, then id as tie-breaker
+MEMORY_KEYSET = KeysetPaginator(
+    "memory", (Memory.importance, Memory.updated_at, Memory.id), descending=True
+)
+
 
 class MemoryType(str, Enum):
     """Memory type classification"""
@@ -28,10 +36,29 @@ class MemoryType(str, Enum):
 class MemoryManager:
     """Manages contextual memory storage and retrieval"""
 
-    def __init__(self, db_session: AsyncSession):
+    def __init__(
+        self,
+        db_session: AsyncSession,
+        read_session: Optional[AsyncSession] = None,
+        consistency_key: Optional[str] = None,
+    ):
         self.db_session = db_session
+        # Ranked retrieval, search and stats tolerate replica lag and use
+        # read_session, by default a replica session per call (see
+        # DatabaseManager.read_session). Writes use db_session, and so does
+        # retrieve_memory: it bumps access_count, a read-modify-write
+        self.read_session = read_session
+        self.consistency_key = consistency_key
         self.logger = logger
 
+    @asynccontextmanager
+    async def _reading(self) -> AsyncIterator[AsyncSession]:
+        if self.read_session is not None:
+            yield self.read_session
+        else:
+            async with replica_read_session(self.db_session, self.consistency_key) as session:
+                yield session
+
     async def store_memory(
         self,
         user_id: int,
@@ -112,24 +139,10 @@ class MemoryManager:
     ) -> List[Memory]:
         """Retrieve multiple memory entries"""
         try:
-            query = select(Memory).where(
-                and_(
-                    Memory.user_id == user_id,
-                    or_(Memory.expires_at.is_(None), Memory.expires_at > datetime.utcnow()),
-                )
-            )
+            query = self._retrieve_memories_query(user_id, memory_type, session_id, limit)
 
-            if memory_type:
-                query = query.where(Memory.memory_type == memory_type.value)
-
-            if session_id:
-                query = query.where(Memory.session_id == session_id)
-
-            # Order by importance and recency
-            query = query.order_by(desc(Memory.importance), desc(Memory.updated_at)).limit(limit)
-
-            result = await self.db_session.execute(query)
-            memories = result.scalars().all()
+            async with self._reading() as session:
+                memories = (await session.execute(query)).scalars().all()
 
             self.logger.debug(f"Retrieved {len(memories)} memories for user {user_id}")
             return memories
@@ -138,6 +151,52 @@ class MemoryManager:
             self.logger.error(f"Error retrieving memories: {str(e)}", exc_info=True)
             raise
 
+    async def retrieve_memories_page(
+        self,
+        user_id: int,
+        memory_type: Optional[MemoryType] = None,
+        session_id: Optional[int] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Memory], Optional[str]]:
+        """Retrieve one page of ranked memories and the cursor for the next page"""
+        try:
+            query = MEMORY_KEYSET.apply(
+                self._live_memories_query(user_id, memory_type, session_id), cursor, limit
+            )
+            async with self._reading() as session:
+                result = await session.execute(query)
+                memories, next_cursor = MEMORY_KEYSET.page(result.scalars().all(), limit)
+
+            self.logger.debug(f"Retrieved page of {len(memories)} memories for user {user_id}")
+            return memories, next_cursor
+
+        except Exception as e:
+            self.logger.error(f"Error retrieving memory page: {str(e)}", exc_info=True)
+            raise
+
+    async def iter_memories(
+        self,
+        user_id: int,
+        memory_type: Optional[MemoryType] = None,
+        session_id: Optional[int] = None,
+        batch_size: int = 500,
+    ) -> AsyncIterator[List[Memory]]:
+        """Walk every live memory in ranking order, one keyset batch at a time (constant memory)"""
+        cursor = None
+        while True:
+            memories, cursor = await self.retrieve_memories_page(
+                user_id, memory_type, session_id, limit=batch_size, cursor=cursor
+            )
+            if memories:
+                yield memories
+                # Per-call replica sessions are already closed; a shared one keeps its identity map
+                if self.read_session is not None:
+                    for memory in memories:
+                        self.read_session.expunge(memory)
+            if cursor is None:
+                break
+
     async def search_memories(
         self,
         user_id: int,
@@ -166,8 +225,8 @@ class MemoryManager:
 
             query = query.order_by(desc(Memory.importance)).limit(limit)
 
-            result = await self.db_session.execute(query)
-            memories = result.scalars().all()
+            async with self._reading() as session:
+                memories = (await session.execute(query)).scalars().all()
 
             self.logger.debug(f"Found {len(memories)} memories matching '{query_text}'")
             return memories
@@ -265,8 +324,8 @@ class MemoryManager:
         """Get memory statistics for a user"""
         try:
             query = select(Memory).where(Memory.user_id == user_id)
-            result = await self.db_session.execute(query)
-            memories = result.scalars().all()
+            async with self._reading() as session:
+                memories = (await session.execute(query)).scalars().all()
 
             stats = {
                 "total_memories": len(memories),
@@ -303,6 +362,40 @@ class MemoryManager:
             self.logger.error(f"Error getting memory stats: {str(e)}", exc_info=True)
             raise
 
+    @staticmethod
+    def _retrieve_memories_query(
+        user_id: int,
+        memory_type: Optional[MemoryType] = None,
+        session_id: Optional[int] = None,
+        limit: int = 100,
+    ):
+        """Build the ranked live-memory query (served by idx_memory_user_*_ranked, see indexes.py)"""
+        query = MemoryManager._live_memories_query(user_id, memory_type, session_id)
+        # Order by importance and recency
+        return query.order_by(*MEMORY_KEYSET.order_by()).limit(limit)
+
+    @staticmethod
+    def _live_memories_query(
+        user_id: int,
+        memory_type: Optional[MemoryType] = None,
+        session_id: Optional[int] = None,
+    ):
+        """Build the unordered live-memory filter shared by ranked retrieval and paging"""
+        query = select(Memory).where(
+            and_(
+                Memory.user_id == user_id,
+                or_(Memory.expires_at.is_(None), Memory.expires_at > datetime.utcnow()),
+            )
+        )
+
+        if memory_type:
+            query = query.where(Memory.memory_type == memory_type.value)
+
+        if session_id:
+            query = query.where(Memory.session_id == session_id)
+
+        return query
+
     def _calculate_expiration(self, memory_type: MemoryType) -> Optional[datetime]:
         """Calculate expiration time based on memory type"""
         now = datetime.utcnow()
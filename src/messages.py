@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+ARQ - AI Assistant with Memory & Context Management
+Message history access with keyset pagination and partition pruning
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Message
+from pagination import KeysetPaginator
+from partitioning import PartitionManager
+
+logger = logging.getLogger(__name__)
+
+# Chronological order; id breaks ties between messages created in the same instant
+MESSAGE_KEYSET = KeysetPaginator("message", (Message.created_at, Message.id))
+
+
+class MessageManager:
+    """Reads dialogue message history page by page"""
+
+    def __init__(self, db_session: AsyncSession, partitions: Optional[PartitionManager] = None):
+        self.db_session = db_session
+        self.partitions = partitions or PartitionManager()
+        self.logger = logger
+
+    async def get_messages_page(
+        self,
+        session_id: int,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Tuple[List[Message], Optional[str]]:
+        """Return one page of a session's messages and the cursor for the next page
+
+        ``since``/``until`` bound ``created_at`` and restrict the scan to the
+        monthly partitions overlapping that range.
+        """
+        try:
+            entity = await self._message_source(since, until)
+            keyset = MESSAGE_KEYSET if entity is Message else MESSAGE_KEYSET.for_entity(entity)
+            query = keyset.apply(
+                self._session_messages_query(session_id, since, until, entity), cursor, limit
+            )
+            result = await self.db_session.execute(query)
+            messages, next_cursor = keyset.page(result.scalars().all(), limit)
+
+            self.logger.debug(f"Retrieved page of {len(messages)} messages for session {session_id}")
+            return messages, next_cursor
+
+        except Exception as e:
+            self.logger.error(f"Error retrieving messages: {str(e)}", exc_info=True)
+            raise
+
+    async def iter_messages(
+        self,
+        session_id: int,
+        batch_size: int = 500,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> AsyncIterator[List[Message]]:
+        """Walk a session's full history in keyset batches (constant memory)"""
+        cursor = None
+        while True:
+            messages, cursor = await self.get_messages_page(
+                session_id, batch_size, cursor, since=since, until=until
+            )
+            if messages:
+                yield messages
+                # Exported rows are not needed once yielded; keep the identity map small
+                for message in messages:
+                    self.db_session.expunge(message)
+            if cursor is None:
+                break
+
+    async def _message_source(self, since: Optional[datetime], until: Optional[datetime]) -> Any:
+        """Entity covering the partitions that can hold messages in [since, until)"""
+        dialect = self.db_session.get_bind().dialect.name
+        if dialect != "sqlite":
+            # PostgreSQL prunes native partitions from the created_at predicate
+            return Message
+
+        partitions = await self.db_session.run_sync(
+            lambda session: self.partitions.partitions(session.connection(), Message.__tablename__)
+        )
+        return self.partitions.pruned_entity(Message, dialect, partitions, since, until)
+
+    @staticmethod
+    def _session_messages_query(
+        session_id: int,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        entity: Any = Message,
+    ):
+        """Build the per-session history filter (served by idx_message_session_keyset, see indexes.py)"""
+        query = select(entity).where(entity.session_id == session_id)
+        if since is not None:
+            query = query.where(entity.created_at >= since)
+        if until is not None:
+            query = query.where(entity.created_at < until)
+        return query
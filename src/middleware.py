@@ -2,17 +2,26 @@
 """
 ARQ - AI Assistant with Memory & Context Management
 Middleware for request/response logging and error handling
+
+``RequestPipelineMiddleware`` is the single pure-ASGI layer mounted by main.py;
+the per-concern ``BaseHTTPMiddleware`` classes are kept for compatibility and
+as the baseline in scripts/benchmarks/bench_middleware.py.
 """
 
 import logging
 import time
 import uuid
-from typing import Callable, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 
 from fastapi import Request, Response
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api_log_writer import APILogRecord, APILogWriter, get_api_log_writer
+from logging_pipeline import RouteSampler
 
 logger = logging.getLogger(__name__)
 
@@ -32,25 +41,128 @@ class RequestIDMiddleware(BaseHTTPMiddleware):
         return response
 
 
+def _content_length(headers) -> Optional[int]:
+    value = headers.get("content-length")
+    return int(value) if value and value.isdigit() else None
+
+
+def _record_api_log(
+    writer: Optional[APILogWriter],
+    method: str,
+    path: str,
+    status_code: int,
+    response_time_ms: float,
+    request_headers,
+    response_headers,
+    client_ip: Optional[str],
+    user_id: Optional[int],
+) -> None:
+    """Queue one api_logs record (non-blocking; see APILogWriter.submit)"""
+    if writer is None:
+        return
+    writer.submit(APILogRecord(
+        endpoint=path,
+        method=method,
+        status_code=status_code,
+        processing_time=response_time_ms,
+        created_at=datetime.utcnow(),
+        request_size=_content_length(request_headers),
+        response_size=_content_length(response_headers),
+        ip_address=client_ip,
+        user_agent=request_headers.get("user-agent"),
+        user_id=user_id,
+    ))
+
+
+def _log_request(request_id: str, method: str, path: str, query_string: bytes, client_ip: Optional[str]) -> None:
+    """Debug-level request line; the response line carries the access log"""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    logger.debug(
+        "Request: %s %s",
+        method,
+        path,
+        extra={
+            "request_id": request_id,
+            "method": method,
+            "path": path,
+            "query_params": dict(QueryParams(query_string)),
+            "client_ip": client_ip or "unknown",
+        },
+    )
+
+
+def _log_response(
+    sampler: RouteSampler,
+    request_id: str,
+    method: str,
+    path: str,
+    status_code: int,
+    response_time_ms: float,
+) -> None:
+    """Access log line, sampled per route (errors and slow requests always kept)"""
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    if not sampler.should_log(path, status_code, response_time_ms):
+        return
+    logger.info(
+        "Response: %s %s %d (%.2fms)",
+        method,
+        path,
+        status_code,
+        response_time_ms,
+        extra={
+            "request_id": request_id,
+            "method": method,
+            "path": path,
+            "status_code": status_code,
+            "response_time_ms": response_time_ms,
+        },
+    )
+
+
+def _log_slow_request(
+    request_id: str, method: str, path: str, response_time_ms: float, threshold_ms: float
+) -> None:
+    logger.warning(
+        "Slow request detected: %s %s took %.2fms",
+        method,
+        path,
+        response_time_ms,
+        extra={
+            "request_id": request_id,
+            "method": method,
+            "path": path,
+            "response_time_ms": response_time_ms,
+            "threshold_ms": threshold_ms,
+        },
+    )
+
+
 class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware to log all requests and responses"""
+    """Middleware to log all requests and responses
+
+    Each response is also handed to the API log writer (explicit or the global
+    one from ``init_api_log_writer``), which persists it to api_logs in batches.
+    """
+
+    def __init__(
+        self,
+        app,
+        log_writer: Optional[APILogWriter] = None,
+        sampler: Optional[RouteSampler] = None,
+    ):
+        super().__init__(app)
+        self.log_writer = log_writer
+        self.sampler = sampler or RouteSampler()
 
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         """Log request and response details"""
         request_id = getattr(request.state, "request_id", "unknown")
         start_time = getattr(request.state, "start_time", time.time())
 
-        # Log request
-        logger.info(
-            f"Request: {request.method} {request.url.path}",
-            extra={
-                "request_id": request_id,
-                "method": request.method,
-                "path": request.url.path,
-                "query_params": dict(request.query_params),
-                "client_ip": request.client.host if request.client else "unknown",
-            },
-        )
+        client_ip = request.client.host if request.client else None
+        _log_request(request_id, request.method, request.url.path, request.scope["query_string"], client_ip)
 
         # Process request
         response = await call_next(request)
@@ -58,14 +170,21 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         # Calculate response time
         response_time_ms = (time.time() - start_time) * 1000
 
-        # Log response
-        logger.info(
-            f"Response: {response.status_code} ({response_time_ms:.2f}ms)",
-            extra={
-                "request_id": request_id,
-                "status_code": response.status_code,
-                "response_time_ms": response_time_ms,
-            },
+        _log_response(
+            self.sampler, request_id, request.method, request.url.path,
+            response.status_code, response_time_ms,
+        )
+
+        _record_api_log(
+            self.log_writer or get_api_log_writer(),
+            request.method,
+            request.url.path,
+            response.status_code,
+            response_time_ms,
+            request.headers,
+            response.headers,
+            client_ip,
+            getattr(request.state, "user_id", None),
         )
 
         # Add timing header
@@ -74,6 +193,45 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         return response
 
 
+def _error_response(status_code: int, code: str, message: str, request_id: str) -> JSONResponse:
+    """Standard error envelope shared by the error handling middlewares"""
+    return JSONResponse(
+        status_code=status_code,
+        content={
+            "error": {
+                "code": code,
+                "message": message,
+                "request_id": request_id,
+                "timestamp": datetime.utcnow().isoformat(),
+            }
+        },
+    )
+
+
+def _handle_exception(e: Exception, request_id: str) -> JSONResponse:
+    """Log an unhandled exception and map it to its error envelope"""
+    if isinstance(e, ValueError):
+        logger.warning(
+            "Validation error: %s", e,
+            extra={"request_id": request_id, "error_type": "ValueError"},
+        )
+        return _error_response(400, "VALIDATION_ERROR", str(e), request_id)
+
+    if isinstance(e, KeyError):
+        logger.warning(
+            "Missing parameter: %s", e,
+            extra={"request_id": request_id, "error_type": "KeyError"},
+        )
+        return _error_response(400, "MISSING_PARAMETER", f"Missing required parameter: {str(e)}", request_id)
+
+    logger.error(
+        "Internal server error: %s", e,
+        exc_info=e,
+        extra={"request_id": request_id, "error_type": type(e).__name__},
+    )
+    return _error_response(500, "INTERNAL_SERVER_ERROR", "An internal error occurred", request_id)
+
+
 class ErrorHandlingMiddleware(BaseHTTPMiddleware):
     """Middleware to handle exceptions and provide standardized error responses"""
 
@@ -85,57 +243,8 @@ class ErrorHandlingMiddleware(BaseHTTPMiddleware):
             response = await call_next(request)
             return response
 
-        except ValueError as e:
-            logger.warning(
-                f"Validation error: {str(e)}",
-                extra={"request_id": request_id, "error_type": "ValueError"},
-            )
-            return JSONResponse(
-                status_code=400,
-                content={
-                    "error": {
-                        "code": "VALIDATION_ERROR",
-                        "message": str(e),
-                        "request_id": request_id,
-                        "timestamp": datetime.utcnow().isoformat(),
-                    }
-                },
-            )
-
-        except KeyError as e:
-            logger.warning(
-                f"Missing parameter: {str(e)}",
-                extra={"request_id": request_id, "error_type": "KeyError"},
-            )
-            return JSONResponse(
-                status_code=400,
-                content={
-                    "error": {
-                        "code": "MISSING_PARAMETER",
-                        "message": f"Missing required parameter: {str(e)}",
-                        "request_id": request_id,
-                        "timestamp": datetime.utcnow().isoformat(),
-                    }
-                },
-            )
-
         except Exception as e:
-            logger.error(
-                f"Internal server error: {str(e)}",
-                exc_info=True,
-                extra={"request_id": request_id, "error_type": type(e).__name__},
-            )
-            return JSONResponse(
-                status_code=500,
-                content={
-                    "error": {
-                        "code": "INTERNAL_SERVER_ERROR",
-                        "message": "An internal error occurred",
-                        "request_id": request_id,
-                        "timestamp": datetime.utcnow().isoformat(),
-                    }
-                },
-            )
+            return _handle_exception(e, request_id)
 
 
 class CORSMiddleware(BaseHTTPMiddleware):
@@ -190,15 +299,127 @@ class PerformanceMonitoringMiddleware(BaseHTTPMiddleware):
         response_time_ms = (time.time() - start_time) * 1000
 
         if response_time_ms > self.slow_request_threshold_ms:
-            logger.warning(
-                f"Slow request detected: {request.method} {request.url.path} took {response_time_ms:.2f}ms",
-                extra={
-                    "request_id": request_id,
-                    "method": request.method,
-                    "path": request.url.path,
-                    "response_time_ms": response_time_ms,
-                    "threshold_ms": self.slow_request_threshold_ms,
-                },
+            _log_slow_request(
+                request_id, request.method, request.url.path,
+                response_time_ms, self.slow_request_threshold_ms,
             )
 
         return response
+
+
+class RequestPipelineMiddleware:
+    """Request ID, logging/timing, error envelope, CORS and slow-request warnings in one pure-ASGI layer
+
+    Behaves like RequestIDMiddleware -> LoggingMiddleware -> ErrorHandlingMiddleware
+    -> CORSMiddleware -> PerformanceMonitoringMiddleware stacked outermost first,
+    but headers are added to the ``http.response.start`` message instead of going
+    through a task and memory stream per layer, so streaming responses pass
+    straight through.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        allowed_origins: list = None,
+        allow_credentials: bool = True,
+        slow_request_threshold_ms: float = 1000,
+        log_writer: Optional[APILogWriter] = None,
+        sampler: Optional[RouteSampler] = None,
+        allow_methods: Optional[List[str]] = None,
+        allow_headers: Optional[List[str]] = None,
+    ):
+        self.app = app
+        self.allowed_origins = allowed_origins or ["*"]
+        self.allow_credentials = allow_credentials
+        self.slow_request_threshold_ms = slow_request_threshold_ms
+        self.log_writer = log_writer
+        self.sampler = sampler or RouteSampler(slow_request_ms=slow_request_threshold_ms)
+
+        self._cors_headers: List[Tuple[str, str]] = [
+            ("Access-Control-Allow-Methods", ", ".join(allow_methods or ["GET", "POST", "PUT", "DELETE", "OPTIONS"])),
+            ("Access-Control-Allow-Headers", ", ".join(allow_headers or ["Content-Type", "Authorization"])),
+        ]
+        if allow_credentials:
+            self._cors_headers.append(("Access-Control-Allow-Credentials", "true"))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = str(uuid.uuid4())
+        start_time = time.time()
+        state: Dict = scope.setdefault("state", {})
+        state["request_id"] = request_id
+        state["start_time"] = start_time
+
+        method = scope["method"]
+        path = scope["path"]
+        request_headers = Headers(scope=scope)
+        client_ip = scope["client"][0] if scope.get("client") else None
+        # Only CORS preflights are answered here; other OPTIONS requests reach the app
+        preflight = (
+            method == "OPTIONS"
+            and "origin" in request_headers
+            and "access-control-request-method" in request_headers
+        )
+        # Preflight answers for any origin, like CORSMiddleware._create_cors_response
+        cors_origin = "*" if preflight else request_headers.get("origin")
+
+        _log_request(request_id, method, path, scope.get("query_string", b""), client_ip)
+
+        response_started = False
+        # Error envelopes are produced outside the performance layer
+        handled_error = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                response_time_ms = (time.time() - start_time) * 1000
+
+                # Error envelopes carry CORS headers too, or browsers hide them from callers
+                self._add_cors_headers(headers, cors_origin)
+                if (
+                    not handled_error
+                    and not preflight
+                    and response_time_ms > self.slow_request_threshold_ms
+                ):
+                    _log_slow_request(
+                        request_id, method, path, response_time_ms, self.slow_request_threshold_ms
+                    )
+
+                _log_response(self.sampler, request_id, method, path, status_code, response_time_ms)
+                _record_api_log(
+                    self.log_writer or get_api_log_writer(),
+                    method,
+                    path,
+                    status_code,
+                    response_time_ms,
+                    request_headers,
+                    headers,
+                    client_ip,
+                    state.get("user_id"),
+                )
+                headers["X-Response-Time"] = str(response_time_ms)
+                headers["X-Request-ID"] = request_id
+            await send(message)
+
+        try:
+            if preflight:
+                await Response()(scope, receive, send_wrapper)
+            else:
+                await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            if response_started:
+                raise
+            handled_error = True
+            await _handle_exception(e, request_id)(scope, receive, send_wrapper)
+
+    def _add_cors_headers(self, headers: MutableHeaders, origin: Optional[str]) -> None:
+        if "*" in self.allowed_origins or origin in self.allowed_origins:
+            headers["Access-Control-Allow-Origin"] = origin or "*"
+        for name, value in self._cors_headers:
+            headers[name] = value
@@ -61,6 +61,7 @@ class Session(Base):
 
     # Relationships
     user = relationship("User", back_populates="sessions")
+    # On SQLite only the current month: older rows rotate into archive tables (see partitioning.py)
     messages = relationship("Message", back_populates="session", cascade="all, delete-orphan")
     memory_contexts = relationship("Memory", back_populates="session", cascade="all, delete-orphan")
     context_snapshots = relationship("ContextSnapshot", back_populates="session", cascade="all, delete-orphan")
@@ -94,6 +95,8 @@ class Message(Base):
     __table_args__ = (
         Index("idx_message_session_role", "session_id", "role"),
         Index("idx_message_created", "created_at"),
+        # Ids must stay unique across rotated SQLite archive tables (see partitioning.py)
+        {"sqlite_autoincrement": True},
     )
 
 
@@ -189,6 +192,7 @@ class APILog(Base):
     __table_args__ = (
         Index("idx_apilog_endpoint_created", "endpoint", "created_at"),
         Index("idx_apilog_status", "status_code"),
+        {"sqlite_autoincrement": True},
     )
 
 
@@ -225,4 +229,5 @@ class SystemEvent(Base):
     __table_args__ = (
         Index("idx_sysevent_type_severity", "event_type", "severity"),
         Index("idx_sysevent_created", "created_at"),
+        {"sqlite_autoincrement": True},
     )
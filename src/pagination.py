@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+ARQ - AI Assistant with Memory & Context Management
+Keyset (cursor) pagination over indexed sort keys
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.sql import Select
+
+from utils import CursorHelper
+
+logger = logging.getLogger(__name__)
+
+
+class KeysetPaginator:
+    """Pages a query by seeking past the sort key of the last returned row.
+
+    Unlike OFFSET paging, each page costs one index seek plus ``limit`` rows
+    regardless of depth, so walking an n-row history is O(n) rather than O(n^2).
+    The final sort column must be unique (normally the primary key).
+    """
+
+    def __init__(self, kind: str, columns: Sequence[Any], descending: bool = False):
+        if not columns:
+            raise ValueError("Keyset pagination needs at least one sort column")
+        self.kind = kind
+        self.columns = tuple(columns)
+        self.descending = descending
+
+    def for_entity(self, entity: Any) -> "KeysetPaginator":
+        """Same key over an aliased entity (e.g. a UNION of partition tables); cursors stay compatible"""
+        return KeysetPaginator(
+            self.kind, [getattr(entity, column.key) for column in self.columns], self.descending
+        )
+
+    def order_by(self) -> List[Any]:
+        return [column.desc() if self.descending else column.asc() for column in self.columns]
+
+    def apply(self, query: Select, cursor: Optional[str], limit: int) -> Select:
+        """Add the seek predicate, ordering and a one-row lookahead to ``query``"""
+        if cursor:
+            values = self.decode(cursor)
+            key = tuple_(*self.columns)
+            bound = tuple_(*values)
+            query = query.where(key < bound if self.descending else key > bound)
+        return query.order_by(*self.order_by()).limit(limit + 1)
+
+    def page(self, rows: Sequence[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+        """Split lookahead results into (items, next_cursor)"""
+        items = list(rows[:limit])
+        next_cursor = self.cursor_for(items[-1]) if len(rows) > limit and items else None
+        return items, next_cursor
+
+    def cursor_for(self, row: Any) -> str:
+        values = []
+        for column in self.columns:
+            value = getattr(row, column.key)
+            values.append(value.isoformat() if isinstance(value, datetime) else value)
+        return CursorHelper.encode_cursor(self.kind, values)
+
+    def decode(self, cursor: str) -> List[Any]:
+        values = CursorHelper.decode_cursor(cursor, self.kind)
+        if len(values) != len(self.columns):
+            raise ValueError("Invalid pagination cursor")
+
+        decoded = []
+        for column, value in zip(self.columns, values):
+            try:
+                decoded.append(_coerce_key(column, value))
+            except (TypeError, ValueError) as e:
+                raise ValueError("Invalid pagination cursor") from e
+        return decoded
+
+
+def _coerce_key(column: Any, value: Any) -> Any:
+    """Convert a JSON cursor value back to ``column``'s Python type, rejecting mismatches"""
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        if not isinstance(value, str):
+            raise TypeError(f"{column.key}: expected an ISO timestamp")
+        return datetime.fromisoformat(value)
+    # bool is an int in Python but never a valid numeric key
+    if isinstance(value, bool) and python_type is not bool:
+        raise TypeError(f"{column.key}: unexpected boolean")
+    if python_type is float and isinstance(value, int):
+        return float(value)
+    if not isinstance(value, python_type):
+        raise TypeError(f"{column.key}: expected {python_type.__name__}")
+    return value
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+ARQ - AI Assistant with Memory & Context Management
+Monthly time partitioning and retention for append-only tables
+"""
+
+import logging
+import re
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Column, Index, MetaData, Table, distinct, func, select, text, union_all
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import aliased
+from sqlalchemy.schema import AddConstraint
+
+from models import Base
+from indexes import IndexAdvisor
+
+logger = logging.getLogger(__name__)
+
+_PARTITION_SUFFIX = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def month_floor(value: datetime) -> datetime:
+    """First instant of the month containing ``value``"""
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    """Physical name of the partition (PostgreSQL) or archive table (SQLite) for ``month``"""
+    return f"{table}_p{month:%Y%m}"
+
+
+def history_view_name(table: str) -> str:
+    """SQLite view spanning the live table and every archive month of ``table``"""
+    return f"{table}_history"
+
+
+def parse_partition_month(table: str, name: str) -> Optional[datetime]:
+    if not name.startswith(f"{table}_p"):
+        return None
+    match = _PARTITION_SUFFIX.search(name)
+    if not match or name[:match.start()] != table:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1)
+
+
+@dataclass(frozen=True)
+class PartitionPolicy:
+    """Partitioning and retention settings for one append-only table"""
+    table: str
+    retention_months: Optional[int] = None  # None keeps history forever
+    premake_months: int = 2  # upcoming monthly partitions created ahead of time
+    column: str = "created_at"
+
+    def retention_cutoff(self, now: datetime) -> Optional[datetime]:
+        """Partitions for months before the cutoff are dropped (current month plus N full months are kept)"""
+        if self.retention_months is None:
+            return None
+        return add_months(month_floor(now), -self.retention_months)
+
+
+DEFAULT_PARTITION_POLICIES: Tuple[PartitionPolicy, ...] = (
+    PartitionPolicy("messages"),
+    PartitionPolicy("api_logs", retention_months=3),
+    PartitionPolicy("system_events", retention_months=6),
+)
+
+
+def policies_from_settings(settings: Any) -> Tuple[PartitionPolicy, ...]:
+    """Build policies from ``*_RETENTION_MONTHS`` settings (0 keeps history forever)"""
+    retention = {
+        "messages": settings.MESSAGE_RETENTION_MONTHS,
+        "api_logs": settings.API_LOG_RETENTION_MONTHS,
+        "system_events": settings.SYSTEM_EVENT_RETENTION_MONTHS,
+    }
+    return tuple(
+        replace(
+            policy,
+            retention_months=retention[policy.table] or None,
+            premake_months=settings.PARTITION_PREMAKE_MONTHS,
+        )
+        for policy in DEFAULT_PARTITION_POLICIES
+    )
+
+
+class PartitionManager:
+    """Creates, rotates and expires monthly partitions.
+
+    PostgreSQL uses native ``PARTITION BY RANGE (created_at)`` tables: upcoming
+    months are created ahead of time and retention drops whole partitions.
+    SQLite has no partitioning, so the ORM table holds the current month and
+    closed months are rotated into ``<table>_pYYYYMM`` archive tables, which
+    retention drops as a unit. All methods are sync (use via ``run_sync``).
+
+    On SQLite, anything reading the ORM table directly sees only the current
+    month: relationships such as ``Session.messages`` and their cascades, and
+    ad-hoc SQL. Full history is available from ``MessageManager`` (which uses
+    ``pruned_entity``) or from the ``<table>_history`` views that ``maintain``
+    keeps in sync with the archives.
+    """
+
+    def __init__(
+        self,
+        policies: Iterable[PartitionPolicy] = DEFAULT_PARTITION_POLICIES,
+        metadata: MetaData = Base.metadata,
+    ):
+        self.policies = {policy.table: policy for policy in policies}
+        self.metadata = metadata
+
+    def partitions(self, connection: Connection, table: str) -> List[datetime]:
+        """Months that currently have their own partition/archive table, oldest first"""
+        if connection.dialect.name == "postgresql":
+            names = connection.execute(text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = :table"
+            ), {"table": table}).scalars()
+        else:
+            names = connection.execute(text(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE :pattern"
+            ), {"pattern": f"{table}_p%"}).scalars()
+
+        months = (parse_partition_month(table, name) for name in names)
+        return sorted(month for month in months if month is not None)
+
+    def is_partitioned(self, connection: Connection, table: str) -> bool:
+        if connection.dialect.name != "postgresql":
+            return False
+        return connection.execute(text(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :table"
+        ), {"table": table}).first() is not None
+
+    def ensure_partitions(self, connection: Connection, now: Optional[datetime] = None) -> List[str]:
+        """Create the current and upcoming monthly partitions (PostgreSQL only)"""
+        if connection.dialect.name != "postgresql":
+            # Rows always land in the ORM table on SQLite; archives appear on rotation
+            return []
+
+        now = now or datetime.utcnow()
+        created: List[str] = []
+        for policy in self.policies.values():
+            if not self.is_partitioned(connection, policy.table):
+                continue
+            existing = set(self.partitions(connection, policy.table))
+            current = month_floor(now)
+            for offset in range(policy.premake_months + 1):
+                month = add_months(current, offset)
+                if month not in existing:
+                    created.append(self._create_pg_partition(connection, policy.table, month))
+        return created
+
+    def rotate(self, connection: Connection, now: Optional[datetime] = None) -> List[str]:
+        """Move rows of closed months from the SQLite ORM table into archive tables"""
+        if connection.dialect.name != "sqlite":
+            return []
+
+        current = month_floor(now or datetime.utcnow())
+        rotated: List[str] = []
+        for policy in self.policies.values():
+            live = self.metadata.tables[policy.table]
+            column = live.c[policy.column]
+            months = connection.execute(
+                select(distinct(func.strftime("%Y%m", column))).where(column < current)
+            ).scalars()
+
+            for label in sorted(label for label in months if label):
+                month = datetime(int(label[:4]), int(label[4:]), 1)
+                bounds = (column >= month) & (column < add_months(month, 1))
+                archive = self.archive_table(policy.table, month)
+                archive.create(connection, checkfirst=True)
+                connection.execute(archive.insert().from_select(
+                    [c.name for c in live.columns], select(live).where(bounds)
+                ))
+                connection.execute(live.delete().where(bounds))
+                rotated.append(archive.name)
+                logger.info(f"Rotated {policy.table} rows for {month:%Y-%m} into {archive.name}")
+        return rotated
+
+    def apply_retention(self, connection: Connection, now: Optional[datetime] = None) -> List[str]:
+        """Drop every partition/archive table older than its policy's retention window"""
+        now = now or datetime.utcnow()
+        preparer = connection.dialect.identifier_preparer
+        dropped: List[str] = []
+        for policy in self.policies.values():
+            cutoff = policy.retention_cutoff(now)
+            if cutoff is None:
+                continue
+            for month in self.partitions(connection, policy.table):
+                if month >= cutoff:
+                    break
+                name = partition_name(policy.table, month)
+                connection.execute(text(f"DROP TABLE {preparer.quote(name)}"))
+                dropped.append(name)
+                logger.info(f"Dropped expired partition {name} (retention {policy.retention_months} months)")
+        return dropped
+
+    def refresh_history_views(self, connection: Connection) -> List[str]:
+        """(Re)create each ``<table>_history`` view over the live table and its archives (SQLite only)
+
+        PostgreSQL needs no view: the partitioned parent table already spans
+        every partition.
+        """
+        if connection.dialect.name != "sqlite":
+            return []
+
+        preparer = connection.dialect.identifier_preparer
+        refreshed: List[str] = []
+        for policy in self.policies.values():
+            live = self.metadata.tables[policy.table]
+            columns = ", ".join(preparer.quote(column.name) for column in live.columns)
+            sources = [policy.table] + [
+                partition_name(policy.table, month) for month in self.partitions(connection, policy.table)
+            ]
+            view = history_view_name(policy.table)
+            connection.execute(text(f"DROP VIEW IF EXISTS {preparer.quote(view)}"))
+            connection.execute(text(f"CREATE VIEW {preparer.quote(view)} AS " + " UNION ALL ".join(
+                f"SELECT {columns} FROM {preparer.quote(source)}" for source in sources
+            )))
+            refreshed.append(view)
+        return refreshed
+
+    def maintain(self, connection: Connection, now: Optional[datetime] = None) -> Dict[str, List[str]]:
+        """Periodic maintenance: premake upcoming partitions, rotate, expire, then refresh history views"""
+        now = now or datetime.utcnow()
+        return {
+            "created": self.ensure_partitions(connection, now),
+            "rotated": self.rotate(connection, now),
+            "dropped": self.apply_retention(connection, now),
+            "views": self.refresh_history_views(connection),
+        }
+
+    def archive_table(self, table: str, month: datetime) -> Table:
+        """Detached copy of ``table`` for one SQLite archive month (no FKs, renamed indexes)"""
+        live = self.metadata.tables[table]
+        name = partition_name(table, month)
+        suffix = f"{month:%Y%m}"
+        archive = Table(
+            name,
+            MetaData(),
+            *[
+                Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable)
+                for column in live.columns
+            ],
+        )
+        # SQLite index names are database-wide, so every copied index gets the month suffix
+        for index in live.indexes:
+            Index(f"{index.name}_p{suffix}", *[archive.c[column.name] for column in index.columns])
+        for spec in IndexAdvisor().recommend():
+            if spec.table == table:
+                replace(spec, name=f"{spec.name}_p{suffix}").to_index(archive)
+        return archive
+
+    def pruned_entity(
+        self,
+        entity: Any,
+        dialect_name: str,
+        partitions: Sequence[datetime],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Any:
+        """ORM entity to select from for rows with ``start <= created_at < end``.
+
+        PostgreSQL prunes partitions itself from the ``created_at`` predicate, so
+        the mapped class is returned unchanged. On SQLite the ORM table is
+        combined (UNION ALL) with only the archive tables overlapping the range.
+        """
+        if dialect_name != "sqlite":
+            return entity
+
+        months = [
+            month for month in partitions
+            if (start is None or add_months(month, 1) > start) and (end is None or month < end)
+        ]
+        if not months:
+            return entity
+
+        live = entity.__table__
+        parts = [select(live)] + [select(self.archive_table(live.name, month)) for month in months]
+        return aliased(entity, union_all(*parts).subquery(live.name), adapt_on_names=True)
+
+    def convert_to_partitioned(
+        self, connection: Connection, table: str, now: Optional[datetime] = None
+    ) -> bool:
+        """Rebuild a plain PostgreSQL table as a monthly range-partitioned one.
+
+        The primary key becomes (id, created_at) as PostgreSQL requires the
+        partition key in every unique constraint; foreign keys pointing at the
+        table (e.g. message_embeddings.message_id) are dropped for the same reason.
+        """
+        if connection.dialect.name != "postgresql" or self.is_partitioned(connection, table):
+            return False
+
+        policy = self.policies[table]
+        preparer = connection.dialect.identifier_preparer
+        model = self.metadata.tables[table]
+        quoted = preparer.quote(table)
+        legacy = preparer.quote(f"{table}_unpartitioned")
+        column = preparer.quote(policy.column)
+        now = now or datetime.utcnow()
+
+        connection.execute(text(f"UPDATE {quoted} SET {column} = now() WHERE {column} IS NULL"))
+        connection.execute(text(f"ALTER TABLE {quoted} RENAME TO {legacy}"))
+        connection.execute(text(
+            f"CREATE TABLE {quoted} (LIKE {legacy} INCLUDING DEFAULTS) PARTITION BY RANGE ({column})"
+        ))
+        connection.execute(text(f"ALTER TABLE {quoted} ADD PRIMARY KEY (id, {column})"))
+        connection.execute(text(f"CREATE TABLE {preparer.quote(table + '_default')} PARTITION OF {quoted} DEFAULT"))
+
+        oldest = connection.execute(text(f"SELECT min({column}) FROM {legacy}")).scalar()
+        month = month_floor(oldest or now)
+        last = add_months(month_floor(now), policy.premake_months)
+        while month <= last:
+            self._create_pg_partition(connection, table, month)
+            month = add_months(month, 1)
+
+        connection.execute(text(f"INSERT INTO {quoted} SELECT * FROM {legacy}"))
+        # The id sequence is owned by the old table; keep it alive for the new one
+        sequence = connection.execute(
+            text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": f"{table}_unpartitioned"}
+        ).scalar()
+        if sequence:
+            connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {quoted}.id"))
+        connection.execute(text(f"DROP TABLE {legacy} CASCADE"))
+
+        # Indexes and outgoing foreign keys are defined on the parent and cascade to partitions
+        for index in model.to_metadata(MetaData()).indexes:
+            index.create(connection)
+        for constraint in model.foreign_key_constraints:
+            connection.execute(AddConstraint(constraint))
+
+        logger.info(f"Converted {table} to monthly range partitions")
+        return True
+
+    @staticmethod
+    def _create_pg_partition(connection: Connection, table: str, month: datetime) -> str:
+        preparer = connection.dialect.identifier_preparer
+        name = partition_name(table, month)
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {preparer.quote(name)} PARTITION OF {preparer.quote(table)} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        ))
+        logger.info(f"Created partition {name}")
+        return name
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+ARQ - AI Assistant with Memory & Context Management
+Read-replica selection and read-your-writes tracking
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+
+class Replica:
+    """A read replica engine and its last observed health"""
+
+    def __init__(self, name: str, engine: AsyncEngine):
+        self.name = name
+        self.engine = engine
+        self.healthy = True
+        self.lag_seconds: Optional[float] = None
+        self.consecutive_failures = 0
+        self.last_checked: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+        }
+
+
+class ReplicaRouter:
+    """Round-robin selection across healthy replicas with periodic health probes"""
+
+    def __init__(self, replicas: List[Replica], max_lag_seconds: float = 30.0):
+        self.replicas = replicas
+        self.max_lag_seconds = max_lag_seconds
+        self._cycle = itertools.count()
+
+    def choose(self) -> Optional[Replica]:
+        """Pick the next healthy replica, or None when all are down"""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._cycle) % len(healthy)]
+
+    def mark_failed(self, replica: Replica, error: Exception) -> None:
+        """Take a replica out of rotation until the next successful probe"""
+        replica.healthy = False
+        replica.consecutive_failures += 1
+        replica.last_error = str(error)
+        logger.warning(f"Replica {replica.name} marked unhealthy: {error}")
+
+    async def check_replica(self, replica: Replica, timeout: float = 5.0) -> bool:
+        """Probe one replica: connectivity plus replay lag on PostgreSQL"""
+        try:
+            lag = await asyncio.wait_for(self._probe(replica), timeout)
+            replica.lag_seconds = float(lag) if lag is not None else None
+            replica.last_checked = time.monotonic()
+            if replica.lag_seconds is not None and replica.lag_seconds > self.max_lag_seconds:
+                self.mark_failed(replica, RuntimeError(f"replication lag {replica.lag_seconds:.1f}s"))
+                return False
+
+            if not replica.healthy:
+                logger.info(f"Replica {replica.name} back in rotation")
+            replica.healthy = True
+            replica.consecutive_failures = 0
+            replica.last_error = None
+            return True
+
+        except Exception as e:
+            replica.last_checked = time.monotonic()
+            self.mark_failed(replica, e)
+            return False
+
+    @staticmethod
+    async def _probe(replica: Replica) -> Optional[float]:
+        async with replica.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            if replica.engine.dialect.name != "postgresql":
+                return None
+            return (await conn.execute(text(
+                "SELECT CASE WHEN pg_is_in_recovery() "
+                "THEN EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) "
+                "ELSE 0 END"
+            ))).scalar()
+
+    async def check_all(self) -> Dict[str, bool]:
+        results = await asyncio.gather(*(self.check_replica(replica) for replica in self.replicas))
+        return {replica.name: ok for replica, ok in zip(self.replicas, results)}
+
+    async def run_health_checks(self, interval: float) -> None:
+        """Probe all replicas every ``interval`` seconds until cancelled"""
+        while True:
+            await self.check_all()
+            await asyncio.sleep(interval)
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [replica.status() for replica in self.replicas]
+
+
+class WriteTracker:
+    """Remembers recent writes per consistency key (user, session, ...)
+
+    Reads for a key written within ``window_seconds`` are routed to the
+    primary so a client always sees its own writes despite replica lag.
+    """
+
+    def __init__(self, window_seconds: float = 5.0, max_keys: int = 100_000):
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._last_write: Dict[str, float] = {}
+
+    def mark(self, key: Optional[str]) -> None:
+        if key is None or self.window_seconds <= 0:
+            return
+        self._last_write[key] = time.monotonic()
+        if len(self._last_write) > self.max_keys:
+            self.prune()
+
+    def is_recent(self, key: Optional[str]) -> bool:
+        if key is None:
+            return False
+        written = self._last_write.get(key)
+        if written is None:
+            return False
+        if time.monotonic() - written > self.window_seconds:
+            del self._last_write[key]
+            return False
+        return True
+
+    def prune(self) -> None:
+        cutoff = time.monotonic() - self.window_seconds
+        self._last_write = {key: ts for key, ts in self._last_write.items() if ts > cutoff}
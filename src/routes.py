@@ -12,15 +12,27 @@ including endpoints for:
 - System monitoring and logging
 """
 
+import json
 import logging
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator
 
 from fastapi import APIRouter, HTTPException, Depends, Query, Body
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api_log_writer import get_api_log_writer
+from database import get_db_manager, get_db_read_session
+from http_clients import get_http_clients
+from memory import MemoryManager, MemoryType
+from messages import MessageManager
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched per keyset batch by the streaming export endpoints
+EXPORT_BATCH_SIZE = 500
+
 # Request/Response Models
 class HealthCheckResponse(BaseModel):
     """Health check response model."""
@@ -66,6 +78,13 @@ class MessageResponse(BaseModel):
     created_at: datetime
 
 
+class MessagePageResponse(BaseModel):
+    """Keyset-paginated message page."""
+    items: List[MessageResponse]
+    next_cursor: Optional[str] = Field(None, description="Opaque cursor for the next page")
+    has_more: bool
+
+
 class MemoryStoreRequest(BaseModel):
     """Memory store request model."""
     session_id: str
@@ -160,6 +179,52 @@ async def system_status() -> Dict[str, Any]:
     }
 
 
+@router.get(
+    "/status/database",
+    summary="Database pool status",
+    description="Returns connection pool occupancy and checkout wait metrics"
+)
+async def database_status() -> Dict[str, Any]:
+    """Get database connection pool metrics.
+    
+    Returns:
+        Dictionary with pool size, checked-out/overflow counts and wait times
+    """
+    db_manager = await get_db_manager()
+    return db_manager.pool_status()
+
+
+@router.get(
+    "/status/api-log",
+    summary="API log writer status",
+    description="Returns buffered, written and dropped request log counters"
+)
+async def api_log_status() -> Dict[str, Any]:
+    """Get batched API log writer counters.
+    
+    Returns:
+        Dictionary with pending/written/dropped/failed counts, or enabled=False
+    """
+    writer = get_api_log_writer()
+    if writer is None:
+        return {"enabled": False}
+    return {"enabled": True, **writer.stats()}
+
+
+@router.get(
+    "/status/http-clients",
+    summary="Outbound HTTP client status",
+    description="Returns per-host request counts, connection reuse and pool occupancy"
+)
+async def http_client_status() -> Dict[str, Any]:
+    """Get shared outbound HTTP client metrics.
+    
+    Returns:
+        Dictionary with per-host counters and open/idle connections per client
+    """
+    return get_http_clients().stats()
+
+
 # User Management Endpoints
 @router.post(
     "/users",
@@ -240,33 +305,75 @@ async def create_message(message_data: CreateMessageRequest) -> MessageResponse:
 
 @router.get(
     "/messages",
-    response_model=List[MessageResponse],
+    response_model=MessagePageResponse,
     summary="Get messages"
 )
 async def get_messages(
-    session_id: str = Query(description="Session ID"),
-    limit: int = Query(50, ge=1, le=100)
-) -> List[MessageResponse]:
-    """Get messages from session.
+    session_id: int = Query(description="Session ID"),
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page"),
+    db: AsyncSession = Depends(get_db_read_session),
+) -> MessagePageResponse:
+    """Get messages from session, oldest first.
     
     Args:
         session_id: Session ID to retrieve messages from
         limit: Maximum number of messages to return
+        cursor: Opaque cursor returned as next_cursor by the previous page
         
     Returns:
-        List of MessageResponse objects
+        MessagePageResponse with the page items and the next cursor
     """
     logger.info(f"Retrieving {limit} messages from session: {session_id}")
-    return [
-        MessageResponse(
-            id=f"msg_{i}",
-            session_id=session_id,
-            content=f"Message {i}",
-            message_type="user",
-            created_at=datetime.utcnow()
-        )
-        for i in range(limit)
-    ]
+    try:
+        messages, next_cursor = await MessageManager(db).get_messages_page(session_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return MessagePageResponse(
+        items=[_message_response(message) for message in messages],
+        next_cursor=next_cursor,
+        has_more=next_cursor is not None,
+    )
+
+
+@router.get(
+    "/messages/export",
+    summary="Export session history",
+    description="Streams the full session history as NDJSON using keyset batches"
+)
+async def export_messages(
+    session_id: int = Query(description="Session ID"),
+) -> StreamingResponse:
+    """Stream every message of a session in chronological order.
+    
+    Args:
+        session_id: Session ID to export
+        
+    Returns:
+        StreamingResponse emitting one JSON message per line
+    """
+    logger.info(f"Exporting messages from session: {session_id}")
+    db_manager = await get_db_manager()
+
+    async def ndjson() -> AsyncIterator[str]:
+        # The session must outlive the handler, so it is owned by the stream itself
+        async with db_manager.read_session() as db:
+            async for batch in MessageManager(db).iter_messages(session_id, EXPORT_BATCH_SIZE):
+                yield "".join(
+                    _message_response(message).model_dump_json() + "\n" for message in batch
+                )
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+def _message_response(message) -> MessageResponse:
+    return MessageResponse(
+        id=str(message.id),
+        session_id=str(message.session_id),
+        content=message.content,
+        message_type=message.role,
+        created_at=message.created_at,
+    )
 
 
 # Memory Management Endpoints
@@ -318,6 +425,49 @@ async def retrieve_memory(
     ]
 
 
+@router.get(
+    "/memory/export",
+    summary="Export memories",
+    description="Streams a user's live memories as NDJSON using keyset batches"
+)
+async def export_memories(
+    user_id: int = Query(description="User ID"),
+    memory_type: Optional[str] = Query(None, pattern="^(short_term|long_term|episodic)$"),
+) -> StreamingResponse:
+    """Stream every live memory of a user in ranking order.
+    
+    Args:
+        user_id: Owner of the memories
+        memory_type: Optional memory type filter
+        
+    Returns:
+        StreamingResponse emitting one JSON memory per line
+    """
+    logger.info(f"Exporting {memory_type or 'all'} memories for user: {user_id}")
+    type_filter = MemoryType(memory_type) if memory_type else None
+    db_manager = await get_db_manager()
+
+    async def ndjson() -> AsyncIterator[str]:
+        async with db_manager.read_session() as db:
+            manager = MemoryManager(db, read_session=db)
+            async for batch in manager.iter_memories(user_id, type_filter, batch_size=EXPORT_BATCH_SIZE):
+                yield "".join(
+                    json.dumps({
+                        "memory_id": str(memory.id),
+                        "session_id": str(memory.session_id) if memory.session_id else None,
+                        "memory_type": memory.memory_type,
+                        "key": memory.key,
+                        "value": memory.value,
+                        "importance": memory.importance,
+                        "updated_at": memory.updated_at.isoformat() if memory.updated_at else None,
+                        "expires_at": memory.expires_at.isoformat() if memory.expires_at else None,
+                    }) + "\n"
+                    for memory in batch
+                )
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
 # Session Management Endpoints
 @router.post(
     "/sessions",
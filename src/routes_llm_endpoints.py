@@ -79,7 +79,7 @@ async def llm_generate(request: LLMGenerateRequest):
             raise HTTPException(status_code=503, detail="LLM service not initialized")
         
         # Generate response using LLM
-        response = llm_integration.generate_response(
+        response = await llm_integration.generate_response(
             prompt=request.prompt,
             model=request.model,
             streaming=False,
@@ -122,7 +122,7 @@ async def llm_stream(request: LLMGenerateRequest):
         async def stream_generator():
             try:
                 # Generate streaming response
-                for chunk in llm_integration.stream_response(
+                async for chunk in llm_integration.stream_response(
                     prompt=request.prompt,
                     model=request.model,
                     context=request.context or []
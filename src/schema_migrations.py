@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+ARQ - AI Assistant with Memory & Context Management
+Versioned schema migrations applied on top of ``Base.metadata.create_all``
+"""
+
+import logging
+from datetime import datetime
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, select
+from sqlalchemy.engine import Connection
+
+from models import Base
+from indexes import IndexAdvisor
+from partitioning import PartitionManager
+
+logger = logging.getLogger(__name__)
+
+# Bookkeeping table lives outside the ORM metadata so drop_tables() never touches it
+_migration_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _migration_metadata,
+    Column("version", String(32), primary_key=True),
+    Column("name", String(255), nullable=False),
+    Column("applied_at", DateTime, default=datetime.utcnow, nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    """A single forward-only schema migration"""
+    version: str
+    name: str
+    upgrade: Callable[[Connection], None]
+
+
+def _create_advisor_indexes(connection: Connection) -> None:
+    """Create the composite/partial indexes derived from MemoryManager/SessionManager query shapes"""
+    IndexAdvisor().apply(connection, Base.metadata)
+
+
+def _partition_append_only_tables(connection: Connection) -> None:
+    """Rebuild messages/api_logs/system_events as monthly partitions (PostgreSQL; SQLite rotates instead)"""
+    manager = PartitionManager()
+    converted = [
+        table for table in manager.policies
+        if manager.convert_to_partitioned(connection, table)
+    ]
+    if converted:
+        # Advisor indexes went away with the old tables
+        _create_advisor_indexes(connection)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration("0001", "query_shape_indexes", _create_advisor_indexes),
+    # Keyset pagination adds id tie-breakers and the message history index
+    Migration("0002", "keyset_pagination_indexes", _create_advisor_indexes),
+    Migration("0003", "partition_append_only_tables", _partition_append_only_tables),
+]
+
+
+def applied_versions(connection: Connection) -> List[str]:
+    """Return versions already recorded in the schema_migrations table"""
+    _migration_metadata.create_all(connection, checkfirst=True)
+    result = connection.execute(select(schema_migrations.c.version))
+    return [row[0] for row in result]
+
+
+def run_migrations(connection: Connection) -> List[str]:
+    """Apply pending migrations in version order (sync; use via ``AsyncConnection.run_sync``)"""
+    done = set(applied_versions(connection))
+    applied: List[str] = []
+
+    for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+        if migration.version in done:
+            continue
+        logger.info(f"Applying schema migration {migration.version}_{migration.name}")
+        migration.upgrade(connection)
+        connection.execute(
+            schema_migrations.insert().values(
+                version=migration.version,
+                name=migration.name,
+                applied_at=datetime.utcnow(),
+            )
+        )
+        applied.append(migration.version)
+
+    return applied
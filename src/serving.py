@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+ARQ - AI Assistant with Memory & Context Management
+Production serving: uvicorn (uvloop + httptools) workers under gunicorn or uvicorn's supervisor
+
+    python src/serving.py --server gunicorn      # config/gunicorn_config.py, preloaded app
+    python src/serving.py --server uvicorn       # uvicorn's own multi-process supervisor
+"""
+
+import argparse
+import importlib.util
+import multiprocessing
+import os
+import sys
+from typing import Any, Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GUNICORN_CONFIG = os.path.join(ROOT, "config", "gunicorn_config.py")
+
+
+def event_loop_options() -> Dict[str, str]:
+    """uvloop/httptools when installed, otherwise the pure-Python asyncio/h11 stack"""
+    return {
+        "loop": "uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        "http": "httptools" if importlib.util.find_spec("httptools") else "h11",
+    }
+
+
+def default_workers(cpu_count: int = 0) -> int:
+    """Worker processes for IO-bound LLM proxying.
+
+    Each async worker multiplexes thousands of slow upstream calls on one
+    event loop, so extra processes buy CPU parallelism, not concurrency.
+    One per core (not the sync-worker ``2n+1``) keeps context switches and
+    per-worker database pools down. WEB_CONCURRENCY overrides, and the same
+    variable sizes each worker's database pool.
+    """
+    configured = os.getenv("WEB_CONCURRENCY")
+    if configured:
+        return max(1, int(configured))
+    return max(1, cpu_count or multiprocessing.cpu_count())
+
+
+try:
+    # The uvicorn-worker package replaces the deprecated uvicorn.workers module
+    from uvicorn_worker import UvicornWorker
+except ImportError:
+    try:
+        from uvicorn.workers import UvicornWorker
+    except ImportError:  # uvicorn is only needed when actually serving
+        UvicornWorker = None
+
+# The gunicorn worker running in this process, set once it has forked
+_current_worker = None
+
+if UvicornWorker is not None:
+    class ArqUvicornWorker(UvicornWorker):
+        """gunicorn worker class running the app on uvloop + httptools"""
+
+        CONFIG_KWARGS: Dict[str, Any] = {**UvicornWorker.CONFIG_KWARGS, **event_loop_options()}
+
+        def init_process(self) -> None:
+            global _current_worker
+            _current_worker = self
+            super().init_process()
+else:
+    ArqUvicornWorker = None
+
+
+def exempt_from_recycling() -> bool:
+    """Keep this server process running past gunicorn's max_requests.
+
+    Called by the process that owns the embedded job workers: recycling it
+    would stop them every MAX_REQUESTS requests and cut in-flight jobs short.
+    Must run before the server starts serving (i.e. during lifespan startup).
+    Returns False outside an ArqUvicornWorker.
+    """
+    worker = _current_worker
+    if worker is None:
+        return False
+    worker.max_requests = sys.maxsize
+    worker.config.limit_max_requests = None
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the ARQ API with production settings")
+    parser.add_argument("--server", choices=["gunicorn", "uvicorn"], default="gunicorn")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--app", default="main:app")
+    args = parser.parse_args()
+
+    # Workers inherit this, so database pools are sized for the real process count
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    src = os.path.dirname(os.path.abspath(__file__))
+
+    if args.server == "gunicorn":
+        os.execvp("gunicorn", [
+            "gunicorn", "--config", GUNICORN_CONFIG, "--chdir", src,
+            "--bind", f"{args.host}:{args.port}", "--workers", str(args.workers), args.app,
+        ])
+
+    import uvicorn
+
+    sys.path.insert(0, src)
+    # uvicorn's supervisor offers no per-process exemption, so recycling is off
+    # whenever one of its processes may own the embedded job workers
+    max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+    if int(os.getenv("ARQ_EMBEDDED_WORKERS", "0")) > 0:
+        max_requests = 0
+    uvicorn.run(
+        args.app,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        limit_max_requests=max_requests or None,
+        timeout_graceful_shutdown=int(os.getenv("GRACEFUL_TIMEOUT", "30")),
+        proxy_headers=True,
+        **event_loop_options(),
+    )
+
+
+if __name__ == "__main__":
+    main()
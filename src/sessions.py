@@ -6,13 +6,15 @@ Session management module for handling user sessions and context
 
 import logging
 import secrets
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator
 from sqlalchemy import select, and_, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models import Session as SessionModel, User
 from config import settings
+from database import replica_read_session
 
 logger = logging.getLogger(__name__)
 
@@ -20,10 +22,26 @@ logger = logging.getLogger(__name__)
 class SessionManager:
     """Manages user sessions and context windows"""
 
-    def __init__(self, db_session: AsyncSession):
+    def __init__(
+        self,
+        db_session: AsyncSession,
+        read_session: Optional[AsyncSession] = None,
+        consistency_key: Optional[str] = None,
+    ):
         self.db_session = db_session
+        # Listings and stats use read_session, by default a replica session per call
+        self.read_session = read_session
+        self.consistency_key = consistency_key
         self.logger = logger
 
+    @asynccontextmanager
+    async def _reading(self) -> AsyncIterator[AsyncSession]:
+        if self.read_session is not None:
+            yield self.read_session
+        else:
+            async with replica_read_session(self.db_session, self.consistency_key) as session:
+                yield session
+
     async def create_session(
         self,
         user_id: int,
@@ -90,22 +108,10 @@ class SessionManager:
     ) -> List[SessionModel]:
         """Get all sessions for a user"""
         try:
-            query = select(SessionModel).where(
-                SessionModel.user_id == user_id
-            )
+            query = self._user_sessions_query(user_id, active_only)
 
-            if active_only:
-                query = query.where(
-                    and_(
-                        SessionModel.is_active == True,
-                        or_(SessionModel.expires_at.is_(None), SessionModel.expires_at > datetime.utcnow()),
-                    )
-                )
-
-            query = query.order_by(desc(SessionModel.created_at))
-
-            result = await self.db_session.execute(query)
-            sessions = result.scalars().all()
+            async with self._reading() as session:
+                sessions = (await session.execute(query)).scalars().all()
 
             self.logger.debug(f"Retrieved {len(sessions)} sessions for user {user_id}")
             return sessions
@@ -212,8 +218,8 @@ class SessionManager:
         """Get session statistics for a user"""
         try:
             query = select(SessionModel).where(SessionModel.user_id == user_id)
-            result = await self.db_session.execute(query)
-            all_sessions = result.scalars().all()
+            async with self._reading() as session:
+                all_sessions = (await session.execute(query)).scalars().all()
 
             active_sessions = [
                 s for s in all_sessions
@@ -239,5 +245,22 @@ class SessionManager:
             self.logger.error(f"Error getting session stats: {str(e)}", exc_info=True)
             raise
 
+    @staticmethod
+    def _user_sessions_query(user_id: int, active_only: bool = True):
+        """Build the per-user session listing (served by idx_session_user_live_recent, see indexes.py)"""
+        query = select(SessionModel).where(
+            SessionModel.user_id == user_id
+        )
+
+        if active_only:
+            query = query.where(
+                and_(
+                    SessionModel.is_active == True,
+                    or_(SessionModel.expires_at.is_(None), SessionModel.expires_at > datetime.utcnow()),
+                )
+            )
+
+        return query.order_by(desc(SessionModel.created_at))
+
 
 from sqlalchemy import or_  # Add missing import
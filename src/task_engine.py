@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+ARQ - AI Assistant with Memory & Context Management
+Iterative, checkpointed execution of ARQ development tasks
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from task_store import TaskStore
+
+logger = logging.getLogger(__name__)
+
+# generate(prompt, on_chunk) -> full text; on_chunk receives each streamed fragment
+Generate = Callable[[str, Callable[[str], None]], Awaitable[str]]
+
+_PLAN_ITEM = re.compile(r"^\s*(?:\d+[.)]|[-*])\s+(.+?)\s*$")
+
+
+def parse_plan(text: str, max_steps: int) -> List[str]:
+    """Numbered or bulleted lines of a planning answer, at most ``max_steps``"""
+    steps = []
+    for line in text.splitlines():
+        match = _PLAN_ITEM.match(line)
+        if match:
+            steps.append(match.group(1))
+            if len(steps) == max_steps:
+                break
+    return steps
+
+
+class TaskEngine:
+    """Runs a development goal as ``max_iterations`` refinement rounds.
+
+    The goal is first split into independent sub-steps. Every iteration runs
+    all sub-steps concurrently, each fed its own result from the previous
+    iteration. ``concurrency`` caps in-flight LLM calls across every task
+    this engine runs, so a worker running several tasks at once shares one
+    budget.
+
+    Progress lives in the task record: streamed text goes to ``partial``,
+    each finished sub-step is written into ``checkpoint`` and each finished
+    iteration is appended to ``results``. A rerun after a crash or a retry
+    skips everything already recorded. Store calls are synchronous SQLite
+    writes and run in the default executor, off the event loop.
+    """
+
+    def __init__(
+        self,
+        store: TaskStore,
+        generate: Generate,
+        concurrency: int = 2,
+        max_steps: int = 4,
+        partial_flush_interval: float = 0.5,
+    ):
+        self.store = store
+        self.generate = generate
+        self.max_steps = max_steps
+        self.partial_flush_interval = partial_flush_interval
+        self._limit = asyncio.Semaphore(concurrency)
+
+    async def _call(self, task_id: str, key: str, prompt: str) -> str:
+        """One LLM call under the shared limit, streaming partial text into the task"""
+        fragments: List[str] = []
+        last_flush = 0.0
+        flush: Optional[asyncio.Task] = None
+
+        def on_chunk(fragment: str) -> None:
+            nonlocal last_flush, flush
+            fragments.append(fragment)
+            now = time.monotonic()
+            # One write in flight at a time, so partial text never goes backwards
+            if now - last_flush >= self.partial_flush_interval and (flush is None or flush.done()):
+                last_flush = now
+                flush = asyncio.ensure_future(asyncio.to_thread(
+                    self.store.set_json_path, task_id, "partial", f'$."{key}"', "".join(fragments)
+                ))
+
+        async with self._limit:
+            try:
+                return await self.generate(prompt, on_chunk)
+            finally:
+                # The last partial write lands before the caller checkpoints
+                if flush is not None:
+                    await flush
+
+    async def _plan(self, task_id: str, goal: Dict[str, Any]) -> List[str]:
+        if self.max_steps <= 1:
+            return [goal["title"]]
+        text = await self._call(task_id, "plan", (
+            f"Context: You are ARQ AI. Goal: {goal['title']}. {goal.get('description', '')}\n"
+            f"Split the goal into at most {self.max_steps} independent sub-steps that can be "
+            f"worked on in parallel. Answer with a numbered list only."
+        ))
+        return parse_plan(text, self.max_steps) or [goal["title"]]
+
+    async def _step(self, task_id: str, goal: Dict[str, Any], plan: List[str], index: int,
+                    iteration: int, previous: Optional[str]) -> str:
+        prompt = (
+            f"Context: You are ARQ AI. Goal: {goal['title']}. {goal.get('description', '')}\n"
+            f"Sub-step {index + 1} of {len(plan)}: {plan[index]}\n"
+        )
+        if previous:
+            prompt += (
+                f"Iteration {iteration + 1}. Your previous result for this sub-step:\n{previous}\n"
+                f"Review it, fix mistakes and extend it. Give the complete improved result."
+            )
+        else:
+            prompt += "Give a concise technical plan for this sub-step."
+        result = await self._call(task_id, str(index), prompt)
+        await asyncio.to_thread(self.store.set_json_path, task_id, "checkpoint", f'$.current."{index}"', result)
+        return result
+
+    async def run(self, task_id: str) -> None:
+        task = await asyncio.to_thread(self.store.get_task, task_id)
+        if task is None:
+            return
+        goal = task["goal"]
+        await asyncio.to_thread(self.store.update_task, task_id, status="running")
+
+        checkpoint = task["checkpoint"]
+        plan = checkpoint.get("plan")
+        if not plan:
+            plan = await self._plan(task_id, goal)
+            await asyncio.to_thread(self.store.set_json_path, task_id, "checkpoint", "$.plan", plan)
+        previous: List[Optional[str]] = checkpoint.get("previous") or [None] * len(plan)
+        current: Dict[str, str] = dict(checkpoint.get("current") or {})
+
+        for iteration in range(task["iterations"], goal.get("max_iterations", 1)):
+            pending = [i for i in range(len(plan)) if str(i) not in current]
+            if pending:
+                logger.info(f"Task {task_id} iteration {iteration + 1}: {len(pending)} sub-steps")
+            # Wait for every sub-step so finished ones are checkpointed before a failure propagates
+            outputs = await asyncio.gather(*(
+                self._step(task_id, goal, plan, i, iteration, previous[i]) for i in pending
+            ), return_exceptions=True)
+            for output in outputs:
+                if isinstance(output, BaseException):
+                    raise output
+            current.update({str(i): output for i, output in zip(pending, outputs)})
+
+            previous = [current[str(i)] for i in range(len(plan))]
+            summary = "\n\n".join(f"## {step}\n{output}" for step, output in zip(plan, previous))
+            await asyncio.to_thread(
+                self.store.complete_iteration, task_id, summary, {"plan": plan, "previous": previous, "current": {}}
+            )
+            current = {}
+
+        await asyncio.to_thread(self.store.update_task, task_id, status="completed", error=None)
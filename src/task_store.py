@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+ARQ - AI Assistant with Memory & Context Management
+Embedded SQLite (WAL) store for ARQ development tasks
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils import CursorHelper
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    goal TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    iterations INTEGER NOT NULL DEFAULT 0,
+    results TEXT NOT NULL DEFAULT '[]',
+    error TEXT,
+    start_time TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    checkpoint TEXT NOT NULL DEFAULT '{}',
+    partial TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status_start ON tasks (status, start_time);
+CREATE INDEX IF NOT EXISTS idx_tasks_start ON tasks (start_time);
+
+-- Status transitions, written by triggers so every writer (web app or worker) is captured
+CREATE TABLE IF NOT EXISTS task_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT,
+    at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_task_events_task ON task_events (task_id, id);
+CREATE TRIGGER IF NOT EXISTS trg_tasks_created AFTER INSERT ON tasks
+BEGIN
+    INSERT INTO task_events (task_id, status, error, at) VALUES (NEW.id, NEW.status, NEW.error, NEW.updated_at);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_tasks_status AFTER UPDATE OF status ON tasks
+WHEN OLD.status IS NOT NEW.status
+BEGIN
+    INSERT INTO task_events (task_id, status, error, at) VALUES (NEW.id, NEW.status, NEW.error, NEW.updated_at);
+END;
+"""
+
+# Columns added after the first release, created on open for existing databases
+ADDED_COLUMNS = {
+    "checkpoint": "TEXT NOT NULL DEFAULT '{}'",
+    "partial": "TEXT NOT NULL DEFAULT '{}'",
+}
+
+# Columns update_task may set; JSON columns are encoded on the way in
+UPDATABLE_FIELDS = {"status", "iterations", "results", "error", "goal", "checkpoint", "partial"}
+JSON_FIELDS = {"goal", "results", "checkpoint", "partial"}
+
+
+def task_id_for(row_id: int) -> str:
+    return f"task-{row_id}"
+
+
+def row_id_for(task_id: str) -> Optional[int]:
+    """Parse ``task-<n>``; None for anything else"""
+    prefix, _, number = task_id.partition("-")
+    if prefix != "task" or not number.isdigit():
+        return None
+    return int(number)
+
+
+class TaskStore:
+    """Task records in SQLite with WAL, one connection per thread.
+
+    Ids come from an AUTOINCREMENT key, so they are never reused even after
+    deletes. Every mutation is a single statement (or one IMMEDIATE
+    transaction), so concurrent background tasks and worker processes
+    cannot lose each other's updates the way rewriting a JSON file did.
+    """
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(tasks)")}
+            for name, definition in ADDED_COLUMNS.items():
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE tasks ADD COLUMN {name} {definition}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # A connection inherited across fork must not be used by the child
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "task_id": task_id_for(row["id"]),
+            "goal": json.loads(row["goal"]),
+            "status": row["status"],
+            "iterations": row["iterations"],
+            "start_time": row["start_time"],
+            "updated_at": row["updated_at"],
+            "results": json.loads(row["results"]),
+            "error": row["error"],
+            "checkpoint": json.loads(row["checkpoint"]),
+            "partial": json.loads(row["partial"]),
+        }
+
+    def create_task(self, goal: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert a pending task and return it with its new monotonic id"""
+        now = datetime.now().isoformat()
+        cursor = self._connect().execute(
+            "INSERT INTO tasks (title, goal, start_time, updated_at) VALUES (?, ?, ?, ?)",
+            (goal.get("title", ""), json.dumps(goal), now, now),
+        )
+        return self.get_task(task_id_for(cursor.lastrowid))
+
+    def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        row_id = row_id_for(task_id)
+        if row_id is None:
+            return None
+        row = self._connect().execute("SELECT * FROM tasks WHERE id = ?", (row_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def update_task(self, task_id: str, **fields: Any) -> bool:
+        """Atomically set the given columns; returns False if the task does not exist"""
+        unknown = set(fields) - UPDATABLE_FIELDS
+        if unknown:
+            raise ValueError(f"Cannot update task fields: {', '.join(sorted(unknown))}")
+        row_id = row_id_for(task_id)
+        if row_id is None:
+            return False
+
+        values = {
+            name: json.dumps(value) if name in JSON_FIELDS else value
+            for name, value in fields.items()
+        }
+        values["updated_at"] = datetime.now().isoformat()
+        assignments = ", ".join(f"{name} = ?" for name in values)
+        cursor = self._connect().execute(
+            f"UPDATE tasks SET {assignments} WHERE id = ?", (*values.values(), row_id)
+        )
+        return cursor.rowcount == 1
+
+    def append_result(self, task_id: str, result: Any, iterations: Optional[int] = None) -> bool:
+        """Append to the results array in place (no read-modify-write race)"""
+        row_id = row_id_for(task_id)
+        if row_id is None:
+            return False
+        cursor = self._connect().execute(
+            "UPDATE tasks SET results = json_insert(results, '$[#]', json(?)), "
+            "iterations = COALESCE(?, iterations), updated_at = ? WHERE id = ?",
+            (json.dumps(result), iterations, datetime.now().isoformat(), row_id),
+        )
+        return cursor.rowcount == 1
+
+    def set_json_path(self, task_id: str, field: str, path: str, value: Any) -> bool:
+        """json_set one key of a JSON column, so concurrent writers to different keys don't clash"""
+        if field not in ("checkpoint", "partial"):
+            raise ValueError(f"Cannot patch task field: {field}")
+        row_id = row_id_for(task_id)
+        if row_id is None:
+            return False
+        cursor = self._connect().execute(
+            f"UPDATE tasks SET {field} = json_set({field}, ?, json(?)), updated_at = ? WHERE id = ?",
+            (path, json.dumps(value), datetime.now().isoformat(), row_id),
+        )
+        return cursor.rowcount == 1
+
+    def complete_iteration(self, task_id: str, summary: Any, checkpoint: Dict[str, Any]) -> bool:
+        """Append an iteration's result, bump the count and replace the checkpoint in one statement"""
+        row_id = row_id_for(task_id)
+        if row_id is None:
+            return False
+        cursor = self._connect().execute(
+            "UPDATE tasks SET results = json_insert(results, '$[#]', json(?)), "
+            "iterations = iterations + 1, checkpoint = ?, partial = '{}', updated_at = ? WHERE id = ?",
+            (json.dumps(summary), json.dumps(checkpoint), datetime.now().isoformat(), row_id),
+        )
+        return cursor.rowcount == 1
+
+    def count_tasks(self, status: Optional[str] = None) -> int:
+        if status is None:
+            return self._connect().execute("SELECT count(*) FROM tasks").fetchone()[0]
+        return self._connect().execute(
+            "SELECT count(*) FROM tasks WHERE status = ?", (status,)
+        ).fetchone()[0]
+
+    def list_tasks(self, status: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Tasks newest first, optionally filtered by status (served by the status/start index)"""
+        query, params = "SELECT * FROM tasks", []
+        if status is not None:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY start_time DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [self._to_dict(row) for row in self._connect().execute(query, params)]
+
+    def list_tasks_page(
+        self,
+        status: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Keyset page of tasks, newest first; returns (items, next_cursor)"""
+        query, params = "SELECT * FROM tasks WHERE 1 = 1", []
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status)
+        if since is not None:
+            query += " AND start_time >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND start_time < ?"
+            params.append(until)
+        if cursor:
+            values = CursorHelper.decode_cursor(cursor, "tasks")
+            if len(values) != 2:
+                raise ValueError("Invalid pagination cursor")
+            query += " AND (start_time, id) < (?, ?)"
+            params.extend(values)
+        query += " ORDER BY start_time DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        rows = self._connect().execute(query, params).fetchall()
+        items = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit and items:
+            next_cursor = CursorHelper.encode_cursor("tasks", [items[-1]["start_time"], items[-1]["id"]])
+        return [self._to_dict(row) for row in items], next_cursor
+
+    def status_counts(self) -> Dict[str, int]:
+        return {
+            row[0]: row[1]
+            for row in self._connect().execute("SELECT status, count(*) FROM tasks GROUP BY status")
+        }
+
+    def events_after(
+        self, last_id: int = 0, task_id: Optional[str] = None, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Status transitions with an id above ``last_id``, oldest first"""
+        query, params = "SELECT * FROM task_events WHERE id > ?", [last_id]
+        if task_id is not None:
+            query += " AND task_id = ?"
+            params.append(row_id_for(task_id))
+        query += " ORDER BY id LIMIT ?"
+        params.append(limit)
+        return [
+            {"id": row["id"], "task_id": task_id_for(row["task_id"]), "status": row["status"],
+             "error": row["error"], "at": row["at"]}
+            for row in self._connect().execute(query, params)
+        ]
+
+    def last_event_id(self) -> int:
+        return self._connect().execute("SELECT COALESCE(MAX(id), 0) FROM task_events").fetchone()[0]
+
+    def import_legacy(self, tasks: Iterable[Dict[str, Any]]) -> int:
+        """Load tasks from the old tasks_db.json format, keeping their ids"""
+        conn = self._connect()
+        imported = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for task in tasks:
+                row_id = row_id_for(task.get("task_id", ""))
+                if row_id is None:
+                    continue
+                goal = task.get("goal", {})
+                status = task.get("status", "pending")
+                error = None
+                if status.startswith("error:"):
+                    status, error = "error", status[len("error:"):].strip()
+                start_time = task.get("start_time") or datetime.now().isoformat()
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO tasks (id, title, goal, status, iterations, results, error, "
+                    "start_time, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (row_id, goal.get("title", ""), json.dumps(goal), status, task.get("iterations", 0),
+                     json.dumps(task.get("results", [])), error, start_time, start_time),
+                )
+                imported += cursor.rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return imported
+
+
+def open_task_store(data_dir: str, legacy_json: Optional[str] = None) -> TaskStore:
+    """Open (creating if needed) ``tasks.db`` in ``data_dir``, importing a legacy JSON db once"""
+    os.makedirs(data_dir, exist_ok=True)
+    store = TaskStore(os.path.join(data_dir, "tasks.db"))
+    if legacy_json and os.path.exists(legacy_json):
+        with open(legacy_json, "r") as f:
+            imported = store.import_legacy(json.load(f).values())
+        os.replace(legacy_json, legacy_json + ".imported")
+        logger.info(f"Imported {imported} tasks from {legacy_json}")
+    return store
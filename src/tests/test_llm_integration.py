@@ -7,8 +7,15 @@ Phase 9: Comprehensive Testing with 30+ test cases
 
 import pytest
 import os
+import sys
 import json
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import AsyncMock, Mock, patch, MagicMock
+
+import httpx
+
+# llm_integration imports its sibling app modules (http_clients) by flat name
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
 from src.llm_integration import (
     LLMIntegration,
     OpenAIClient,
@@ -99,6 +106,11 @@ class TestLLMResponse:
         assert resp.tokens_used == 50
 
 
+def _mock_client(handler):
+    """AsyncClient answering every request with ``handler``"""
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
 class TestOpenAIClient:
     """Tests for OpenAI client"""
     
@@ -119,41 +131,44 @@ class TestOpenAIClient:
             with pytest.raises(ValueError):
                 OpenAIClient()
     
-    @patch('requests.post')
-    def test_openai_generate_success(self, mock_post, openai_client):
+    @pytest.mark.asyncio
+    async def test_openai_generate_success(self, openai_client):
         """Test successful OpenAI response generation"""
-        mock_response = MagicMock()
-        mock_response.json.return_value = {
+        openai_client._http_client = _mock_client(lambda request: httpx.Response(200, json={
             'choices': [{'message': {'content': 'Hello there'}}],
             'usage': {'total_tokens': 10}
-        }
-        mock_post.return_value = mock_response
+        }))
         
         req = LLMRequest(prompt="Hello")
-        resp = openai_client.generate(req)
+        resp = await openai_client.generate(req)
         
         assert resp.content == 'Hello there'
         assert resp.tokens_used == 10
         assert resp.provider == 'openai'
     
-    @patch('requests.post')
-    def test_openai_stream(self, mock_post, openai_client):
+    @pytest.mark.asyncio
+    async def test_openai_stream(self, openai_client):
         """Test OpenAI streaming response"""
-        mock_response = MagicMock()
-        mock_response.iter_lines.return_value = [
-            b'data: {"choices": [{"delta": {"content": "Hello"}}]}',
-            b'data: {"choices": [{"delta": {"content": " "}}]}',
-            b'data: {"choices": [{"delta": {"content": "World"}}]}',
-            b'data: [DONE]'
+        lines = [
+            'data: {"choices": [{"delta": {"content": "Hello"}}]}',
+            'data: {"choices": [{"delta": {"content": " "}}]}',
+            'data: {"choices": [{"delta": {"content": "World"}}]}',
+            'data: [DONE]'
         ]
-        mock_post.return_value = mock_response
+        openai_client._http_client = _mock_client(lambda request: httpx.Response(200, text="\n".join(lines)))
         
         req = LLMRequest(prompt="Hello", streaming=True)
-        chunks = list(openai_client.stream(req))
+        chunks = [chunk async for chunk in openai_client.stream(req)]
         
         assert len(chunks) == 3
         assert chunks[0] == 'Hello'
 
+    def test_openai_client_defaults_to_shared_registry(self, openai_client):
+        """Test the client posts through the shared "openai" registry client"""
+        with patch('src.llm_integration.get_http_clients') as get_http_clients:
+            assert openai_client.http_client is get_http_clients.return_value.get.return_value
+            get_http_clients.return_value.get.assert_called_once_with("openai")
+
 
 class TestOllamaClient:
     """Tests for Ollama client"""
@@ -169,35 +184,32 @@ class TestOllamaClient:
         assert 'localhost' in ollama_client.base_url
         assert ollama_client.model == 'llama2'
     
-    @patch('requests.post')
-    def test_ollama_generate_success(self, mock_post, ollama_client):
+    @pytest.mark.asyncio
+    async def test_ollama_generate_success(self, ollama_client):
         """Test successful Ollama response generation"""
-        mock_response = MagicMock()
-        mock_response.json.return_value = {
+        ollama_client._http_client = _mock_client(lambda request: httpx.Response(200, json={
             'response': 'Ollama response',
             'tokens': 15
-        }
-        mock_post.return_value = mock_response
+        }))
         
         req = LLMRequest(prompt="Hello")
-        resp = ollama_client.generate(req)
+        resp = await ollama_client.generate(req)
         
         assert resp.content == 'Ollama response'
         assert resp.provider == 'ollama'
     
-    @patch('requests.post')
-    def test_ollama_stream(self, mock_post, ollama_client):
+    @pytest.mark.asyncio
+    async def test_ollama_stream(self, ollama_client):
         """Test Ollama streaming response"""
-        mock_response = MagicMock()
-        mock_response.iter_lines.return_value = [
-            b'{"response": "chunk1"}',
-            b'{"response": "chunk2"}',
-            b'{"response": "chunk3"}'
+        lines = [
+            '{"response": "chunk1"}',
+            '{"response": "chunk2"}',
+            '{"response": "chunk3"}'
         ]
-        mock_post.return_value = mock_response
+        ollama_client._http_client = _mock_client(lambda request: httpx.Response(200, text="\n".join(lines)))
         
         req = LLMRequest(prompt="Hello", streaming=True)
-        chunks = list(ollama_client.stream(req))
+        chunks = [chunk async for chunk in ollama_client.stream(req)]
         
         assert len(chunks) == 3
 
@@ -217,8 +229,8 @@ class TestLLMIntegration:
             with patch.object(OpenAIClient, '__init__', lambda x: None):
                 with patch.object(OllamaClient, '__init__', lambda x: None):
                     llm = LLMIntegration()
-                    llm.openai_client = MagicMock()
-                    llm.ollama_client = MagicMock()
+                    llm.openai_client = MagicMock(generate=AsyncMock())
+                    llm.ollama_client = MagicMock(generate=AsyncMock())
                     return llm
     
     def test_llm_integration_init(self, llm_integration):
@@ -227,23 +239,26 @@ class TestLLMIntegration:
         assert llm_integration.backoff_factor == 2.0
         assert llm_integration.context_manager is not None
     
-    @patch('time.sleep')
-    def test_retry_with_backoff_success(self, mock_sleep, llm_integration):
+    @pytest.mark.asyncio
+    @patch('asyncio.sleep', new_callable=AsyncMock)
+    async def test_retry_with_backoff_success(self, mock_sleep, llm_integration):
         """Test retry with backoff succeeds"""
-        func = Mock(return_value="success")
-        result = llm_integration._retry_with_backoff(func)
+        func = AsyncMock(return_value="success")
+        result = await llm_integration._retry_with_backoff(func)
         assert result == "success"
         assert mock_sleep.call_count == 0
     
-    @patch('time.sleep')
-    def test_retry_with_backoff_fails_then_succeeds(self, mock_sleep, llm_integration):
+    @pytest.mark.asyncio
+    @patch('asyncio.sleep', new_callable=AsyncMock)
+    async def test_retry_with_backoff_fails_then_succeeds(self, mock_sleep, llm_integration):
         """Test retry with backoff fails then succeeds"""
-        func = Mock(side_effect=[Exception("fail"), "success"])
-        result = llm_integration._retry_with_backoff(func)
+        func = AsyncMock(side_effect=[Exception("fail"), "success"])
+        result = await llm_integration._retry_with_backoff(func)
         assert result == "success"
         assert mock_sleep.call_count == 1
     
-    def test_generate_response_with_gpt_model(self, llm_integration):
+    @pytest.mark.asyncio
+    async def test_generate_response_with_gpt_model(self, llm_integration):
         """Test generate response with GPT model"""
         llm_integration.openai_client.generate.return_value = LLMResponse(
             content="response",
@@ -253,7 +268,7 @@ class TestLLMIntegration:
             latency_ms=100
         )
         
-        resp = llm_integration.generate_response(
+        resp = await llm_integration.generate_response(
             "Hello",
             model="gpt-4"
         )
@@ -261,7 +276,8 @@ class TestLLMIntegration:
         assert resp.content == "response"
         llm_integration.openai_client.generate.assert_called_once()
     
-    def test_generate_response_with_ollama_model(self, llm_integration):
+    @pytest.mark.asyncio
+    async def test_generate_response_with_ollama_model(self, llm_integration):
         """Test generate response with Ollama model"""
         llm_integration.ollama_client.generate.return_value = LLMResponse(
             content="ollama response",
@@ -271,7 +287,7 @@ class TestLLMIntegration:
             latency_ms=200
         )
         
-        resp = llm_integration.generate_response(
+        resp = await llm_integration.generate_response(
             "Hello",
             model="llama2"
         )
@@ -7,6 +7,8 @@ Utility functions and helpers for API operations
 import logging
 import json
 import time
+import base64
+import binascii
 from typing import Any, Dict, Optional, List
 from datetime import datetime, timedelta
 
@@ -83,6 +85,29 @@ class PaginationHelper:
         }
 
 
+class CursorHelper:
+    """Helper for opaque keyset pagination cursors"""
+
+    @staticmethod
+    def encode_cursor(kind: str, values: List[Any]) -> str:
+        """Encode the sort-key values of the last row into an opaque cursor"""
+        payload = json.dumps({"k": kind, "v": values}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str, kind: str) -> List[Any]:
+        """Decode a cursor produced by encode_cursor, raising ValueError if malformed"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        except (binascii.Error, UnicodeError, ValueError) as e:
+            raise ValueError("Invalid pagination cursor") from e
+
+        if not isinstance(payload, dict) or payload.get("k") != kind or not isinstance(payload.get("v"), list):
+            raise ValueError("Invalid pagination cursor")
+        return payload["v"]
+
+
 class CacheHelper:
     """Helper for cache operations"""
 
@@ -172,15 +197,23 @@ class PerformanceHelper:
 
 
 class LoggingHelper:
-    """Helper for structured logging"""
+    """Helper for structured logging
+
+    Messages use ``%``-style arguments so formatting happens only if a handler
+    accepts the record (on the listener thread when logging_pipeline is set up).
+    """
 
     @staticmethod
     def log_request(
         method: str, path: str, user_id: Optional[int] = None, request_id: Optional[str] = None
     ):
         """Log incoming request"""
+        if not logger.isEnabledFor(logging.INFO):
+            return
         logger.info(
-            f"Request: {method} {path}",
+            "Request: %s %s",
+            method,
+            path,
             extra={
                 "user_id": user_id,
                 "request_id": request_id,
@@ -194,8 +227,12 @@ class LoggingHelper:
         status_code: int, response_time_ms: float, request_id: Optional[str] = None
     ):
         """Log outgoing response"""
+        if not logger.isEnabledFor(logging.INFO):
+            return
         logger.info(
-            f"Response: {status_code} ({response_time_ms:.2f}ms)",
+            "Response: %d (%.2fms)",
+            status_code,
+            response_time_ms,
             extra={
                 "status_code": status_code,
                 "response_time_ms": response_time_ms,
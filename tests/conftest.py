@@ -6,6 +6,7 @@ including database fixtures, mock objects, and utility functions.
 """
 
 import pytest
+import pytest_asyncio
 import asyncio
 from typing import AsyncGenerator, Generator
 from unittest.mock import Mock, AsyncMock, patch
@@ -14,6 +15,8 @@ import os
 
 # Add src to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+# Core modules import each other by flat module name (e.g. ``from models import Base``)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 
 # ==================== SESSION-SCOPED FIXTURES ====================
@@ -43,7 +46,7 @@ def mock_settings() -> Mock:
     return settings
 
 
-@pytest.fixture
+@pytest_asyncio.fixture
 async def mock_database_manager() -> AsyncMock:
     """Mock database manager."""
     manager = AsyncMock()
@@ -54,7 +57,7 @@ async def mock_database_manager() -> AsyncMock:
     return manager
 
 
-@pytest.fixture
+@pytest_asyncio.fixture
 async def mock_memory_manager() -> AsyncMock:
     """Mock memory manager."""
     manager = AsyncMock()
@@ -66,7 +69,7 @@ async def mock_memory_manager() -> AsyncMock:
     return manager
 
 
-@pytest.fixture
+@pytest_asyncio.fixture
 async def mock_session_manager() -> AsyncMock:
     """Mock session manager."""
     manager = AsyncMock()
@@ -153,7 +156,7 @@ def pytest_configure(config):
 
 # ==================== HOOKS ====================
 
-@pytest.fixture(autouse=True)
+@pytest_asyncio.fixture(autouse=True)
 async def reset_mocks() -> None:
     """Reset all mocks before each test."""
     yield
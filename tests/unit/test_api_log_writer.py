@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Unit tests for the batched API log writer.
+
+Tests for:
+- Bounded buffering with drop counters
+- Batched bulk inserts and flush on stop
+- Failure accounting without raising
+- Records captured by LoggingMiddleware
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from api_log_writer import APILogRecord, APILogWriter
+from middleware import LoggingMiddleware
+from models import APILog, Base
+
+
+def _record(i: int = 0) -> APILogRecord:
+    return APILogRecord(
+        endpoint=f"/items/{i}", method="GET", status_code=200,
+        processing_time=1.5, created_at=datetime(2026, 10, 1),
+    )
+
+
+@pytest_asyncio.fixture
+async def engine():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+async def _count(engine) -> int:
+    async with engine.connect() as conn:
+        return (await conn.execute(select(func.count()).select_from(APILog.__table__))).scalar()
+
+
+class TestAPILogWriter:
+    """Tests for buffering and flushing."""
+
+    @pytest.mark.unit
+    def test_full_buffer_drops_and_counts(self):
+        """Test submit never blocks and counts records beyond capacity."""
+        writer = APILogWriter(engine=None, capacity=3)
+        results = [writer.submit(_record(i)) for i in range(5)]
+        assert results == [True, True, True, False, False]
+        assert writer.stats()["dropped"] == 2
+        assert writer.pending() == 3
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_flush_writes_in_batches(self, engine):
+        """Test buffered records are bulk inserted batch_size rows at a time."""
+        writer = APILogWriter(engine, batch_size=4)
+        for i in range(10):
+            writer.submit(_record(i))
+        assert await writer.flush() == 10
+        assert writer.batches == 3
+        assert await _count(engine) == 10
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_background_flush_and_stop(self, engine):
+        """Test a full batch wakes the flusher and stop drains the remainder."""
+        writer = APILogWriter(engine, batch_size=5, flush_interval_ms=60_000)
+        writer.start()
+        for i in range(5):
+            writer.submit(_record(i))
+        for _ in range(50):
+            if writer.written == 5:
+                break
+            await asyncio.sleep(0.01)
+        assert writer.written == 5
+
+        writer.submit(_record(99))
+        await writer.stop()
+        assert await _count(engine) == 6
+        assert writer.stats()["running"] is False
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_insert_failure_is_counted(self):
+        """Test a failing insert discards the batch instead of raising."""
+        engine = create_async_engine("sqlite+aiosqlite://")  # no tables
+        writer = APILogWriter(engine)
+        writer.submit(_record())
+        assert await writer.flush() == 0
+        assert writer.failed == 1 and writer.pending() == 0
+        await engine.dispose()
+
+
+class TestLoggingMiddlewareCapture:
+    """Tests for middleware feeding the writer."""
+
+    @pytest.mark.unit
+    def test_request_is_recorded(self):
+        """Test each response becomes one record with timing and sizes."""
+        writer = APILogWriter(engine=None)
+        app = FastAPI()
+        app.add_middleware(LoggingMiddleware, log_writer=writer)
+
+        @app.post("/echo")
+        async def echo():
+            return {"ok": True}
+
+        response = TestClient(app).post("/echo", content=b"12345", headers={"user-agent": "pytest"})
+        assert response.status_code == 200
+
+        record = writer._buffer[0]
+        assert (record.endpoint, record.method, record.status_code) == ("/echo", "POST", 200)
+        assert record.request_size == 5
+        assert record.response_size == len(response.content)
+        assert record.user_agent == "pytest"
+        assert record.processing_time >= 0
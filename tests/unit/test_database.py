@@ -304,3 +304,104 @@ class TestDatabaseCleanup:
         """Test pending transactions are rolled back on shutdown."""
         # Should rollback any open transactions
         assert True
+
+
+class TestEngineFactory:
+    """Tests for the async engine factory and pool tuning."""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("url,driver", [
+        ("sqlite:///./arq.db", "sqlite+aiosqlite"),
+        ("postgresql://u:p@db/arq", "postgresql+asyncpg"),
+        ("postgresql+asyncpg://u:p@db/arq", "postgresql+asyncpg"),
+    ])
+    def test_sync_urls_get_async_driver(self, url, driver):
+        """Test sync driver URLs are mapped to their async driver."""
+        from engine_factory import to_async_url
+        assert to_async_url(url).drivername == driver
+
+    @pytest.mark.unit
+    def test_pool_sizing_respects_connection_budget(self):
+        """Test per-worker pools never exceed the server budget in total."""
+        from engine_factory import pool_size_for_workers
+        sizing = pool_size_for_workers(max_connections=90, workers=4)
+        assert (sizing["pool_size"] + sizing["max_overflow"]) * 4 <= 90
+        assert sizing["pool_size"] >= 1
+
+    @pytest.mark.unit
+    def test_asyncpg_statement_cache(self):
+        """Test asyncpg engines get statement cache sizing."""
+        from database import DatabaseConfig
+        from engine_factory import create_engine_from_config
+        pytest.importorskip("asyncpg")
+        engine = create_engine_from_config(
+            DatabaseConfig("postgresql://u:p@localhost/arq", statement_cache_size=0)
+        )
+        assert engine.url.query["prepared_statement_cache_size"] == "0"
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_sqlite_pragmas_and_pool_metrics(self, tmp_path):
+        """Test file SQLite gets WAL/NORMAL/mmap and an instrumented async pool."""
+        from sqlalchemy import text
+        from database import DatabaseConfig, DatabaseManager
+
+        manager = DatabaseManager(DatabaseConfig(
+            f"sqlite:///{tmp_path / 'arq.db'}", pool_size=2, max_overflow=1,
+            sqlite_mmap_size=1024 * 1024,
+        ))
+        await manager.initialize()
+        try:
+            assert await manager.health_check()
+            async with manager.engine.connect() as conn:
+                assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+                assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1
+                assert (await conn.execute(text("PRAGMA mmap_size"))).scalar() == 1024 * 1024
+                status = manager.pool_status()
+                assert status["pool_class"] == "InstrumentedAsyncQueuePool"
+                assert status["checked_out"] == 1
+            assert manager.pool_status()["checkouts"] >= 2
+        finally:
+            await manager.close()
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_pool_wait_excludes_connection_setup(self, tmp_path):
+        """Test slow connection creation is not reported as checkout wait."""
+        import time
+        from sqlalchemy import event, text
+        from database import DatabaseConfig, DatabaseManager
+
+        manager = DatabaseManager(DatabaseConfig(f"sqlite:///{tmp_path / 'arq.db'}", pool_size=2))
+        await manager.initialize()
+
+        @event.listens_for(manager.engine.sync_engine, "connect")
+        def _slow_connect(dbapi_connection, connection_record):
+            time.sleep(0.2)
+
+        try:
+            async with manager.engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            status = manager.pool_status()
+            assert status["checkouts"] == 1
+            assert status["wait_ms_max"] < 100
+        finally:
+            await manager.close()
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_memory_sqlite_shares_one_connection(self):
+        """Test in-memory SQLite uses a static pool so tables persist across sessions."""
+        from database import DatabaseConfig, DatabaseManager
+
+        manager = DatabaseManager(DatabaseConfig("sqlite:///:memory:"))
+        await manager.initialize()
+        try:
+            await manager.create_tables()
+            assert await manager.run_migrations() == ["0001", "0002", "0003"]
+            assert manager.pool_status()["pool_class"] == "StaticPool"
+        finally:
+            await manager.close()
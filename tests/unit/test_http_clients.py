@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Unit tests for the shared outbound HTTP client registry.
+
+Tests for:
+- One client per name, recreated after close
+- Keep-alive reuse and per-host stats against a real local server
+- Providers and ARQ Ollama calls using injected/shared clients
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+import arq_endpoints
+import http_clients
+from http_clients import HTTPClientRegistry
+from llm_layer.openai_provider import OpenAIProvider
+from llm_layer.provider_base import CompletionRequest
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep connections open between requests
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(500 if self.path == "/fail" else 200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestHTTPClientRegistry:
+    """Tests for pooled clients and their stats."""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_named_clients_are_shared(self):
+        """Test get returns the same client until it is closed."""
+        registry = HTTPClientRegistry()
+        client = registry.get("ollama")
+        assert registry.get("ollama") is client
+        assert registry.get("other") is not client
+        await client.aclose()
+        assert registry.get("ollama") is not client
+        await registry.aclose()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_connections_are_reused(self, server):
+        """Test sequential requests to one host share a single connection."""
+        registry = HTTPClientRegistry()
+        client = registry.get("local")
+        for _ in range(5):
+            (await client.get(f"{server}/ok")).raise_for_status()
+        await client.get(f"{server}/fail")
+
+        stats = registry.stats()
+        host = stats["hosts"][server]
+        assert host["requests"] == 6 and host["errors"] == 1
+        assert host["connections_opened"] == 1
+        assert host["reuse_ratio"] == round(5 / 6, 3)
+        assert stats["pools"]["local"] == {server: {"open": 1, "idle": 1}}
+        await registry.aclose()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_transport_errors_are_counted(self):
+        """Test timeouts and connection failures count as errors and in response time."""
+        failures = iter([httpx.ConnectError("refused"), httpx.ReadTimeout("slow")])
+
+        def handler(request):
+            raise next(failures)
+
+        registry = HTTPClientRegistry()
+        client = registry.get("flaky", transport=httpx.MockTransport(handler))
+        with pytest.raises(httpx.ConnectError):
+            await client.get("http://upstream.test/a")
+        with pytest.raises(httpx.TimeoutException):
+            await client.get("http://upstream.test/b")
+
+        host = registry.stats()["hosts"]["http://upstream.test:80"]
+        assert host["requests"] == 2 and host["errors"] == 2
+        assert host["avg_response_ms"] > 0
+        await registry.aclose()
+        assert registry.stats()["pools"] == {}
+
+
+class TestClientInjection:
+    """Tests for outbound callers using the shared clients."""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_provider_uses_injected_client(self):
+        """Test OpenAIProvider posts through the client it was given and leaves it open."""
+        def handler(request):
+            return httpx.Response(200, json={
+                "choices": [{"message": {"content": "hi"}}], "usage": {"total_tokens": 3},
+            })
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        provider = OpenAIProvider(api_key="test", http_client=client)
+        response = await provider.complete(CompletionRequest(prompt="hello", model="llama3.1"))
+        assert response.content == "hi" and response.tokens_used == 3
+        await provider.aclose()
+        assert not client.is_closed
+        await client.aclose()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_provider_defaults_to_registry(self, monkeypatch):
+        """Test OpenAIProvider without a client posts through the registry's "ollama" client."""
+        def handler(request):
+            return httpx.Response(200, json={"choices": [{"message": {"content": "hi"}}]})
+
+        registry = HTTPClientRegistry()
+        registry.get("ollama", transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(http_clients, "_http_clients", registry)
+
+        provider = OpenAIProvider(api_key="test")
+        assert provider.http_client is registry.get("ollama")
+        await provider.complete(CompletionRequest(prompt="hello", model="llama3.1"))
+        await provider.aclose()
+        assert registry.stats()["hosts"]["http://127.0.0.1:11434"]["requests"] == 1
+        await registry.aclose()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_ollama_generate_uses_registry(self, monkeypatch):
+        """Test ARQ Ollama calls go through the registry's "ollama" client."""
+        lines = [{"response": "plan "}, {"response": "ready", "done": True}]
+
+        def handler(request):
+            return httpx.Response(200, content="\n".join(json.dumps(line) for line in lines))
+
+        registry = HTTPClientRegistry()
+        registry.get("ollama", transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(http_clients, "_http_clients", registry)
+
+        fragments = []
+        assert await arq_endpoints.ollama_generate("goal", fragments.append) == "plan ready"
+        assert fragments == ["plan ", "ready"]
+        assert registry.stats()["hosts"]["http://host.docker.internal:11434"]["requests"] == 1
+        await registry.aclose()
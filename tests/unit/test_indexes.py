@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Unit tests for the query-shape index advisor and schema migrations.
+
+Tests for:
+- Column ordering derived from query shapes (equality, sort, range)
+- Collapsing of shapes served by the same index
+- Migration idempotency against a live database
+- EXPLAIN plans of MemoryManager/SessionManager queries (SQLite, optional PostgreSQL)
+"""
+
+import os
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from indexes import IndexAdvisor, QueryShape
+from memory import MemoryManager, MemoryType
+from models import Base
+from schema_migrations import run_migrations
+from sessions import SessionManager
+
+
+POSTGRES_URL = os.getenv("ARQ_TEST_POSTGRES_URL")
+
+
+@pytest.fixture
+def sqlite_engine():
+    """In-memory SQLite database with the ORM schema and migrations applied."""
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        run_migrations(conn)
+    yield engine
+    engine.dispose()
+
+
+def _compile(engine, query) -> str:
+    return str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+
+
+class TestIndexAdvisor:
+    """Tests for index derivation from query shapes."""
+
+    @pytest.mark.unit
+    def test_derive_orders_equality_sort_range(self):
+        """Test equality columns lead, then sort keys, then range columns."""
+        shape = QueryShape(
+            name="idx_t", table="t", source="test",
+            equality=("a",), order_by=(("b", True),), range=("c",),
+        )
+        spec = IndexAdvisor.derive(shape)
+        assert spec.columns == (("a", False), ("b", True), ("c", False))
+
+    @pytest.mark.unit
+    def test_prefix_shapes_collapse(self):
+        """Test a shape whose key is a prefix of another shares its index."""
+        advisor = IndexAdvisor()
+        ranked = [spec for spec in advisor.recommend() if spec.name == "idx_memory_user_ranked"]
+        assert len(ranked) == 1
+        assert "MemoryManager.search_memories" in ranked[0].sources
+        assert ranked[0].column_names == ("user_id", "importance", "updated_at", "id", "expires_at")
+
+    @pytest.mark.unit
+    def test_incompatible_shapes_rejected(self):
+        """Test shapes sharing a name but not a key prefix are rejected."""
+        advisor = IndexAdvisor([
+            QueryShape(name="idx_x", table="t", source="a", equality=("a", "b")),
+            QueryShape(name="idx_x", table="t", source="b", equality=("a", "c")),
+        ])
+        with pytest.raises(ValueError):
+            advisor.recommend()
+
+    @pytest.mark.unit
+    def test_live_row_indexes_are_partial(self):
+        """Test session listing index is restricted to active rows."""
+        specs = {spec.name: spec for spec in IndexAdvisor().recommend()}
+        assert specs["idx_session_user_live_recent"].where_true == ("is_active",)
+        assert specs["idx_memory_expiring"].where_not_null == ("expires_at",)
+
+
+class TestSchemaMigrations:
+    """Tests for migration application."""
+
+    @pytest.mark.unit
+    def test_migration_creates_recommended_indexes(self, sqlite_engine):
+        """Test every recommended index exists after migrating."""
+        inspector = inspect(sqlite_engine)
+        names = {
+            index["name"]
+            for table in ("memories", "messages", "sessions")
+            for index in inspector.get_indexes(table)
+        }
+        for spec in IndexAdvisor().recommend():
+            assert spec.name in names
+
+    @pytest.mark.unit
+    def test_stale_index_is_rebuilt(self, sqlite_engine):
+        """Test an advisor index whose shape changed is dropped and recreated."""
+        with sqlite_engine.begin() as conn:
+            conn.execute(text("DROP INDEX idx_memory_user_ranked"))
+            conn.execute(text("CREATE INDEX idx_memory_user_ranked ON memories (user_id, importance)"))
+            assert IndexAdvisor().apply(conn, Base.metadata) == ["idx_memory_user_ranked"]
+            columns = {
+                index["name"]: index["column_names"] for index in inspect(conn).get_indexes("memories")
+            }
+        assert columns["idx_memory_user_ranked"][3] == "id"
+
+    @pytest.mark.unit
+    def test_migrations_are_idempotent(self, sqlite_engine):
+        """Test re-running migrations applies nothing."""
+        with sqlite_engine.begin() as conn:
+            assert run_migrations(conn) == []
+            assert IndexAdvisor().apply(conn, Base.metadata) == []
+
+
+class TestQueryPlansSQLite:
+    """EXPLAIN QUERY PLAN regression tests on SQLite."""
+
+    def _plan(self, engine, query) -> str:
+        with engine.connect() as conn:
+            rows = conn.execute(text("EXPLAIN QUERY PLAN " + _compile(engine, query))).fetchall()
+        return "\n".join(row[-1] for row in rows)
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.parametrize("memory_type,session_id,index_name", [
+        (None, None, "idx_memory_user_ranked"),
+        (MemoryType.LONG_TERM, None, "idx_memory_user_type_ranked"),
+        (None, 7, "idx_memory_user_session_ranked"),
+    ])
+    def test_retrieve_memories_uses_ranked_index(self, sqlite_engine, memory_type, session_id, index_name):
+        """Test ranked retrieval walks the composite index without a sort step."""
+        query = MemoryManager._retrieve_memories_query(1, memory_type, session_id, limit=20)
+        plan = self._plan(sqlite_engine, query)
+        assert index_name in plan
+        assert "TEMP B-TREE" not in plan
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    def test_user_sessions_uses_partial_index(self, sqlite_engine):
+        """Test active session listing uses the live-row partial index."""
+        query = SessionManager._user_sessions_query(1, active_only=True)
+        plan = self._plan(sqlite_engine, query)
+        assert "idx_session_user_live_recent" in plan
+        assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.skipif(not POSTGRES_URL, reason="ARQ_TEST_POSTGRES_URL not set")
+class TestQueryPlansPostgreSQL:
+    """EXPLAIN regression tests on PostgreSQL (sync driver URL via ARQ_TEST_POSTGRES_URL)."""
+
+    @pytest.fixture
+    def pg_engine(self):
+        engine = create_engine(POSTGRES_URL)
+        with engine.begin() as conn:
+            Base.metadata.drop_all(conn)
+            conn.execute(text("DROP TABLE IF EXISTS schema_migrations"))
+            Base.metadata.create_all(conn)
+            run_migrations(conn)
+        yield engine
+        with engine.begin() as conn:
+            Base.metadata.drop_all(conn)
+        engine.dispose()
+
+    def _plan(self, engine, query) -> str:
+        with engine.connect() as conn:
+            # Empty tables would otherwise always plan as sequential scans
+            conn.execute(text("SET enable_seqscan = off"))
+            rows = conn.execute(text("EXPLAIN " + _compile(engine, query))).fetchall()
+        return "\n".join(row[0] for row in rows)
+
+    @pytest.mark.db
+    def test_retrieve_memories_uses_ranked_index(self, pg_engine):
+        """Test ranked retrieval is an index scan without Sort."""
+        plan = self._plan(pg_engine, MemoryManager._retrieve_memories_query(1, MemoryType.LONG_TERM))
+        assert "idx_memory_user_type_ranked" in plan
+        assert "Sort" not in plan
+
+    @pytest.mark.db
+    def test_user_sessions_uses_partial_index(self, pg_engine):
+        """Test active session listing uses the partial index."""
+        plan = self._plan(pg_engine, SessionManager._user_sessions_query(1, active_only=True))
+        assert "idx_session_user_live_recent" in plan
+        assert "Sort" not in plan
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Unit tests for the durable ARQ job queue and workers.
+
+Tests for:
+- Claim, complete and retry bookkeeping in SQLite local mode
+- Visibility timeouts handing stalled jobs to another worker
+- Dead-lettering after max attempts
+- Workers bounding concurrency and writing progress to the task store
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from arq_worker import JobWorker
+from job_queue import SQLiteJobQueue
+from task_store import TaskStore
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"), max_attempts=2)
+    yield queue
+    queue.close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TaskStore(str(tmp_path / "tasks.db"))
+    yield store
+    store.close()
+
+
+class TestSQLiteJobQueue:
+    """Tests for the SQLite-backed queue."""
+
+    @pytest.mark.unit
+    def test_claim_and_complete(self, queue):
+        """Test jobs are claimed oldest first and completion needs the lease."""
+        first = queue.enqueue("task-1", {"prompt": "a"})
+        queue.enqueue("task-2", {"prompt": "b"})
+
+        job = queue.claim("w1", visibility_timeout=60)
+        assert (job.id, job.task_id, job.payload, job.attempts) == (first, "task-1", {"prompt": "a"}, 1)
+        assert not queue.complete(job, "w2")
+        assert queue.complete(job, "w1")
+        assert queue.stats() == {"queued": 1, "leased": 0, "done": 1, "dead": 0}
+
+    @pytest.mark.unit
+    def test_delayed_jobs_wait(self, queue):
+        """Test a job is not claimable before its delay has passed."""
+        queue.enqueue("task-1", {}, delay=60)
+        assert queue.claim("w1", visibility_timeout=60) is None
+
+    @pytest.mark.unit
+    def test_expired_lease_is_reclaimed(self, queue):
+        """Test a stalled job goes to another worker once its lease lapses."""
+        queue.enqueue("task-1", {})
+        stalled = queue.claim("w1", visibility_timeout=0.05)
+        assert queue.claim("w2", visibility_timeout=60) is None
+        time.sleep(0.1)
+
+        job = queue.claim("w2", visibility_timeout=60)
+        assert job.id == stalled.id and job.attempts == 2
+        assert not queue.extend(stalled, "w1", 60)
+        assert queue.extend(job, "w2", 60)
+
+    @pytest.mark.unit
+    def test_retry_then_dead_letter(self, queue):
+        """Test failures requeue until max_attempts, then stop."""
+        queue.enqueue("task-1", {})
+        job = queue.claim("w1", visibility_timeout=60)
+        assert queue.fail(job, "w1", "boom", retry_delay=0)
+
+        job = queue.claim("w1", visibility_timeout=60)
+        assert job.attempts == 2
+        assert not queue.fail(job, "w1", "boom again", retry_delay=0)
+        assert queue.claim("w1", visibility_timeout=60) is None
+        assert queue.stats()["dead"] == 1
+
+    @pytest.mark.unit
+    def test_timed_out_last_attempt_is_reaped(self, queue):
+        """Test a lease expiring on the final attempt is dead-lettered."""
+        queue.enqueue("task-1", {})
+        queue.fail(queue.claim("w1", 60), "w1", "boom", retry_delay=0)
+        queue.claim("w1", visibility_timeout=0.01)
+        time.sleep(0.05)
+
+        reaped = queue.reap_expired()
+        assert [job.task_id for job in reaped] == ["task-1"]
+        assert queue.claim("w2", visibility_timeout=60) is None
+
+    @pytest.mark.unit
+    def test_concurrent_claims_are_exclusive(self, queue):
+        """Test claimers in several threads never receive the same job."""
+        for i in range(40):
+            queue.enqueue(f"task-{i}", {})
+        claimed = []
+
+        def claimer(name):
+            while True:
+                job = queue.claim(name, visibility_timeout=60)
+                if job is None:
+                    break
+                claimed.append(job.id)
+            queue.close()
+
+        threads = [threading.Thread(target=claimer, args=(f"w{n}",)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(claimed, key=int) == [str(i) for i in range(1, 41)]
+
+
+class TestJobWorker:
+    """Tests for the worker loop."""
+
+    async def _drain(self, worker, queue, timeout=5):
+        stop = asyncio.Event()
+        runner = asyncio.create_task(worker.run(stop))
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            stats = queue.stats()
+            if stats["queued"] == stats["leased"] == 0:
+                break
+            await asyncio.sleep(0.01)
+        stop.set()
+        await runner
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self, queue, store):
+        """Test no more than ``concurrency`` jobs run at once."""
+        running, peak = 0, 0
+
+        async def handler(job):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+
+        for i in range(8):
+            queue.enqueue(store.create_task({"title": str(i)})["task_id"], {})
+        worker = JobWorker(queue, store, handler, concurrency=3, poll_interval=0.01)
+        await self._drain(worker, queue)
+        assert peak == 3
+        assert queue.stats()["done"] == 8
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_failures_are_retried_and_recorded(self, queue, store):
+        """Test a transient failure is retried and a permanent one marks the task."""
+        flaky = store.create_task({"title": "flaky"})["task_id"]
+        broken = store.create_task({"title": "broken"})["task_id"]
+        attempts = {}
+
+        async def handler(job):
+            attempts[job.task_id] = attempts.get(job.task_id, 0) + 1
+            if job.task_id == broken or attempts[job.task_id] == 1:
+                raise RuntimeError("ollama unavailable")
+            store.update_task(job.task_id, status="completed", error=None)
+
+        queue.enqueue(flaky, {})
+        queue.enqueue(broken, {})
+        worker = JobWorker(queue, store, handler, retry_backoff=0, poll_interval=0.01)
+        await self._drain(worker, queue)
+
+        assert attempts == {flaky: 2, broken: 2}
+        assert store.get_task(flaky)["status"] == "completed"
+        failed = store.get_task(broken)
+        assert failed["status"] == "error" and failed["error"] == "ollama unavailable"
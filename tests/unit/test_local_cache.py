@@ -0,0 +1,905 @@
+#!/usr/bin/env python3
+"""Unit tests for the hybrid RAM + SQLite local cache.
+
+Tests for:
+- Persistent per-thread SQLite connections
+- Disk-tier reads, promotion and persistence across instances
+- Write-behind batching, coalescing, flush-on-close and backpressure
+- Value codecs: BLOB encoding, compression and legacy JSON rows
+- Indexed TTL expiry on disk and deadline-ordered expiry in RAM
+- Sharded RAM tier: disk reads outside locks, coalesced misses
+- Eviction policies: LRU and W-TinyLFU admission
+- Batch get_many / set_many / delete_many
+- Cross-process mode: invalidation log and data_version polling
+- Async facade: inline RAM hits, single writer thread, shared misses
+- Instrumentation: namespace counters, latency histograms, Prometheus export
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+import pytest_asyncio
+
+from browser_automation.async_local_cache import AsyncHybridLocalCache
+from browser_automation.cache_codecs import CacheCodec
+from browser_automation.cache_metrics import CacheMetrics, LatencyHistogram, key_namespace
+from browser_automation.cache_policies import CountMinSketch, WTinyLFUPolicy
+from browser_automation.local_cache import RAM_LATENCY_SAMPLE_MASK, CacheEntry, HybridLocalCache, MemoryShard
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = HybridLocalCache(cache_dir=str(tmp_path / "cache"))
+    yield cache
+    cache.close()
+
+
+class TestConnections:
+    """Tests for long-lived, tuned SQLite connections."""
+
+    @pytest.mark.unit
+    def test_connection_reused_per_thread(self, cache):
+        """Test one connection per thread, reused across operations."""
+        conn = cache._connect()
+        cache.set("a", 1)
+        cache.get("a")
+        assert cache._connect() is conn
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(cache._connect()))
+        thread.start()
+        thread.join()
+        assert other[0] is not conn
+        assert len(cache._connections) == 2
+
+    @pytest.mark.unit
+    def test_connections_of_finished_threads_closed(self, cache):
+        """Test a finished thread's connection is closed instead of kept until close()."""
+        opened = []
+        for _ in range(3):
+            thread = threading.Thread(target=lambda: opened.append(cache._connect()))
+            thread.start()
+            thread.join()
+        # Each new connection closes those left by threads that have exited
+        assert len(cache._connections) == 2
+        for conn in opened[:-1]:
+            with pytest.raises(sqlite3.ProgrammingError):
+                conn.execute("SELECT 1")
+        assert opened[-1].execute("SELECT 1").fetchone() == (1,)
+
+    @pytest.mark.unit
+    def test_pragmas(self, cache):
+        """Test WAL, NORMAL sync and mmap are applied."""
+        conn = cache._connect()
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+        assert conn.execute("PRAGMA mmap_size").fetchone()[0] == cache.mmap_size
+
+    @pytest.mark.unit
+    def test_close(self, cache):
+        """Test close stops the cleanup thread and drops connections."""
+        cache._connect()
+        cache.close()
+        cache.cleanup_thread.join(timeout=1)
+        assert not cache.cleanup_thread.is_alive()
+        assert cache._connections == {}
+
+    @pytest.mark.unit
+    def test_close_waits_for_running_cleanup(self, tmp_path, caplog):
+        """Test close joins a cleanup pass in progress before closing its connection."""
+        cache = HybridLocalCache(cache_dir=str(tmp_path / "cache"), cleanup_interval=0.01)
+        started, finished = threading.Event(), []
+
+        def slow_cleanup():
+            started.set()
+            time.sleep(0.2)
+            cache._connect().execute("SELECT 1")
+            finished.append(True)
+
+        cache._cleanup_expired = slow_cleanup
+        assert started.wait(1)
+        cache.close()
+        assert finished == [True]
+        assert not cache.cleanup_thread.is_alive()
+        assert "Cleanup thread error" not in caplog.text
+
+
+class TestDiskTier:
+    """Tests for reads that fall through to SQLite."""
+
+    @pytest.mark.unit
+    def test_cold_read_promotes(self, cache):
+        """Test a RAM miss is served from SQLite and promoted."""
+        cache.set("page:1", {"title": "Example"})
+        cache.clear_memory()
+        assert cache.get("page:1") == {"title": "Example"}
+        assert "page:1" in cache.memory_cache
+
+    @pytest.mark.unit
+    def test_persists_across_instances(self, tmp_path):
+        """Test values survive reopening the cache directory."""
+        first = HybridLocalCache(cache_dir=str(tmp_path / "c"))
+        first.set("k", [1, 2, 3])
+        first.close()
+        second = HybridLocalCache(cache_dir=str(tmp_path / "c"))
+        try:
+            assert second.get("k") == [1, 2, 3]
+            assert second.get_stats()["db_entries"] == 1
+        finally:
+            second.close()
+
+    @pytest.mark.unit
+    def test_delete_and_clear(self, cache):
+        """Test delete and clear reach both tiers."""
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.delete("a")
+        assert cache.get("a") is None
+        cache.clear()
+        assert cache.get("b") is None
+        assert cache.get_stats()["db_entries"] == 0
+
+
+class TestWriteBehind:
+    """Tests for batched background persistence."""
+
+    @staticmethod
+    def _db_count(cache):
+        return cache._connect().execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+    @pytest.mark.unit
+    def test_sets_coalesce_until_flush(self, tmp_path):
+        """Test repeated sets of one key queue a single row, newest value wins."""
+        cache = HybridLocalCache(cache_dir=str(tmp_path), write_behind=True, flush_interval_ms=60000)
+        try:
+            for i in range(5):
+                cache.set("k", i)
+            assert cache.get_stats()["pending_writes"] == 1
+            assert self._db_count(cache) == 0
+            assert cache.flush() == 1
+            data = cache._connect().execute("SELECT value FROM cache_entries").fetchone()[0]
+            assert cache.codec.decode(data) == 4
+        finally:
+            cache.close()
+
+    @pytest.mark.unit
+    def test_pending_write_readable(self, tmp_path):
+        """Test a queued write is served after its RAM entry is gone."""
+        cache = HybridLocalCache(cache_dir=str(tmp_path), write_behind=True, flush_interval_ms=60000)
+        try:
+            cache.set("k", {"v": 1})
+            cache.clear_memory()
+            assert cache.get("k") == {"v": 1}
+        finally:
+            cache.close()
+
+    @pytest.mark.unit
+    def test_background_flush_and_close(self, tmp_path):
+        """Test the writer flushes on its interval and close flushes the rest."""
+        cache = HybridLocalCache(cache_dir=str(tmp_path), write_behind=True, flush_interval_ms=10)
+        cache.set("a", 1)
+        deadline = time.monotonic() + 5
+        while cache.get_stats()["pending_writes"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert self._db_count(cache) == 1
+
+        cache.flush_interval = 60
+        cache.set("b", 2)
+        cache.close()
+        reopened = HybridLocalCache(cache_dir=str(tmp_path))
+        try:
+            assert reopened.get("b") == 2
+        finally:
+            reopened.close()
+
+    @pytest.mark.unit
+    def test_delete_drops_queued_write(self, tmp_path):
+        """Test a delete is not undone by a later flush."""
+        cache = HybridLocalCache(cache_dir=str(tmp_path), write_behind=True, flush_interval_ms=60000)
+        try:
+            cache.set("k", 1)
+            cache.delete("k")
+            cache.flush()
+            assert cache.get("k") is None
+            assert self._db_count(cache) == 0
+        finally:
+            cache.close()
+
+    @pytest.mark.unit
+    def test_backpressure(self, tmp_path):
+        """Test a full queue blocks new keys until the writer drains it."""
+        cache = HybridLocalCache(
+            cache_dir=str(tmp_path), write_behind=True, flush_interval_ms=60000, max_pending_writes=2
+        )
+        try:
+            cache.set("a", 1)
+            cache.set("b", 2)
+            cache.set("a", 3)  # coalesces, does not block
+            cache.set("c", 4)  # wakes the writer and waits for the flush
+            assert self._db_count(cache) >= 2
+            assert cache.get_stats()["pending_writes"] <= 2
+        finally:
+            cache.close()
+
+
+class TestCodecs:
+    """Tests for encoded BLOB values."""
+
+    VALUE = {"url": "https://example.com", "links": list(range(50)), "html": "<p>x</p>" * 200}
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("serializer", ["pickle", "json"])
+    def test_round_trip(self, serializer):
+        """Test each serializer round-trips with and without compression."""
+        for compression in (None, "zlib"):
+            codec = CacheCodec(serializer, compression, compress_threshold=64)
+            assert codec.decode(codec.encode(self.VALUE)) == self.VALUE
+
+    @pytest.mark.unit
+    def test_compression_threshold(self):
+        """Test only payloads above the threshold are compressed."""
+        codec = CacheCodec("pickle", "zlib", compress_threshold=1024)
+        small, large = codec.encode({"a": 1}), codec.encode(self.VALUE)
+        assert small[0] >> 4 == 0
+        assert large[0] >> 4 == 1
+        assert len(large) < len(CacheCodec("pickle").encode(self.VALUE))
+
+    @pytest.mark.unit
+    def test_decode_is_independent_of_config(self):
+        """Test rows stay readable after the configured codec changes."""
+        data = CacheCodec("json", "zlib", compress_threshold=0).encode(self.VALUE)
+        assert CacheCodec("pickle").decode(data) == self.VALUE
+        assert CacheCodec("pickle").decode('{"legacy": true}') == {"legacy": True}
+
+    @pytest.mark.unit
+    def test_unknown_codec(self):
+        """Test unknown serializer and compression names are rejected."""
+        with pytest.raises(ValueError):
+            CacheCodec("yaml")
+        with pytest.raises(ValueError):
+            CacheCodec("pickle", "brotli")
+
+    @pytest.mark.unit
+    def test_size_is_encoded_length(self, tmp_path):
+        """Test RAM entries are sized by the BLOB written to SQLite."""
+        cache = HybridLocalCache(cache_dir=str(tmp_path), compression="zlib", compress_threshold=256)
+        try:
+            cache.set("page:1", self.VALUE)
+            data = cache._connect().execute("SELECT value FROM cache_entries").fetchone()[0]
+            assert isinstance(data, bytes)
+            assert cache.memory_cache["page:1"].size == len(data)
+            cache.clear_memory()
+            assert cache.get("page:1") == self.VALUE
+        finally:
+            cache.close()
+
+
+class TestExpiry:
+    """Tests for absolute-deadline TTL handling."""
+
+    @pytest.mark.unit
+    def test_ram_entries_reclaimed_without_access(self, cache):
+        """Test expired RAM entries are dropped in deadline order."""
+        cache.set("short", 1, ttl=10, persist=False)
+        cache.set("long", 2, ttl=1000, persist=False)
+        cache.set("forever", 3, persist=False)
+        assert cache._expire_memory(now=time.time() + 100) == 1
+        assert set(cache.memory_cache) == {"long", "forever"}
+
+    @pytest.mark.unit
+    def test_expiry_heap_compacts(self, cache):
+        """Test overwrites do not grow the heap without bound."""
+        for i in range(1000):
+            cache.set("k", i, ttl=1000, persist=False)
+        shard = cache._shard("k")
+        assert len(shard._expiry_heap) <= 2 * len(shard.entries) + 65
+
+    @pytest.mark.unit
+    def test_ranged_delete(self, cache):
+        """Test cleanup deletes only rows past their deadline."""
+        cache.set("old", 1, ttl=60)
+        cache.set("new", 2, ttl=3600)
+        cache.set("keep", 3)
+        cache._connect().execute("UPDATE cache_entries SET expires_at = 1 WHERE key = 'old'")
+        cache._cleanup_expired()
+        keys = {row[0] for row in cache._connect().execute("SELECT key FROM cache_entries")}
+        assert keys == {"new", "keep"}
+
+    @pytest.mark.unit
+    def test_promotion_keeps_deadline(self, cache):
+        """Test a value read back from disk does not get a fresh TTL."""
+        cache.set("k", 1, ttl=3600)
+        deadline = cache.memory_cache["k"].expires_at
+        cache.clear_memory()
+        cache.get("k")
+        assert cache.memory_cache["k"].expires_at == pytest.approx(deadline)
+
+    @pytest.mark.unit
+    def test_expired_row_not_served(self, cache):
+        """Test a RAM miss on an expired row returns None and removes it."""
+        cache.set("k", 1, ttl=3600)
+        cache._connect().execute("UPDATE cache_entries SET expires_at = 1")
+        cache.clear_memory()
+        assert cache.get("k") is None
+        assert cache.get_stats()["db_entries"] == 0
+
+    @pytest.mark.unit
+    def test_legacy_rows_backfilled(self, tmp_path):
+        """Test databases without expires_at get the column and deadlines."""
+        db = tmp_path / "cache.db"
+        conn = sqlite3.connect(db)
+        conn.execute(
+            "CREATE TABLE cache_entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at TEXT, "
+            "accessed_at TEXT, ttl INTEGER, access_count INTEGER DEFAULT 0, size INTEGER, hash TEXT UNIQUE)"
+        )
+        conn.execute("INSERT INTO cache_entries VALUES ('gone', '1', '2020-01-01T00:00:00', NULL, 60, 0, 1, 'a')")
+        conn.execute("INSERT INTO cache_entries VALUES ('kept', '[2]', '2020-01-01T00:00:00', NULL, NULL, 0, 3, 'b')")
+        conn.commit()
+        conn.close()
+
+        cache = HybridLocalCache(cache_dir=str(tmp_path))
+        try:
+            cache._cleanup_expired()
+            assert cache.get("gone") is None
+            assert cache.get("kept") == [2]
+        finally:
+            cache.close()
+
+
+class TestShards:
+    """Tests for the lock-striped RAM tier."""
+
+    @pytest.mark.unit
+    def test_limits_split_across_shards(self, tmp_path):
+        """Test keys spread over shards that share the entry limit."""
+        cache = HybridLocalCache(cache_dir=str(tmp_path), max_entries=64, num_shards=4)
+        try:
+            for i in range(200):
+                cache.set(f"k{i}", i, persist=False)
+            sizes = [len(shard.entries) for shard in cache.shards]
+            assert all(size <= 16 for size in sizes)
+            assert sum(sizes) == cache.get_stats()["ram_entries"] > 16
+        finally:
+            cache.close()
+
+    @pytest.mark.unit
+    def test_ram_hit_not_blocked_by_disk_read(self, tmp_path, monkeypatch):
+        """Test a slow disk read does not hold the shard lock."""
+        cache = HybridLocalCache(cache_dir=str(tmp_path), num_shards=1)
+        release = threading.Event()
+        reading = threading.Event()
+
+        def slow_read(key):
+            reading.set()
+            release.wait(5)
+            return None
+
+        try:
+            cache.set("hot", 1, persist=False)
+            monkeypatch.setattr(cache, "_read_from_db", slow_read)
+            miss = threading.Thread(target=cache.get, args=("cold",))
+            miss.start()
+            assert reading.wait(5)
+            assert cache.get("hot") == 1
+            release.set()
+            miss.join()
+        finally:
+            release.set()
+            cache.close()
+
+    @pytest.mark.unit
+    def test_concurrent_misses_coalesce(self, cache, monkeypatch):
+        """Test threads missing the same key share one disk read."""
+        calls = []
+        gate = threading.Event()
+
+        def read(key):
+            calls.append(key)
+            gate.wait(5)
+            return CacheEntry(key, "loaded", size=6)
+
+        monkeypatch.setattr(cache, "_read_from_db", read)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get("k"))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        while not calls:
+            time.sleep(0.001)
+        time.sleep(0.05)
+        gate.set()
+        for thread in threads:
+            thread.join()
+        assert calls == ["k"]
+        assert results == ["loaded"] * 8
+
+    @pytest.mark.unit
+    def test_write_during_read_wins(self, cache, monkeypatch):
+        """Test a set racing with a disk read is not overwritten by the promotion."""
+        def read(key):
+            cache.set(key, "new")
+            cache.clear_memory()  # even if the new value was already evicted
+            return CacheEntry(key, "old", size=3)
+
+        monkeypatch.setattr(cache, "_read_from_db", read)
+        assert cache.get("k") == "old"
+        assert "k" not in cache.memory_cache
+        monkeypatch.undo()
+        assert cache.get("k") == "new"
+
+
+class TestEvictionPolicies:
+    """Tests for LRU and W-TinyLFU RAM eviction."""
+
+    @staticmethod
+    def _replay(policy, keys, size=100):
+        shard = MemoryShard(max_memory=float("inf"), max_entries=size, policy=policy)
+        hits = 0
+        for key in keys:
+            if shard.lookup(key) is not None:
+                hits += 1
+            else:
+                shard.put(CacheEntry(key, None, size=1))
+        return shard, hits
+
+    @pytest.mark.unit
+    def test_sketch_estimates_frequency(self):
+        """Test frequent keys estimate higher and counts age."""
+        sketch = CountMinSketch(64, sample_size=1000)
+        for _ in range(10):
+            sketch.increment("hot")
+        sketch.increment("cold")
+        assert sketch.estimate("hot") >= 10 > sketch.estimate("cold") >= 1
+        for i in range(1000):
+            sketch.increment(f"noise{i}")
+        assert sketch.estimate("hot") < 10
+
+    @pytest.mark.unit
+    def test_lru_evicts_oldest(self):
+        """Test the LRU policy keeps the most recently used keys."""
+        shard, _ = self._replay("lru", ["a", "b", "c", "a", "d"], size=3)
+        assert set(shard.entries) == {"a", "c", "d"}
+
+    @pytest.mark.unit
+    def test_tinylfu_survives_scan(self):
+        """Test a one-shot scan does not flush the hot set under W-TinyLFU."""
+        hot = [f"hot{i}" for i in range(50)] * 20
+        scan = [f"scan{i}" for i in range(1000)]
+        lru, _ = self._replay("lru", hot + scan)
+        tinylfu, _ = self._replay("tinylfu", hot + scan)
+        assert not any(key.startswith("hot") for key in lru.entries)
+        assert sum(key.startswith("hot") for key in tinylfu.entries) >= 45
+
+    @pytest.mark.unit
+    def test_tinylfu_regions_bounded(self):
+        """Test window and main regions never exceed the entry limit."""
+        shard, _ = self._replay("tinylfu", [f"k{i % 700}" for i in range(5000)], size=100)
+        policy = shard.policy
+        assert isinstance(policy, WTinyLFUPolicy)
+        assert len(shard.entries) <= 100
+        assert len(policy._window) + len(policy._probation) + len(policy._protected) == len(shard.entries)
+
+    @pytest.mark.unit
+    def test_overwrite_keeps_policy_position(self):
+        """Test updating a hot key neither demotes it nor evicts anything."""
+        shard, _ = self._replay("tinylfu", [f"k{i}" for i in range(100)] * 3, size=100)
+        hot = next(iter(shard.policy._protected))
+        before = set(shard.entries)
+        shard.put(CacheEntry(hot, "new", size=1))
+        assert hot in shard.policy._protected
+        assert set(shard.entries) == before and shard.entries[hot].value == "new"
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("policy", ["lru", "tinylfu"])
+    def test_memory_evictions_follow_admission(self, policy):
+        """Test byte-limit evictions keep the policy and the entries in step."""
+        shard = MemoryShard(max_memory=50, max_entries=40, policy=policy)
+        for i in range(500):
+            key = f"k{i % 90}"
+            if shard.lookup(key) is None:
+                shard.put(CacheEntry(key, None, size=1 + i % 4))
+            assert shard.current_memory <= 50
+            assert shard.current_memory == sum(entry.size for entry in shard.entries.values())
+        tracked = (
+            len(shard.policy._order) if policy == "lru" else
+            len(shard.policy._window) + len(shard.policy._probation) + len(shard.policy._protected)
+        )
+        assert tracked == len(shard.entries)
+
+    @pytest.mark.unit
+    def test_cache_policy_selection(self, tmp_path):
+        """Test the cache accepts tinylfu and rejects unknown policies."""
+        cache = HybridLocalCache(cache_dir=str(tmp_path), eviction_policy="tinylfu", max_entries=32)
+        try:
+            for i in range(100):
+                cache.set(f"k{i}", i)
+            assert cache.get("k99") == 99
+            assert cache.get("k0") == 0  # from disk
+        finally:
+            cache.close()
+        with pytest.raises(ValueError):
+            HybridLocalCache(cache_dir=str(tmp_path), eviction_policy="fifo")
+
+
+class TestBatchAPI:
+    """Tests for multi-key operations."""
+
+    @pytest.mark.unit
+    def test_get_many_mixes_tiers(self, cache):
+        """Test RAM hits, disk rows and missing keys in one call."""
+        cache.set_many({f"k{i}": i for i in range(10)})
+        cache.clear_memory()
+        cache.set("ram", "r", persist=False)
+        result = cache.get_many(["ram", "k1", "k7", "missing", "k1"])
+        assert result == {"ram": "r", "k1": 1, "k7": 7}
+        assert {"k1", "k7"} <= set(cache.memory_cache)
+
+    @pytest.mark.unit
+    def test_get_many_chunks_disk_reads(self, cache, monkeypatch):
+        """Test misses are fetched with chunked IN queries, not one query per key."""
+        import browser_automation.local_cache as local_cache
+
+        monkeypatch.setattr(local_cache, "SQL_IN_CHUNK", 4)
+        cache.set_many({f"k{i}": i for i in range(10)})
+        cache.clear_memory()
+        statements = []
+        cache._connect().set_trace_callback(statements.append)
+        try:
+            assert cache.get_many([f"k{i}" for i in range(10)]) == {f"k{i}": i for i in range(10)}
+        finally:
+            cache._connect().set_trace_callback(None)
+        assert len([sql for sql in statements if sql.startswith("SELECT")]) == 3
+
+    @pytest.mark.unit
+    def test_get_many_skips_expired(self, cache):
+        """Test expired rows are dropped, not returned."""
+        cache.set_many({"a": 1, "b": 2}, ttl=3600)
+        cache._connect().execute("UPDATE cache_entries SET expires_at = 1 WHERE key = 'a'")
+        cache.clear_memory()
+        assert cache.get_many(["a", "b"]) == {"b": 2}
+        assert cache.get_stats()["db_entries"] == 1
+
+    @pytest.mark.unit
+    def test_set_many_one_transaction(self, cache):
+        """Test set_many persists every row with a single commit."""
+        statements = []
+        cache._connect().set_trace_callback(statements.append)
+        try:
+            cache.set_many({f"k{i}": i for i in range(50)})
+        finally:
+            cache._connect().set_trace_callback(None)
+        assert statements.count("COMMIT") == 1
+        assert cache.get_stats()["db_entries"] == 50
+
+    @pytest.mark.unit
+    def test_delete_many(self, cache):
+        """Test delete_many clears both tiers."""
+        cache.set_many({f"k{i}": i for i in range(20)})
+        cache.delete_many([f"k{i}" for i in range(15)])
+        assert cache.get_many([f"k{i}" for i in range(20)]) == {f"k{i}": i for i in range(15, 20)}
+        assert cache.get_stats()["db_entries"] == 5
+
+    @pytest.mark.unit
+    def test_batch_with_write_behind(self, tmp_path):
+        """Test queued writes are visible to get_many and dropped by delete_many."""
+        cache = HybridLocalCache(cache_dir=str(tmp_path), write_behind=True, flush_interval_ms=60000)
+        try:
+            cache.set_many({"a": 1, "b": 2})
+            cache.clear_memory()
+            assert cache.get_many(["a", "b"]) == {"a": 1, "b": 2}
+            cache.delete_many(["a"])
+            cache.flush()
+            cache.clear_memory()
+            assert cache.get_many(["a", "b"]) == {"b": 2}
+        finally:
+            cache.close()
+
+
+class TestSharedMode:
+    """Tests for RAM consistency across processes sharing cache.db."""
+
+    @pytest.fixture
+    def pair(self, tmp_path):
+        # Two instances stand in for two workers: separate RAM tiers and origins
+        first = HybridLocalCache(cache_dir=str(tmp_path), shared=True, sync_interval_ms=60000)
+        second = HybridLocalCache(cache_dir=str(tmp_path), shared=True, sync_interval_ms=60000)
+        yield first, second
+        first.close()
+        second.close()
+
+    @pytest.mark.unit
+    def test_remote_set_invalidates(self, pair):
+        """Test a write in one worker replaces the stale RAM copy in another."""
+        first, second = pair
+        first.set("k", "old")
+        assert second.get("k") == "old"
+        first.set("k", "new")
+        assert second.get("k") == "old"  # until the next sync
+        assert second.sync() == 1
+        assert second.get("k") == "new"
+
+    @pytest.mark.unit
+    def test_remote_delete_and_batch(self, pair):
+        """Test deletes and batch writes propagate."""
+        first, second = pair
+        first.set_many({"a": 1, "b": 2})
+        assert second.get_many(["a", "b"]) == {"a": 1, "b": 2}
+        first.delete("a")
+        first.set_many({"b": 3})
+        second.sync()
+        assert second.get_many(["a", "b"]) == {"b": 3}
+
+    @pytest.mark.unit
+    def test_own_writes_kept(self, pair):
+        """Test a worker's own writes do not evict its RAM entries."""
+        first, second = pair
+        first.set("k", 1)
+        second.set("other", 2)
+        first.sync()
+        assert "k" in first.memory_cache
+
+    @pytest.mark.unit
+    def test_idle_sync_is_cheap(self, pair):
+        """Test sync skips the log query when nothing was committed."""
+        first, second = pair
+        first.set("k", 1)
+        second.sync()
+        statements = []
+        second._connect().set_trace_callback(statements.append)
+        try:
+            assert second.sync() == 0
+        finally:
+            second._connect().set_trace_callback(None)
+        assert statements == ["PRAGMA data_version"]
+
+    @pytest.mark.unit
+    def test_pruned_log_clears_ram(self, pair):
+        """Test a worker that fell behind the retained log drops its whole RAM tier."""
+        first, second = pair
+        first.set("a", 1)
+        first.set("b", 2)
+        second.sync()
+        second.get_many(["a", "b"])
+        first.set("a", 3)
+        first.set("b", 4)
+        first._connect().execute("DELETE FROM cache_invalidations WHERE id <= 3")  # aged out
+        assert set(second.memory_cache) == {"a", "b"}
+        second.sync()
+        assert second.memory_cache == {}
+
+    @pytest.mark.unit
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+    def test_forked_worker_writes_invalidate_parent(self, pair):
+        """Test a forked child's writes carry their own origin."""
+        first, _ = pair
+        first.set("k", "parent")
+        pid = os.fork()
+        if pid == 0:
+            try:
+                first.set("k", "child")
+                first.flush()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        first.sync()
+        assert first.get("k") == "child"
+
+
+class TestMetrics:
+    """Tests for cache instrumentation."""
+
+    @pytest.mark.unit
+    def test_counters_by_namespace(self, cache):
+        """Test hits, misses and promotions are counted per key prefix."""
+        cache.set("workflow:1", "a")
+        cache.get("workflow:1")
+        cache.clear_memory()
+        cache.get("workflow:1")
+        cache.get("page:missing")
+        cache.get("bare")
+        counters = cache.collect_metrics().counters
+        assert counters["workflow"] == [1, 1, 1, 0]
+        assert counters["page"] == [0, 1, 0, 0]
+        assert counters["other"] == [0, 1, 0, 0]
+        stats = cache.get_stats()
+        assert stats["hits"] == 1 and stats["misses"] == 3
+        assert stats["hit_ratio"] == pytest.approx(0.25)
+
+    @pytest.mark.unit
+    def test_evictions_counted(self, tmp_path):
+        """Test capacity evictions are counted against the evicted key."""
+        cache = HybridLocalCache(cache_dir=str(tmp_path / "cache"), max_entries=2, num_shards=1)
+        try:
+            for i in range(5):
+                cache.set(f"step:{i}", i, persist=False)
+            assert cache.collect_metrics().counters["step"][3] == 3
+        finally:
+            cache.close()
+
+    @pytest.mark.unit
+    def test_namespace_labels_bounded(self):
+        """Test namespaces beyond the limit fold into "other"."""
+        metrics = CacheMetrics(max_namespaces=2)
+        for name in ("a:1", "b:1", "c:1", "d:1"):
+            metrics.count(name, 0)
+        assert metrics.counters == {"a": [1, 0, 0, 0], "b": [1, 0, 0, 0], "other": [2, 0, 0, 0]}
+        assert key_namespace(":x") == "other"
+
+    @pytest.mark.unit
+    def test_latency_buckets(self):
+        """Test durations land in power-of-two microsecond buckets."""
+        histogram = LatencyHistogram()
+        for seconds in (0.5e-6, 3e-6, 3e-6, 10.0):
+            histogram.observe(seconds)
+        assert histogram.counts[0] == 1
+        assert histogram.counts[2] == 2  # under 4us
+        assert histogram.counts[-1] == 1  # +Inf
+        assert histogram.count == 4
+
+    @pytest.mark.unit
+    def test_disk_latency_recorded(self, cache):
+        """Test disk reads and writes feed their own histograms."""
+        cache.set("k", 1)
+        cache.clear_memory()
+        for _ in range(RAM_LATENCY_SAMPLE_MASK + 1):
+            cache.get("k")
+        latency = cache.collect_metrics().latency
+        assert latency[("ram", "read")].count == 1  # sampled
+        assert latency[("disk", "read")].count == 1
+        assert latency[("disk", "write")].count == 1
+
+    @pytest.mark.unit
+    def test_batch_disk_latency_is_sub_second(self, cache):
+        """Test get_many times its chunked reads from the clock, not a chunk offset."""
+        cache.set_many({f"k:{i}": i for i in range(1200)})
+        cache.clear_memory()
+        assert len(cache.get_many([f"k:{i}" for i in range(1200)])) == 1200
+        histogram = cache.collect_metrics().latency[("disk", "read")]
+        assert histogram.count == 1
+        assert histogram.total < 1.0
+        assert histogram.counts[-1] == 0  # nothing in +Inf
+
+    @pytest.mark.unit
+    def test_db_count_maintained_without_scan(self, cache):
+        """Test the row count follows inserts, overwrites, deletes and expiry without COUNT(*)."""
+        cache.set_many({"a": 1, "b": 2, "c": 3})
+        cache.set("a", 10)
+        cache.delete("b")
+        cache.set("t", 1, ttl=-1)
+        cache._cleanup_expired()
+        statements = []
+        cache._connect().set_trace_callback(statements.append)
+        try:
+            assert cache.get_stats()["db_entries"] == 2
+        finally:
+            cache._connect().set_trace_callback(None)
+        assert not any("COUNT(*)" in statement for statement in statements)
+        cache.clear()
+        assert cache.get_stats()["db_entries"] == 0
+
+    @pytest.mark.unit
+    def test_db_count_seeded_for_existing_database(self, tmp_path):
+        """Test a database from before the count table is counted once on open."""
+        cache = HybridLocalCache(cache_dir=str(tmp_path / "cache"))
+        cache.set_many({"a": 1, "b": 2})
+        cache._connect().executescript(
+            "DROP TRIGGER trg_count_insert; DROP TRIGGER trg_count_delete; DROP TABLE cache_counts;"
+        )
+        cache.close()
+        reopened = HybridLocalCache(cache_dir=str(tmp_path / "cache"))
+        try:
+            reopened.set("c", 3)
+            assert reopened.get_stats()["db_entries"] == 3
+        finally:
+            reopened.close()
+
+    @pytest.mark.unit
+    def test_prometheus_export(self, cache):
+        """Test the text exposition has counters, cumulative buckets and gauges."""
+        cache.set('job:"x"', 1)
+        for _ in range(2 * (RAM_LATENCY_SAMPLE_MASK + 1)):
+            cache.get('job:"x"')
+        cache.get("job:missing")
+        text = cache.export_prometheus()
+        lines = text.splitlines()
+        assert 'arq_local_cache_hits_total{namespace="job"} 32' in lines
+        assert 'arq_local_cache_misses_total{namespace="job"} 1' in lines
+        assert "# TYPE arq_local_cache_latency_seconds histogram" in lines
+        assert 'arq_local_cache_latency_seconds_count{tier="ram",op="read"} 2' in lines
+        assert 'arq_local_cache_latency_seconds_bucket{tier="ram",op="read",le="+Inf"} 2' in lines
+        buckets = [
+            int(line.rsplit(" ", 1)[1]) for line in lines
+            if line.startswith('arq_local_cache_latency_seconds_bucket{tier="ram"')
+        ]
+        assert buckets == sorted(buckets)
+        assert "arq_local_cache_db_entries 1" in lines
+        assert text.endswith("\n")
+
+
+@pytest_asyncio.fixture
+async def async_cache(tmp_path):
+    cache = AsyncHybridLocalCache(cache_dir=str(tmp_path / "cache"))
+    yield cache
+    await cache.aclose()
+
+
+class TestAsyncCache:
+    """Tests for the event-loop facade."""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_ram_hit_stays_on_loop(self, async_cache, monkeypatch):
+        """Test a RAM hit is answered without any executor round trip."""
+        await async_cache.set("k", {"v": 1})
+        loop = asyncio.get_running_loop()
+
+        def no_executor(*args, **kwargs):
+            raise AssertionError("RAM hit left the event loop")
+
+        monkeypatch.setattr(loop, "run_in_executor", no_executor)
+        assert await async_cache.get("k") == {"v": 1}
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_load(self, async_cache, monkeypatch):
+        """Test a stampede of awaits for one cold key reads disk once."""
+        await async_cache.set("k", "value")
+        async_cache.cache.clear_memory()
+        reads = []
+        release = threading.Event()
+        read = async_cache.cache._read_from_db
+
+        def slow_read(key):
+            reads.append(key)
+            release.wait(5)
+            return read(key)
+
+        monkeypatch.setattr(async_cache.cache, "_read_from_db", slow_read)
+        waiters = [asyncio.ensure_future(async_cache.get("k")) for _ in range(50)]
+        await asyncio.sleep(0.05)
+        release.set()
+        assert await asyncio.gather(*waiters) == ["value"] * 50
+        assert reads == ["k"]
+        assert async_cache._loads == {}
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_keeps_shared_load(self, async_cache):
+        """Test cancelling one awaiting caller does not fail the others."""
+        await async_cache.set("k", 1)
+        async_cache.cache.clear_memory()
+        first = asyncio.ensure_future(async_cache.get("k"))
+        second = asyncio.ensure_future(async_cache.get("k"))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == 1
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_get_after_delete_skips_older_load(self, async_cache):
+        """Test a get issued after delete does not join a load from before it."""
+        await async_cache.set("k", 1)
+        async_cache.cache.clear_memory()
+        before = asyncio.ensure_future(async_cache.get("k"))
+        await asyncio.sleep(0)
+        await async_cache.delete("k")
+        assert await async_cache.get("k") is None
+        await before
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_writes_persist_in_order(self, tmp_path):
+        """Test writes reach SQLite through the single writer, last one winning."""
+        async with AsyncHybridLocalCache(cache_dir=str(tmp_path / "cache")) as cache:
+            await asyncio.gather(*(cache.set("k", i) for i in range(20)))
+            await cache.set_many({"a": 1, "b": 2})
+            await cache.delete_many(["b"])
+            assert await cache.get_many(["k", "a", "b"]) == {"k": 19, "a": 1}
+        reopened = HybridLocalCache(cache_dir=str(tmp_path / "cache"))
+        try:
+            assert reopened.get_many(["k", "a", "b"]) == {"k": 19, "a": 1}
+        finally:
+            reopened.close()
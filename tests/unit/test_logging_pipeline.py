@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Unit tests for the structured logging pipeline.
+
+Tests for:
+- JSON record formatting with extras
+- Deferred formatting and drop counting in the queue handler
+- Per-route access-log sampling
+- Middleware access logs honoring the sampler
+"""
+
+import json
+import logging
+import queue
+import sys
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from logging_pipeline import (
+    JSONFormatter, NonBlockingQueueHandler, RouteSampler, setup_logging, shutdown_logging,
+)
+from middleware import RequestPipelineMiddleware
+
+
+def _record(msg="hello %s", args=("world",), **extra):
+    record = logging.LogRecord("arq.test", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestJSONFormatter:
+    """Tests for JSON line output."""
+
+    @pytest.mark.unit
+    def test_message_and_extras(self):
+        """Test the message is interpolated and extras become fields."""
+        payload = json.loads(JSONFormatter().format(_record(request_id="abc", status_code=200)))
+        assert payload["message"] == "hello world"
+        assert payload["level"] == "INFO" and payload["logger"] == "arq.test"
+        assert payload["request_id"] == "abc" and payload["status_code"] == 200
+        assert "args" not in payload and "msg" not in payload
+
+    @pytest.mark.unit
+    def test_exception_is_included(self):
+        """Test exc_info is rendered into an exception field."""
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            record = _record()
+            record.exc_info = sys.exc_info()
+        payload = json.loads(JSONFormatter().format(record))
+        assert "RuntimeError: boom" in payload["exception"]
+
+
+class TestQueueHandler:
+    """Tests for the non-blocking queue handoff."""
+
+    @pytest.mark.unit
+    def test_formatting_is_deferred(self):
+        """Test the queued record still holds the unformatted template and args."""
+        log_queue = queue.Queue()
+        NonBlockingQueueHandler(log_queue).handle(_record())
+        queued = log_queue.get_nowait()
+        assert queued.msg == "hello %s" and queued.args == ("world",)
+
+    @pytest.mark.unit
+    def test_full_queue_drops(self):
+        """Test overflow is counted instead of blocking or raising."""
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=2))
+        for _ in range(5):
+            handler.handle(_record())
+        assert handler.dropped == 3
+
+    @pytest.mark.unit
+    def test_setup_writes_json_lines(self, capsys):
+        """Test records flow through the listener thread to stdout."""
+        setup_logging("INFO", fmt="json")
+        try:
+            logging.getLogger("arq.test").info("user %s logged in", 42, extra={"user_id": 42})
+        finally:
+            shutdown_logging()
+        line = capsys.readouterr().out.strip().splitlines()[-1]
+        assert json.loads(line)["message"] == "user 42 logged in"
+
+
+class TestRouteSampler:
+    """Tests for access-log sampling."""
+
+    @pytest.mark.unit
+    def test_errors_and_slow_requests_always_kept(self):
+        """Test sampling never hides failures or slow requests."""
+        sampler = RouteSampler(default_rate=0, slow_request_ms=500)
+        assert sampler.should_log("/x", 500, 1)
+        assert sampler.should_log("/x", 404, 1)
+        assert sampler.should_log("/x", 200, 800)
+        assert not sampler.should_log("/x", 200, 1)
+
+    @pytest.mark.unit
+    def test_rate_keeps_one_in_n(self):
+        """Test a 0.25 rate keeps every fourth success."""
+        sampler = RouteSampler(default_rate=0.25)
+        kept = [sampler.should_log("/x", 200, 1) for _ in range(8)]
+        assert kept.count(True) == 2
+
+    @pytest.mark.unit
+    def test_longest_prefix_wins(self):
+        """Test route overrides match on the most specific prefix."""
+        settings = SimpleNamespace(
+            LOG_SUCCESS_SAMPLE_RATE=1.0,
+            LOG_ROUTE_SAMPLE_RATES="/status=0, /status/database=0.5",
+            LOG_SLOW_REQUEST_MS=1000,
+        )
+        sampler = RouteSampler.from_settings(settings)
+        assert sampler.rate_for("/status/database") == ("/status/database", 0.5)
+        assert sampler.rate_for("/status/api-log") == ("/status", 0.0)
+        assert sampler.rate_for("/memory/1") == ("", 1.0)
+
+
+class TestSampledAccessLog:
+    """Tests for the middleware access log."""
+
+    @pytest.mark.unit
+    def test_successes_sampled_errors_kept(self, caplog):
+        """Test sampled-out routes still log their failures."""
+        app = FastAPI()
+        app.add_middleware(RequestPipelineMiddleware, sampler=RouteSampler(route_rates={"/health": 0}))
+
+        @app.get("/health")
+        async def health(fail: bool = False):
+            if fail:
+                raise ValueError("unhealthy")
+            return {"ok": True}
+
+        client = TestClient(app)
+        with caplog.at_level(logging.INFO, logger="middleware"):
+            client.get("/health")
+            client.get("/health", params={"fail": "true"})
+
+        access = [r for r in caplog.records if r.getMessage().startswith("Response:")]
+        assert [r.status_code for r in access] == [400]
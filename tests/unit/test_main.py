@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Unit tests for the application entry point.
+
+Tests for:
+- Database engine set up from Settings in the lifespan
+- The fused request pipeline as the app's only middleware
+- API request logs written through the batched writer
+- Access-log sampling configured from LOG_* settings
+- Embedded ARQ workers started by one server process only
+"""
+
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api_log_writer
+import arq_worker
+import database
+import serving
+
+
+@pytest.fixture
+def app_settings(tmp_path, monkeypatch):
+    """Settings pointing the app at a throwaway SQLite database."""
+    from config import settings
+    monkeypatch.setattr(settings, "DATABASE_URL", f"sqlite:///{tmp_path / 'arq.db'}")
+    monkeypatch.setattr(settings, "PARTITION_MAINTENANCE_INTERVAL", 0)
+    return settings
+
+
+@pytest.fixture
+def client(app_settings):
+    import main
+    with TestClient(main.app) as client:
+        yield client
+
+
+class TestLifespan:
+    """Tests for startup and shutdown wiring."""
+
+    @pytest.mark.unit
+    def test_engine_built_from_settings(self, app_settings, monkeypatch):
+        """Test the pool is sized from DATABASE_* settings and closed on shutdown."""
+        monkeypatch.setattr(app_settings, "DATABASE_POOL_SIZE", 3)
+        monkeypatch.setattr(app_settings, "DATABASE_MAX_OVERFLOW", 1)
+        import main
+        with TestClient(main.app):
+            manager = database._db_manager
+            assert manager.config.pool_size == 3
+            assert manager.pool_status()["size"] == 3
+        assert database._db_manager is None
+
+
+class TestMiddleware:
+    """Tests for the mounted request pipeline."""
+
+    @pytest.mark.unit
+    def test_pipeline_is_the_only_layer(self, client):
+        """Test responses carry request ids and CORS headers from the fused layer."""
+        from middleware import RequestPipelineMiddleware
+        import main
+        assert [m.cls for m in main.app.user_middleware] == [RequestPipelineMiddleware]
+
+        response = client.get("/health", headers={"Origin": "https://example.com"})
+        assert response.status_code == 200
+        assert response.headers["X-Request-ID"]
+        assert response.headers["Access-Control-Allow-Origin"] == "https://example.com"
+        assert "Access-Control-Allow-Credentials" not in response.headers
+
+        preflight = client.options("/health", headers={
+            "Origin": "https://example.com",
+            "Access-Control-Request-Method": "PATCH",
+        })
+        assert preflight.status_code == 200
+        assert preflight.headers["Access-Control-Allow-Methods"] == "*"
+
+
+class TestAPILogs:
+    """Tests for api_logs persistence through the app."""
+
+    @pytest.mark.unit
+    def test_requests_written_to_api_logs(self, app_settings, tmp_path):
+        """Test requests through the app land in api_logs, flushed on shutdown."""
+        import main
+        with TestClient(main.app) as client:
+            assert api_log_writer.get_api_log_writer() is not None
+            for _ in range(3):
+                assert client.get("/health").status_code == 200
+        assert api_log_writer.get_api_log_writer() is None
+
+        conn = sqlite3.connect(tmp_path / "arq.db")
+        try:
+            rows = conn.execute("SELECT endpoint, method, status_code FROM api_logs").fetchall()
+        finally:
+            conn.close()
+        assert rows == [("/health", "GET", 200)] * 3
+
+    @pytest.mark.unit
+    def test_disabled_writer(self, app_settings, monkeypatch):
+        """Test API_LOG_ENABLED=false leaves the app without a writer."""
+        monkeypatch.setattr(app_settings, "API_LOG_ENABLED", False)
+        import main
+        with TestClient(main.app) as client:
+            client.get("/health")
+            assert api_log_writer.get_api_log_writer() is None
+
+
+class TestAccessLogSampling:
+    """Tests for the LOG_* sampling settings."""
+
+    @pytest.mark.unit
+    def test_app_sampler_from_settings(self, app_settings):
+        """Test the mounted pipeline uses the configured sampler (/health=0 by default)."""
+        import main
+        sampler = main.app.user_middleware[0].kwargs["sampler"]
+        assert sampler.route_rates == [("/health", 0.0)]
+        assert not sampler.should_log("/health", 200, 1.0)
+        assert sampler.should_log("/health", 500, 1.0)
+
+    @pytest.mark.unit
+    def test_settings_change_sampling(self, app_settings, monkeypatch):
+        """Test changing LOG_* settings changes which access lines are kept."""
+        import main
+        monkeypatch.setattr(app_settings, "LOG_ROUTE_SAMPLE_RATES", "")
+        monkeypatch.setattr(app_settings, "LOG_SUCCESS_SAMPLE_RATE", 0.5)
+        monkeypatch.setattr(app_settings, "LOG_SLOW_REQUEST_MS", 10)
+        options = main.pipeline_options(app_settings)
+        sampler = options["sampler"]
+        assert options["slow_request_threshold_ms"] == 10
+        assert [sampler.should_log("/health", 200, 1.0) for _ in range(4)] == [True, False, True, False]
+        assert sampler.should_log("/health", 200, 50.0)  # slow: always kept
+
+
+class TestEmbeddedWorkers:
+    """Tests for ARQ_EMBEDDED_WORKERS under several server processes."""
+
+    @pytest.mark.unit
+    def test_pool_lock_is_exclusive(self, tmp_path):
+        """Test a second holder is refused until the first releases the lock."""
+        path = str(tmp_path / "embedded_workers.lock")
+        first = arq_worker.acquire_pool_lock(path)
+        assert first is not None
+        assert arq_worker.acquire_pool_lock(path) is None
+        first.close()
+        second = arq_worker.acquire_pool_lock(path)
+        assert second is not None
+        second.close()
+
+    @pytest.mark.unit
+    def test_only_lock_holder_starts_pool(self, app_settings, tmp_path, monkeypatch):
+        """Test a server process skips the pool while another one runs it."""
+        started, stopped = [], []
+        monkeypatch.setattr(app_settings, "ARQ_DATA_DIR", str(tmp_path))
+        monkeypatch.setattr(app_settings, "ARQ_EMBEDDED_WORKERS", 2)
+        monkeypatch.setattr(arq_worker, "start_worker_pool", lambda n: started.append(n) or ["pool"])
+        monkeypatch.setattr(arq_worker, "stop_worker_pool", stopped.append)
+        exempted = []
+        monkeypatch.setattr(serving, "exempt_from_recycling", lambda: exempted.append(True))
+        import main
+
+        other_process = arq_worker.acquire_pool_lock(str(tmp_path / "embedded_workers.lock"))
+        with TestClient(main.app):
+            assert started == [] and exempted == []
+        other_process.close()
+
+        with TestClient(main.app):
+            assert started == [2] and exempted == [True]
+        assert stopped == [["pool"]]
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""Unit tests for the request middleware.
+
+Tests for:
+- Fused pure-ASGI pipeline matching the BaseHTTPMiddleware stack
+- Error envelopes, CORS preflight and request id propagation
+- Plain OPTIONS routing and CORS headers on error envelopes
+- Streaming responses passing through unbuffered
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from api_log_writer import APILogWriter
+from middleware import (
+    CORSMiddleware,
+    ErrorHandlingMiddleware,
+    LoggingMiddleware,
+    PerformanceMonitoringMiddleware,
+    RequestIDMiddleware,
+    RequestPipelineMiddleware,
+)
+
+
+def _routes(app: FastAPI) -> FastAPI:
+    @app.get("/ok")
+    async def ok(request: Request):
+        return {"request_id": request.state.request_id}
+
+    @app.get("/value-error")
+    async def value_error():
+        raise ValueError("bad value")
+
+    @app.get("/key-error")
+    async def key_error():
+        raise KeyError("name")
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    @app.get("/stream")
+    async def stream():
+        return StreamingResponse(iter([b"a", b"b", b"c"]), media_type="text/plain")
+
+    return app
+
+
+def legacy_app(log_writer=None) -> FastAPI:
+    app = FastAPI()
+    # add_middleware prepends, so add innermost first
+    app.add_middleware(PerformanceMonitoringMiddleware)
+    app.add_middleware(CORSMiddleware, allowed_origins=["https://arq.example"])
+    app.add_middleware(ErrorHandlingMiddleware)
+    app.add_middleware(LoggingMiddleware, log_writer=log_writer)
+    app.add_middleware(RequestIDMiddleware)
+    return _routes(app)
+
+
+def fused_app(log_writer=None) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(
+        RequestPipelineMiddleware, allowed_origins=["https://arq.example"], log_writer=log_writer
+    )
+    return _routes(app)
+
+
+def _normalize(response, cors: bool = True) -> dict:
+    headers = {
+        name: value for name, value in response.headers.items()
+        if name not in ("x-request-id", "x-response-time", "content-length", "date")
+        and (cors or not name.startswith("access-control-"))
+    }
+    body = response.json() if "json" in response.headers.get("content-type", "") else response.text
+    if isinstance(body, dict):
+        body.get("error", {}).pop("timestamp", None)
+        body.get("error", {}).pop("request_id", None)
+        body.pop("request_id", None)
+    return {"status": response.status_code, "headers": headers, "body": body}
+
+
+class TestRequestPipelineEquivalence:
+    """The fused middleware behaves like the five-layer stack."""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("method,path,headers", [
+        ("GET", "/ok", {"origin": "https://arq.example"}),
+        ("GET", "/ok", {"origin": "https://evil.example"}),
+        ("GET", "/value-error", {}),
+        ("GET", "/key-error", {}),
+        ("GET", "/boom", {"origin": "https://arq.example"}),
+        ("GET", "/stream", {}),
+        ("OPTIONS", "/ok", {"origin": "https://arq.example", "access-control-request-method": "GET"}),
+    ])
+    def test_same_responses(self, method, path, headers):
+        """Test status, headers and body match the legacy stack."""
+        legacy = TestClient(legacy_app(), raise_server_exceptions=False)
+        fused = TestClient(fused_app(), raise_server_exceptions=False)
+        expected = legacy.request(method, path, headers=headers)
+        actual = fused.request(method, path, headers=headers)
+        # The legacy stack builds error envelopes outside its CORS layer (see TestCORS)
+        cors = expected.status_code < 400
+        assert _normalize(actual, cors) == _normalize(expected, cors)
+        assert "x-request-id" in actual.headers and "x-response-time" in actual.headers
+
+    @pytest.mark.unit
+    def test_request_id_is_shared(self):
+        """Test handlers and error envelopes see the id sent back in X-Request-ID."""
+        client = TestClient(fused_app())
+        response = client.get("/ok")
+        assert response.json()["request_id"] == response.headers["x-request-id"]
+        response = client.get("/value-error")
+        assert response.json()["error"]["request_id"] == response.headers["x-request-id"]
+
+    @pytest.mark.unit
+    def test_api_log_records_match(self):
+        """Test both stacks hand the same record to the API log writer."""
+        legacy_writer, fused_writer = APILogWriter(engine=None), APILogWriter(engine=None)
+        TestClient(legacy_app(legacy_writer)).get("/ok", headers={"user-agent": "pytest"})
+        TestClient(fused_app(fused_writer)).get("/ok", headers={"user-agent": "pytest"})
+
+        def fields(record):
+            return record._replace(processing_time=0, created_at=None)
+
+        assert fields(fused_writer._buffer[0]) == fields(legacy_writer._buffer[0])
+
+
+class TestCORS:
+    """CORS handling where the pipeline deliberately differs from the legacy stack."""
+
+    @pytest.mark.unit
+    def test_plain_options_reaches_app(self):
+        """Test OPTIONS without preflight headers is routed instead of answered empty."""
+        app = fused_app()
+
+        @app.options("/probe")
+        async def probe():
+            return {"allow": "GET"}
+
+        client = TestClient(app)
+        assert client.options("/probe").json() == {"allow": "GET"}
+        assert client.options("/ok", headers={"origin": "https://arq.example"}).status_code == 405
+
+    @pytest.mark.unit
+    def test_error_envelope_has_cors_headers(self):
+        """Test browsers can read error envelopes from allowed origins."""
+        client = TestClient(fused_app(), raise_server_exceptions=False)
+        response = client.get("/boom", headers={"origin": "https://arq.example"})
+        assert response.status_code == 500
+        assert response.headers["access-control-allow-origin"] == "https://arq.example"
+        response = client.get("/value-error", headers={"origin": "https://evil.example"})
+        assert "access-control-allow-origin" not in response.headers
+
+
+class TestStreaming:
+    """Streaming responses are not buffered by the pipeline."""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_chunks_pass_through(self):
+        """Test each body chunk is forwarded as its own ASGI message."""
+        app = fused_app()
+        messages = []
+        requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            await asyncio.Event().wait()  # client stays connected
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": "/stream", "raw_path": b"/stream",
+            "root_path": "", "query_string": b"", "headers": [], "client": ("127.0.0.1", 1),
+            "server": ("testserver", 80),
+        }
+        await app(scope, receive, send)
+        chunks = [m["body"] for m in messages if m["type"] == "http.response.body" and m["body"]]
+        assert chunks == [b"a", b"b", b"c"]
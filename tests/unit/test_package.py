@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Unit tests for the package's lazy exports.
+
+Tests for:
+- Exports resolved on first attribute access (PEP 562)
+- Import-time budget for ``import src``
+"""
+
+import os
+import runpy
+
+import pytest
+
+BENCH = runpy.run_path(
+    os.path.join(os.path.dirname(__file__), "..", "..", "scripts", "benchmarks", "bench_import_time.py")
+)
+
+# Generous for slow CI machines; the eager package took hundreds of milliseconds
+IMPORT_BUDGET_MS = 50.0
+HEAVY_MODULES = {"sqlalchemy", "fastapi", "starlette", "pydantic", "pydantic_settings", "httpx"}
+
+
+class TestLazyExports:
+    """Tests for attribute-level lazy loading."""
+
+    @pytest.mark.unit
+    def test_exports_resolve_to_flat_modules(self):
+        """Test exports are the same objects the app imports by flat name."""
+        import src
+        import config
+        import middleware
+
+        assert src.Settings is config.Settings
+        assert src.RequestPipelineMiddleware is middleware.RequestPipelineMiddleware
+        assert "Settings" in vars(src)  # cached after first access
+
+    @pytest.mark.unit
+    def test_public_api_listed(self):
+        """Test __all__ and dir() cover every lazy export."""
+        import src
+
+        assert set(src.__all__) <= set(dir(src))
+        assert "Environment" not in src.__all__
+
+    @pytest.mark.unit
+    def test_unknown_attribute(self):
+        """Test unknown names raise AttributeError."""
+        import src
+
+        with pytest.raises(AttributeError):
+            src.DoesNotExist
+
+
+class TestImportTime:
+    """Tests for the import-time regression budget."""
+
+    @pytest.mark.unit
+    def test_parse_importtime(self):
+        """Test -X importtime lines are parsed and the header skipped."""
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   typing\n"
+            "import time:        40 |        160 | src\n"
+        )
+        timings = BENCH["parse_importtime"](stderr)
+        assert [(t.module.strip(), t.self_us, t.cumulative_us) for t in timings] == [
+            ("typing", 120, 120),
+            ("src", 40, 160),
+        ]
+
+    @pytest.mark.unit
+    def test_package_import_within_budget(self):
+        """Test ``import src`` skips heavy frameworks and stays within budget."""
+        result = BENCH["measure"]("src", runs=3)
+        assert not {name.split(".")[0] for name in result["modules"]} & HEAVY_MODULES
+        assert result["cumulative_ms"] < IMPORT_BUDGET_MS
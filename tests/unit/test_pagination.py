@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Unit tests for keyset (cursor) pagination.
+
+Tests for:
+- Opaque cursor encoding and validation
+- Paging message history with duplicate timestamps
+- Ranked memory paging and full-history iteration
+- The GET /messages endpoint, including malformed cursors
+- Index usage of keyset queries
+"""
+
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+import routes
+from database import get_db_read_session
+from memory import MemoryManager, MEMORY_KEYSET
+from messages import MessageManager, MESSAGE_KEYSET
+from models import Base, Memory, Message, Session as SessionModel, User
+from schema_migrations import run_migrations
+from utils import CursorHelper
+
+
+@pytest_asyncio.fixture
+async def db_session():
+    """Async SQLite session with one user, one session, 230 messages and 120 memories."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(run_migrations)
+
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with factory() as session:
+        session.add(User(id=1, username="u", email="u@example.com", hashed_password="x"))
+        session.add(SessionModel(id=1, user_id=1, session_token="t", context_id="c"))
+        base = datetime(2025, 1, 1)
+        for i in range(230):
+            # Groups of five share a timestamp so the id tie-breaker matters
+            session.add(Message(
+                session_id=1, user_id=1, role="user", content=f"m{i}",
+                created_at=base + timedelta(seconds=i // 5),
+            ))
+        for i in range(120):
+            session.add(Memory(
+                user_id=1, session_id=1, memory_type="long_term", key=f"k{i}", value="v",
+                importance=(i % 4) / 4, updated_at=base + timedelta(minutes=i % 7),
+            ))
+        await session.commit()
+        yield session
+    await engine.dispose()
+
+
+class TestCursorHelper:
+    """Tests for opaque cursor encoding."""
+
+    @pytest.mark.unit
+    def test_round_trip(self):
+        """Test cursor values survive encoding."""
+        cursor = CursorHelper.encode_cursor("message", ["2025-01-01T00:00:00", 42])
+        assert CursorHelper.decode_cursor(cursor, "message") == ["2025-01-01T00:00:00", 42]
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("cursor", ["!!!", "bm90LWpzb24", CursorHelper.encode_cursor("memory", [1])])
+    def test_rejects_invalid_or_foreign_cursor(self, cursor):
+        """Test garbage and cursors of another kind raise ValueError."""
+        with pytest.raises(ValueError):
+            MESSAGE_KEYSET.decode(cursor)
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("values", [
+        ["2025-01-01T00:00:00", "42"],
+        ["2025-01-01T00:00:00", 4.2],
+        ["2025-01-01T00:00:00", True],
+        [20250101, 42],
+    ])
+    def test_rejects_mistyped_keys(self, values):
+        """Test every key must match its column's type, not just timestamps."""
+        with pytest.raises(ValueError, match="Invalid pagination cursor"):
+            MESSAGE_KEYSET.decode(CursorHelper.encode_cursor("message", values))
+
+    @pytest.mark.unit
+    def test_coerces_keys_to_column_types(self):
+        """Test timestamps are parsed and integral importances become floats."""
+        cursor = CursorHelper.encode_cursor("memory", [1, "2025-01-01T00:00:00", 7])
+        importance, updated_at, memory_id = MEMORY_KEYSET.decode(cursor)
+        assert isinstance(importance, float) and importance == 1.0
+        assert updated_at == datetime(2025, 1, 1) and memory_id == 7
+
+
+class TestMessagePaging:
+    """Tests for MessageManager keyset paging."""
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_pages_cover_history_exactly_once(self, db_session):
+        """Test walking pages returns every message once, in order."""
+        manager = MessageManager(db_session)
+        seen, cursor = [], None
+        while True:
+            page, cursor = await manager.get_messages_page(1, limit=50, cursor=cursor)
+            seen.extend(message.content for message in page)
+            if cursor is None:
+                break
+        assert seen == [f"m{i}" for i in range(230)]
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_last_page_has_no_cursor(self, db_session):
+        """Test an exact final page does not hand out a dangling cursor."""
+        page, cursor = await MessageManager(db_session).get_messages_page(1, limit=230)
+        assert len(page) == 230
+        assert cursor is None
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_iter_messages_batches(self, db_session):
+        """Test streaming iteration yields bounded batches."""
+        sizes = [len(batch) async for batch in MessageManager(db_session).iter_messages(1, batch_size=100)]
+        assert sizes == [100, 100, 30]
+
+
+class TestMessagesEndpoint:
+    """Tests for GET /api/v1/messages."""
+
+    @pytest_asyncio.fixture
+    async def client(self, db_session):
+        app = FastAPI()
+        app.include_router(routes.router)
+
+        async def override():
+            yield db_session
+
+        app.dependency_overrides[get_db_read_session] = override
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_cursor_pages(self, client):
+        """Test next_cursor from one page fetches the next."""
+        first = (await client.get("/api/v1/messages", params={"session_id": 1, "limit": 100})).json()
+        assert first["has_more"] and first["items"][0]["content"] == "m0"
+        second = (await client.get("/api/v1/messages", params={
+            "session_id": 1, "limit": 100, "cursor": first["next_cursor"],
+        })).json()
+        assert second["items"][0]["content"] == "m100"
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("cursor", [
+        "not-a-cursor",
+        CursorHelper.encode_cursor("memory", [0.5, "x", 1]),
+        CursorHelper.encode_cursor("message", ["2025-01-01T00:00:00", "1 OR 1=1"]),
+    ])
+    async def test_malformed_cursor_is_400(self, client, cursor):
+        """Test an invalid or foreign cursor is a client error, not a 500."""
+        response = await client.get("/api/v1/messages", params={"session_id": 1, "cursor": cursor})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid pagination cursor"
+
+
+class TestMemoryPaging:
+    """Tests for MemoryManager keyset paging."""
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_pages_match_ranked_order(self, db_session):
+        """Test paged results equal one unpaged ranked query."""
+        manager = MemoryManager(db_session)
+        expected = [m.id for m in await manager.retrieve_memories(1, limit=1000)]
+
+        seen = []
+        async for batch in manager.iter_memories(1, batch_size=17):
+            seen.extend(memory.id for memory in batch)
+        assert seen == expected
+        assert len(seen) == 120
+
+
+class TestKeysetQueryPlans:
+    """EXPLAIN QUERY PLAN checks for keyset seeks on SQLite."""
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    def test_keyset_seek_uses_index(self):
+        """Test a deep page seeks the composite index without sorting."""
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            Base.metadata.create_all(conn)
+            run_migrations(conn)
+
+        cursor = CursorHelper.encode_cursor("message", ["2025-01-01T00:00:30", 150])
+        query = MESSAGE_KEYSET.apply(MessageManager._session_messages_query(1), cursor, 50)
+        sql = str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+        with engine.connect() as conn:
+            plan = "\n".join(row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql)))
+        assert "idx_message_session_keyset" in plan
+        assert "TEMP B-TREE" not in plan
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""Unit tests for monthly partitioning and retention.
+
+Tests for:
+- Month arithmetic and partition naming
+- SQLite table rotation into monthly archive tables
+- Retention dropping whole partitions
+- Partition-pruned message history queries
+- What readers of the live SQLite table miss, and the history views
+- Native PostgreSQL partitions (optional, ARQ_TEST_POSTGRES_URL)
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import create_engine, func, inspect, select, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from messages import MessageManager
+from models import APILog, Base, Message, Session as SessionModel, User
+from partitioning import (
+    PartitionManager, PartitionPolicy, add_months, history_view_name, month_floor, parse_partition_month,
+    partition_name,
+)
+from schema_migrations import run_migrations
+
+
+POSTGRES_URL = os.getenv("ARQ_TEST_POSTGRES_URL")
+NOW = datetime(2026, 10, 18, 12, 0)
+POLICIES = (
+    PartitionPolicy("messages"),
+    PartitionPolicy("api_logs", retention_months=2),
+    PartitionPolicy("system_events", retention_months=6),
+)
+
+
+def _seed(conn):
+    """One session with 10 messages and 10 API logs in each of July..October 2026."""
+    conn.execute(User.__table__.insert().values(id=1, username="u", email="u@example.com", hashed_password="x"))
+    conn.execute(SessionModel.__table__.insert().values(id=1, user_id=1, session_token="t", context_id="c"))
+    for month in range(7, 11):
+        for i in range(10):
+            created = datetime(2026, month, 1) + timedelta(hours=i)
+            conn.execute(Message.__table__.insert().values(
+                session_id=1, user_id=1, role="user", content=f"{month}-{i}", created_at=created,
+            ))
+            conn.execute(APILog.__table__.insert().values(
+                endpoint="/health", method="GET", status_code=200, created_at=created,
+            ))
+
+
+@pytest.fixture
+def sqlite_engine():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        run_migrations(conn)
+        _seed(conn)
+    yield engine
+    engine.dispose()
+
+
+class TestMonthArithmetic:
+    """Tests for partition bounds and names."""
+
+    @pytest.mark.unit
+    def test_add_months_crosses_years(self):
+        """Test month offsets wrap around year boundaries both ways."""
+        assert add_months(datetime(2026, 11, 1), 3) == datetime(2027, 2, 1)
+        assert add_months(datetime(2026, 1, 1), -1) == datetime(2025, 12, 1)
+        assert month_floor(NOW) == datetime(2026, 10, 1)
+
+    @pytest.mark.unit
+    def test_partition_names_round_trip(self):
+        """Test names parse back to their month and foreign names are ignored."""
+        name = partition_name("messages", datetime(2026, 9, 1))
+        assert name == "messages_p202609"
+        assert parse_partition_month("messages", name) == datetime(2026, 9, 1)
+        assert parse_partition_month("messages", "message_embeddings_p202609") is None
+        assert parse_partition_month("api_logs", "api_logs_default") is None
+
+    @pytest.mark.unit
+    def test_retention_cutoff(self):
+        """Test the current month plus N full months are retained."""
+        assert PartitionPolicy("t", retention_months=2).retention_cutoff(NOW) == datetime(2026, 8, 1)
+        assert PartitionPolicy("t").retention_cutoff(NOW) is None
+
+
+class TestSQLiteRotation:
+    """Tests for the SQLite archive-table scheme."""
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    def test_rotation_moves_closed_months(self, sqlite_engine):
+        """Test closed months leave the ORM table for per-month archives."""
+        manager = PartitionManager(POLICIES)
+        with sqlite_engine.begin() as conn:
+            rotated = manager.rotate(conn, NOW)
+            assert "messages_p202607" in rotated and "api_logs_p202609" in rotated
+            assert manager.partitions(conn, "messages") == [
+                datetime(2026, 7, 1), datetime(2026, 8, 1), datetime(2026, 9, 1)
+            ]
+            assert conn.execute(select(func.count()).select_from(Message.__table__)).scalar() == 10
+            archived = conn.execute(text("SELECT count(*) FROM messages_p202608")).scalar()
+            assert archived == 10
+            # Rotation is idempotent once closed months are archived
+            assert manager.rotate(conn, NOW) == []
+
+        index_names = {index["name"] for index in inspect(sqlite_engine).get_indexes("messages_p202608")}
+        assert "idx_message_session_keyset_p202608" in index_names
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    def test_ids_stay_unique_after_rotation(self, sqlite_engine):
+        """Test new rows never reuse ids that moved into archives."""
+        manager = PartitionManager(POLICIES)
+        with sqlite_engine.begin() as conn:
+            manager.rotate(conn, datetime(2026, 11, 1))
+            assert conn.execute(select(func.count()).select_from(Message.__table__)).scalar() == 0
+            result = conn.execute(Message.__table__.insert().values(
+                session_id=1, user_id=1, role="user", content="new", created_at=datetime(2026, 11, 2),
+            ))
+            assert result.inserted_primary_key[0] == 41
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    def test_retention_drops_whole_archives(self, sqlite_engine):
+        """Test expired months are dropped as tables, unlimited policies keep everything."""
+        manager = PartitionManager(POLICIES)
+        with sqlite_engine.begin() as conn:
+            result = manager.maintain(conn, NOW)
+            assert result["created"] == []
+            assert result["dropped"] == ["api_logs_p202607"]
+            assert manager.partitions(conn, "api_logs") == [datetime(2026, 8, 1), datetime(2026, 9, 1)]
+            assert len(manager.partitions(conn, "messages")) == 3
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    def test_history_views_span_archives(self, sqlite_engine):
+        """Test the ORM relationship sees only the live month while the view keeps all history."""
+        manager = PartitionManager(POLICIES)
+        with sqlite_engine.begin() as conn:
+            result = manager.maintain(conn, NOW)
+            assert result["views"] == ["messages_history", "api_logs_history", "system_events_history"]
+            # Known limitation: relationships and raw queries on the ORM table miss archived months
+            with Session(bind=conn) as session:
+                contents = [message.content for message in session.get(SessionModel, 1).messages]
+            assert sorted(contents) == [f"10-{i}" for i in range(10)]
+
+            view = history_view_name("messages")
+            assert conn.execute(text(f"SELECT count(*) FROM {view}")).scalar() == 40
+            # Retention-dropped months leave the view on the next refresh
+            assert conn.execute(text("SELECT count(*) FROM api_logs_history")).scalar() == 30
+
+            manager.rotate(conn, datetime(2026, 11, 1))
+            manager.refresh_history_views(conn)
+            assert conn.execute(text(f"SELECT count(*) FROM {view}")).scalar() == 40
+
+
+class TestPrunedQueries:
+    """Tests for partition-pruned message history reads."""
+
+    @pytest_asyncio.fixture
+    async def rotated_session(self):
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(_seed)
+            await conn.run_sync(PartitionManager(POLICIES).rotate, NOW)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+            yield session
+        await engine.dispose()
+
+    @pytest.mark.unit
+    def test_range_selects_only_overlapping_archives(self):
+        """Test the UNION covers just the archives overlapping the range."""
+        manager = PartitionManager(POLICIES)
+        months = [datetime(2026, 7, 1), datetime(2026, 8, 1), datetime(2026, 9, 1)]
+        assert manager.pruned_entity(Message, "sqlite", months, datetime(2026, 10, 2)) is Message
+        assert manager.pruned_entity(Message, "postgresql", months) is Message
+
+        entity = manager.pruned_entity(Message, "sqlite", months, datetime(2026, 8, 15), datetime(2026, 10, 2))
+        sql = str(select(entity).compile())
+        assert "messages_p202608" in sql and "messages_p202609" in sql
+        assert "messages_p202607" not in sql
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_history_spans_archives(self, rotated_session):
+        """Test paging walks archived and live months in order."""
+        manager = MessageManager(rotated_session)
+        contents, cursor = [], None
+        while True:
+            page, cursor = await manager.get_messages_page(1, limit=7, cursor=cursor)
+            contents += [message.content for message in page]
+            if cursor is None:
+                break
+        assert contents == [f"{month}-{i}" for month in range(7, 11) for i in range(10)]
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_range_filter(self, rotated_session):
+        """Test since/until bound the history to the requested months."""
+        manager = MessageManager(rotated_session)
+        page, cursor = await manager.get_messages_page(
+            1, limit=100, since=datetime(2026, 8, 1), until=datetime(2026, 9, 1)
+        )
+        assert cursor is None
+        assert [message.content for message in page] == [f"8-{i}" for i in range(10)]
+
+
+@pytest.mark.skipif(not POSTGRES_URL, reason="ARQ_TEST_POSTGRES_URL not set")
+class TestPostgreSQLPartitions:
+    """Native range partitioning on PostgreSQL (sync driver URL via ARQ_TEST_POSTGRES_URL)."""
+
+    @pytest.fixture
+    def pg_engine(self):
+        engine = create_engine(POSTGRES_URL)
+        with engine.begin() as conn:
+            Base.metadata.drop_all(conn)
+            conn.execute(text("DROP TABLE IF EXISTS schema_migrations"))
+            Base.metadata.create_all(conn)
+            _seed(conn)
+            run_migrations(conn)
+        yield engine
+        with engine.begin() as conn:
+            Base.metadata.drop_all(conn)
+        engine.dispose()
+
+    @pytest.mark.db
+    def test_conversion_keeps_rows(self, pg_engine):
+        """Test the migration partitions existing rows by month."""
+        manager = PartitionManager(POLICIES)
+        with pg_engine.begin() as conn:
+            assert manager.is_partitioned(conn, "messages")
+            assert conn.execute(text("SELECT count(*) FROM messages_p202608")).scalar() == 10
+            assert conn.execute(select(func.count()).select_from(Message.__table__)).scalar() == 40
+
+    @pytest.mark.db
+    def test_upcoming_partitions_and_retention(self, pg_engine):
+        """Test premade months are created and expired months dropped."""
+        manager = PartitionManager(POLICIES)
+        later = add_months(month_floor(datetime.utcnow()), 12)
+        with pg_engine.begin() as conn:
+            result = manager.maintain(conn, later)
+            assert partition_name("api_logs", add_months(later, 2)) in result["created"]
+            assert "api_logs_p202607" in result["dropped"]
+            assert "messages_p202607" not in result["dropped"]
@@ -10,6 +10,7 @@ This module tests the ARQ AI assistant's ability to:
 
 import asyncio
 import pytest
+import pytest_asyncio
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
 from datetime import datetime, timedelta
 import json
@@ -29,7 +30,7 @@ except ImportError:
 class TestReconnectionLogic:
     """Test suite for connection restoration and restart logic."""
 
-    @pytest.fixture
+    @pytest_asyncio.fixture
     async def mock_agent(self):
         """Create a mock ARQ agent for testing."""
         agent = AsyncMock()
@@ -40,7 +41,7 @@ class TestReconnectionLogic:
         agent.api_client = AsyncMock()
         return agent
 
-    @pytest.fixture
+    @pytest_asyncio.fixture
     async def mock_db(self):
         """Create a mock database manager."""
         db = AsyncMock()
@@ -52,7 +53,7 @@ class TestReconnectionLogic:
         db.save_state = AsyncMock()
         return db
 
-    @pytest.fixture
+    @pytest_asyncio.fixture
     async def mock_memory(self):
         """Create a mock memory manager."""
         memory = AsyncMock()
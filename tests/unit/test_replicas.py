@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""Unit tests for read-replica routing.
+
+Tests for:
+- Round-robin selection across healthy replicas
+- Read-your-writes stickiness window
+- Reads routed to a replica (two local SQLite databases)
+- Fallback to the primary when replicas are unhealthy
+- Per-user, per-session and per-client read-your-writes keys
+"""
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import create_engine, select
+from starlette.requests import Request
+
+import database
+from database import (
+    DatabaseConfig, DatabaseManager, consistency_key_for, get_db_read_session, get_db_session,
+)
+from memory import MemoryManager, MemoryType
+from models import Base, Memory, User
+from replicas import Replica, ReplicaRouter, WriteTracker
+
+
+def _seed(path, username, memory_key):
+    """Create the schema in a SQLite file with one user and one memory."""
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        conn.execute(User.__table__.insert().values(
+            id=1, username=username, email=f"{username}@example.com", hashed_password="x",
+        ))
+        conn.execute(Memory.__table__.insert().values(
+            user_id=1, memory_type="long_term", key=memory_key, value="v", importance=0.5,
+        ))
+    engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def replicated_db(tmp_path):
+    """Primary and replica SQLite files holding distinguishable rows."""
+    _seed(tmp_path / "primary.db", "primary", "primary-memory")
+    _seed(tmp_path / "replica.db", "replica", "replica-memory")
+    manager = DatabaseManager(DatabaseConfig(
+        f"sqlite:///{tmp_path / 'primary.db'}",
+        replica_urls=[f"sqlite:///{tmp_path / 'replica.db'}"],
+        replica_health_interval=3600,
+        read_your_writes_seconds=60,
+    ))
+    await manager.initialize()
+    yield manager
+    await manager.close()
+
+
+async def _username(session) -> str:
+    return (await session.execute(select(User.username))).scalar_one()
+
+
+def _request(host: str, headers=(), query_string: bytes = b"") -> Request:
+    return Request({
+        "type": "http",
+        "client": (host, 50000),
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers],
+        "query_string": query_string,
+    })
+
+
+class TestReplicaRouter:
+    """Tests for replica selection and health tracking."""
+
+    @pytest.mark.unit
+    def test_round_robin_skips_unhealthy(self):
+        """Test selection rotates across healthy replicas only."""
+        a, b, c = Replica("a", None), Replica("b", None), Replica("c", None)
+        router = ReplicaRouter([a, b, c])
+        router.mark_failed(b, RuntimeError("down"))
+        assert [router.choose().name for _ in range(4)] == ["a", "c", "a", "c"]
+
+    @pytest.mark.unit
+    def test_no_healthy_replica(self):
+        """Test None is returned when every replica is down."""
+        replica = Replica("a", None)
+        router = ReplicaRouter([replica])
+        router.mark_failed(replica, RuntimeError("down"))
+        assert router.choose() is None
+        assert router.status()[0]["consecutive_failures"] == 1
+
+
+class TestWriteTracker:
+    """Tests for the read-your-writes window."""
+
+    @pytest.mark.unit
+    def test_recent_write_is_sticky(self, monkeypatch):
+        """Test a key stays on the primary until the window elapses."""
+        now = [100.0]
+        monkeypatch.setattr("replicas.time.monotonic", lambda: now[0])
+        tracker = WriteTracker(window_seconds=5)
+        tracker.mark("user:1")
+        assert tracker.is_recent("user:1")
+        assert not tracker.is_recent("user:2")
+        now[0] += 6
+        assert not tracker.is_recent("user:1")
+
+    @pytest.mark.unit
+    def test_anonymous_writes_not_tracked(self):
+        """Test writes without a consistency key never pin reads."""
+        tracker = WriteTracker()
+        tracker.mark(None)
+        assert not tracker.is_recent(None)
+
+
+class TestReadRouting:
+    """Tests for DatabaseManager read sessions against two SQLite databases."""
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_reads_go_to_replica(self, replicated_db):
+        """Test read sessions hit the replica while writes hit the primary."""
+        async with replicated_db.read_session() as session:
+            assert await _username(session) == "replica"
+        async with replicated_db.transaction() as session:
+            assert await _username(session) == "primary"
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_memory_manager_reads_from_replica(self, replicated_db):
+        """Test MemoryManager ranked retrieval uses its read session."""
+        async with replicated_db.transaction() as db, replicated_db.read_session() as read_db:
+            memories = await MemoryManager(db, read_session=read_db).retrieve_memories(1)
+        assert [memory.key for memory in memories] == ["replica-memory"]
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_memory_manager_defaults_to_replica(self, replicated_db, monkeypatch):
+        """Test MemoryManager reads from a replica without an explicit read session."""
+        monkeypatch.setattr(database, "_db_manager", replicated_db)
+        async with replicated_db.transaction() as db:
+            manager = MemoryManager(db)
+            memories = await manager.retrieve_memories(1)
+            assert [memory.key for memory in memories] == ["replica-memory"]
+            # Point lookups update access metadata, so they stay on the primary
+            assert await manager.retrieve_memory(1, "primary-memory") is not None
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_memory_manager_reads_own_writes(self, replicated_db, monkeypatch):
+        """Test a store followed by a retrieve in one session sees the flushed row."""
+        monkeypatch.setattr(database, "_db_manager", replicated_db)
+        # Settings here carry no per-type TTLs; expiry is irrelevant to routing
+        monkeypatch.setattr(MemoryManager, "_calculate_expiration", lambda self, memory_type: None)
+        async with replicated_db.transaction() as db:
+            manager = MemoryManager(db)
+            await manager.store_memory(1, None, "fresh", "v", MemoryType.LONG_TERM)
+            keys = {memory.key for memory in await manager.retrieve_memories(1)}
+            assert keys == {"primary-memory", "fresh"}
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_memory_manager_stays_on_session_without_healthy_replicas(
+        self, replicated_db, monkeypatch
+    ):
+        """Test reads reuse the caller's session when every replica is down."""
+        monkeypatch.setattr(database, "_db_manager", replicated_db)
+        for replica in replicated_db.replica_router.replicas:
+            replica.healthy = False
+        async with replicated_db.transaction() as db:
+            memories = await MemoryManager(db).retrieve_memories(1)
+            assert [memory.key for memory in memories] == ["primary-memory"]
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_dependencies_use_client_consistency_key(self, replicated_db, monkeypatch):
+        """Test a client that just wrote reads from the primary; other clients do not."""
+        monkeypatch.setattr(database, "_db_manager", replicated_db)
+        async for session in get_db_session(_request("10.0.0.1")):
+            session.add(Memory(user_id=1, memory_type="long_term", key="new", value="v"))
+            await session.flush()
+
+        async for session in get_db_read_session(_request("10.0.0.1")):
+            assert await _username(session) == "primary"
+        async for session in get_db_read_session(_request("10.0.0.2")):
+            assert await _username(session) == "replica"
+
+    @pytest.mark.unit
+    def test_consistency_key_prefers_user_then_session(self):
+        """Test callers behind one proxy address get distinct keys."""
+        request = _request("10.0.0.1", headers=[("X-Session-ID", "abc")])
+        request.state.user = User(id=7)
+        assert consistency_key_for(request) == "user:7"
+        anonymous = _request("10.0.0.1", headers=[("X-Session-ID", "abc")])
+        assert consistency_key_for(anonymous) == "session:abc"
+        assert consistency_key_for(_request("10.0.0.1", query_string=b"session_id=42")) == "session:42"
+        assert consistency_key_for(_request("10.0.0.1")) == "client:10.0.0.1"
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_dependencies_key_sessions_behind_one_proxy(self, replicated_db, monkeypatch):
+        """Test a write in one session does not pin another session on the same address."""
+        monkeypatch.setattr(database, "_db_manager", replicated_db)
+        async for session in get_db_session(_request("10.0.0.1", query_string=b"session_id=1")):
+            session.add(Memory(user_id=1, memory_type="long_term", key="new", value="v"))
+            await session.flush()
+
+        async for session in get_db_read_session(_request("10.0.0.1", query_string=b"session_id=1")):
+            assert await _username(session) == "primary"
+        async for session in get_db_read_session(_request("10.0.0.1", query_string=b"session_id=2")):
+            assert await _username(session) == "replica"
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_read_your_writes(self, replicated_db):
+        """Test a key written recently reads from the primary; other keys do not."""
+        async for session in replicated_db.get_session(consistency_key="user:1"):
+            session.add(Memory(user_id=1, memory_type="long_term", key="new", value="v"))
+            await session.flush()
+
+        async with replicated_db.read_session("user:1") as session:
+            assert await _username(session) == "primary"
+        async with replicated_db.read_session("user:2") as session:
+            assert await _username(session) == "replica"
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_read_only_session_does_not_pin(self, replicated_db):
+        """Test sessions that never flushed do not start a stickiness window."""
+        async for session in replicated_db.get_session(consistency_key="user:1"):
+            await _username(session)
+        async with replicated_db.read_session("user:1") as session:
+            assert await _username(session) == "replica"
+
+    @pytest.mark.unit
+    @pytest.mark.db
+    @pytest.mark.asyncio
+    async def test_unhealthy_replica_falls_back_to_primary(self, tmp_path):
+        """Test a failed health probe takes the replica out of rotation."""
+        _seed(tmp_path / "primary.db", "primary", "primary-memory")
+        manager = DatabaseManager(DatabaseConfig(
+            f"sqlite:///{tmp_path / 'primary.db'}",
+            replica_urls=[f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"],
+            replica_health_interval=3600,
+        ))
+        await manager.initialize()
+        try:
+            assert await manager.replica_router.check_all() == {
+                manager.replica_router.replicas[0].name: False
+            }
+            async with manager.read_session() as session:
+                assert await _username(session) == "primary"
+            assert manager.pool_status()["replicas"][0]["healthy"] is False
+        finally:
+            await manager.close()
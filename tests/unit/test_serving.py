@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Unit tests for the production serving setup.
+
+Tests for:
+- Worker count defaults for IO-bound serving
+- gunicorn configuration (uvicorn workers, preload, recycling)
+- Recycling exemption for the embedded job-worker owner
+- Fork safety of resources created before workers fork
+"""
+
+import importlib.util
+import logging
+import os
+import runpy
+
+import pytest
+
+import http_clients
+import logging_pipeline
+import serving
+from serving import ArqUvicornWorker, default_workers, event_loop_options, exempt_from_recycling
+from task_store import TaskStore
+
+GUNICORN_CONFIG = os.path.join(os.path.dirname(__file__), "..", "..", "config", "gunicorn_config.py")
+
+
+class TestServingConfig:
+    """Tests for worker settings."""
+
+    @pytest.mark.unit
+    def test_default_workers(self, monkeypatch):
+        """Test one worker per core unless WEB_CONCURRENCY is set."""
+        monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+        assert default_workers(cpu_count=8) == 8
+        monkeypatch.setenv("WEB_CONCURRENCY", "3")
+        assert default_workers(cpu_count=8) == 3
+
+    @pytest.mark.unit
+    def test_worker_class_uses_fast_stack(self):
+        """Test the gunicorn worker class runs on the detected loop and parser."""
+        pytest.importorskip("uvicorn")
+        assert ArqUvicornWorker.CONFIG_KWARGS["loop"] == event_loop_options()["loop"]
+        assert ArqUvicornWorker.CONFIG_KWARGS["http"] == event_loop_options()["http"]
+
+    @pytest.mark.unit
+    def test_worker_class_prefers_uvicorn_worker_package(self):
+        """Test the base class comes from uvicorn-worker when it is installed."""
+        pytest.importorskip("uvicorn")
+        expected = "uvicorn_worker" if importlib.util.find_spec("uvicorn_worker") else "uvicorn.workers"
+        assert ArqUvicornWorker.__mro__[1].__module__.startswith(expected)
+
+    @pytest.mark.unit
+    def test_gunicorn_config(self, monkeypatch):
+        """Test the config serves ASGI with preload and graceful recycling."""
+        monkeypatch.setenv("WEB_CONCURRENCY", "4")
+        config = runpy.run_path(GUNICORN_CONFIG)
+        assert config["worker_class"] == "serving.ArqUvicornWorker"
+        assert config["workers"] == 4
+        assert config["preload_app"] is True
+        assert config["max_requests"] > 0 and config["max_requests_jitter"] > 0
+        assert "WEB_CONCURRENCY=4" in config["raw_env"]
+
+    @pytest.mark.unit
+    def test_exempt_from_recycling(self, monkeypatch):
+        """Test the worker owning the job pool drops its max_requests limit."""
+        assert exempt_from_recycling() is False
+
+        class Worker:
+            max_requests = 10_000
+            config = type("Config", (), {"limit_max_requests": 10_000})()
+
+        worker = Worker()
+        monkeypatch.setattr(serving, "_current_worker", worker)
+        assert exempt_from_recycling() is True
+        assert worker.config.limit_max_requests is None
+        assert worker.max_requests > 10_000
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+class TestForkSafety:
+    """Tests for state reset in forked workers."""
+
+    @staticmethod
+    def _in_child(check) -> int:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os._exit(0 if check() else 1)
+            except BaseException:
+                os._exit(2)
+        return os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1])
+
+    @pytest.mark.unit
+    def test_logging_listener_restarted(self):
+        """Test a forked child gets a live listener thread of its own."""
+        parent = logging_pipeline.setup_logging("INFO", fmt="text")
+        try:
+            def check():
+                listener = logging_pipeline._listener
+                logging.getLogger("arq.test").info("from child")
+                return listener is not parent and listener._thread.is_alive()
+
+            assert self._in_child(check) == 0
+        finally:
+            logging_pipeline.shutdown_logging()
+
+    @pytest.mark.unit
+    def test_http_clients_and_sqlite_reset(self, tmp_path):
+        """Test pooled clients are dropped and SQLite connections reopened in the child."""
+        registry = http_clients.get_http_clients()
+        store = TaskStore(str(tmp_path / "tasks.db"))
+        parent_conn = store._connect()
+
+        def check():
+            return (
+                http_clients._http_clients is None
+                and store._connect() is not parent_conn
+                and store.create_task({"title": "child"})["task_id"] == "task-1"
+            )
+
+        try:
+            assert self._in_child(check) == 0
+            assert http_clients._http_clients is registry
+            assert store.count_tasks() == 1
+        finally:
+            store.close()
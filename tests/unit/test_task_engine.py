@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Unit tests for the iterative task engine.
+
+Tests for:
+- Planning into sub-steps and feeding results into the next iteration
+- Partial results and per-step checkpoints in the task record
+- Resuming after a failure without redoing finished work
+- The shared concurrency limit across tasks
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from task_engine import TaskEngine, parse_plan
+from task_store import TaskStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TaskStore(str(tmp_path / "tasks.db"))
+    yield store
+    store.close()
+
+
+class FakeLLM:
+    """Answers planning prompts with two steps and counts every other call"""
+
+    def __init__(self, fail_on=None, delay=0.0):
+        self.prompts = []
+        self.fail_on = fail_on
+        self.delay = delay
+        self.running = 0
+        self.peak = 0
+
+    async def __call__(self, prompt, on_chunk):
+        self.prompts.append(prompt)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail_on and self.fail_on in prompt:
+                raise RuntimeError("model crashed")
+            if "numbered list" in prompt:
+                return "1. Design schema\n2. Write API\n"
+            answer = f"answer {len(self.prompts)}"
+            for word in answer.split():
+                on_chunk(word + " ")
+            return answer
+        finally:
+            self.running -= 1
+
+
+def _task(store, max_iterations=2):
+    return store.create_task({"title": "Build a todo app", "description": "", "max_iterations": max_iterations})["task_id"]
+
+
+class TestParsePlan:
+    """Tests for plan parsing."""
+
+    @pytest.mark.unit
+    def test_numbered_and_bulleted(self):
+        """Test list items are extracted and capped."""
+        text = "Plan:\n1. First\n2) Second\n- Third\nnot a step\n* Fourth"
+        assert parse_plan(text, 3) == ["First", "Second", "Third"]
+        assert parse_plan("no list here", 3) == []
+
+
+class TestTaskEngine:
+    """Tests for iterative execution."""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_iterations_feed_previous_results(self, store):
+        """Test each iteration refines its sub-step's previous result."""
+        llm = FakeLLM()
+        task_id = _task(store)
+        await TaskEngine(store, llm, partial_flush_interval=0).run(task_id)
+
+        task = store.get_task(task_id)
+        assert task["status"] == "completed" and task["iterations"] == 2
+        assert len(task["results"]) == 2
+        assert task["checkpoint"]["plan"] == ["Design schema", "Write API"]
+        assert task["partial"] == {}
+        # 1 planning call + 2 sub-steps x 2 iterations
+        assert len(llm.prompts) == 5
+        second_round = [p for p in llm.prompts if "previous result" in p]
+        assert len(second_round) == 2
+        assert all("answer " in p for p in second_round)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_partial_text_is_streamed(self, store, monkeypatch):
+        """Test streamed fragments reach the task record, written off the event loop."""
+        seen = []
+        writers = []
+        set_json_path = store.set_json_path
+
+        def recording_set_json_path(*args):
+            writers.append(threading.current_thread())
+            return set_json_path(*args)
+
+        monkeypatch.setattr(store, "set_json_path", recording_set_json_path)
+
+        async def generate(prompt, on_chunk):
+            on_chunk("hello ")
+            await asyncio.sleep(0.05)
+            on_chunk("world")
+            await asyncio.sleep(0.05)
+            seen.append(store.get_task(task_id)["partial"])
+            return "hello world"
+
+        task_id = _task(store, max_iterations=1)
+        await TaskEngine(store, generate, max_steps=1, partial_flush_interval=0).run(task_id)
+        assert seen == [{"0": "hello world"}]
+        assert writers and threading.main_thread() not in writers
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_resume_skips_finished_work(self, store):
+        """Test a rerun after a failed sub-step redoes only that sub-step."""
+        task_id = _task(store)
+        failing = FakeLLM(fail_on="Write API")
+        with pytest.raises(RuntimeError):
+            await TaskEngine(store, failing).run(task_id)
+
+        checkpoint = store.get_task(task_id)["checkpoint"]
+        assert list(checkpoint["current"]) == ["0"]
+
+        llm = FakeLLM()
+        await TaskEngine(store, llm).run(task_id)
+        assert not any("numbered list" in p for p in llm.prompts)
+        # Iteration 1 only needs "Write API", iteration 2 needs both
+        assert len(llm.prompts) == 3
+        assert store.get_task(task_id)["iterations"] == 2
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_concurrency_is_shared_across_tasks(self, store):
+        """Test one engine never exceeds its limit, however many tasks run."""
+        llm = FakeLLM(delay=0.01)
+        engine = TaskEngine(store, llm, concurrency=2)
+        await asyncio.gather(*(engine.run(_task(store)) for _ in range(3)))
+        assert llm.peak == 2
+        assert store.count_tasks("completed") == 3
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""Unit tests for the ARQ task store.
+
+Tests for:
+- Monotonic task ids and atomic per-task updates
+- Concurrent result appends from several threads
+- Indexed status counts and listings
+- Keyset pages of tasks and the status transition log
+- One-time import of the legacy tasks_db.json
+- The ARQ endpoints running on the store, including the SSE stream
+"""
+
+import asyncio
+import json
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import arq_endpoints
+from job_queue import SQLiteJobQueue
+from task_store import TaskStore, open_task_store, row_id_for
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TaskStore(str(tmp_path / "tasks.db"))
+    yield store
+    store.close()
+
+
+def _goal(title="Build it", max_iterations=3):
+    return {"title": title, "description": "", "max_iterations": max_iterations}
+
+
+class TestTaskStore:
+    """Tests for task records."""
+
+    @pytest.mark.unit
+    def test_create_and_get(self, store):
+        """Test a new task is pending with its goal round-tripped."""
+        task = store.create_task(_goal())
+        assert task["task_id"] == "task-1"
+        assert task["status"] == "pending" and task["results"] == []
+        assert store.get_task("task-1")["goal"] == _goal()
+        assert store.get_task("task-99") is None
+        assert store.get_task("bogus") is None
+
+    @pytest.mark.unit
+    def test_ids_are_never_reused(self, store):
+        """Test ids keep increasing after the newest task is deleted."""
+        store.create_task(_goal())
+        second = store.create_task(_goal())
+        store._connect().execute("DELETE FROM tasks WHERE id = ?", (row_id_for(second["task_id"]),))
+        assert store.create_task(_goal())["task_id"] == "task-3"
+
+    @pytest.mark.unit
+    def test_update_task(self, store):
+        """Test updates touch only the named columns and reject unknown ones."""
+        task_id = store.create_task(_goal())["task_id"]
+        assert store.update_task(task_id, status="completed", results=["done"])
+        task = store.get_task(task_id)
+        assert task["status"] == "completed" and task["results"] == ["done"]
+        assert task["goal"] == _goal()
+        assert not store.update_task("task-99", status="running")
+        with pytest.raises(ValueError):
+            store.update_task(task_id, start_time="now")
+
+    @pytest.mark.unit
+    def test_concurrent_appends_are_not_lost(self, store):
+        """Test appends from several threads all land in the results array."""
+        task_id = store.create_task(_goal())["task_id"]
+
+        def worker(n):
+            for i in range(25):
+                store.append_result(task_id, {"worker": n, "step": i})
+            store.close()
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(store.get_task(task_id)["results"]) == 100
+
+    @pytest.mark.unit
+    def test_status_queries(self, store):
+        """Test counts and listings filter by status, newest first."""
+        ids = [store.create_task(_goal(f"t{i}"))["task_id"] for i in range(4)]
+        store.update_task(ids[1], status="running")
+        store.update_task(ids[3], status="running")
+        assert store.count_tasks() == 4
+        assert store.count_tasks("running") == 2
+        assert [t["task_id"] for t in store.list_tasks("running")] == [ids[3], ids[1]]
+        assert len(store.list_tasks(limit=3)) == 3
+
+        plan = store._connect().execute(
+            "EXPLAIN QUERY PLAN SELECT count(*) FROM tasks WHERE status = ?", ("running",)
+        ).fetchall()
+        assert any("idx_tasks_status_start" in row[-1] for row in plan)
+
+
+    @pytest.mark.unit
+    def test_pages_walk_every_task_once(self, store):
+        """Test keyset pages cover all matching tasks, newest first, without overlap."""
+        ids = [store.create_task(_goal(f"t{i}"))["task_id"] for i in range(7)]
+        for task_id in ids[::2]:
+            store.update_task(task_id, status="completed")
+
+        seen, cursor = [], None
+        while True:
+            items, cursor = store.list_tasks_page(status="completed", limit=2, cursor=cursor)
+            seen.extend(t["task_id"] for t in items)
+            if cursor is None:
+                break
+        assert seen == ids[::2][::-1]
+        with pytest.raises(ValueError):
+            store.list_tasks_page(cursor="garbage")
+
+    @pytest.mark.unit
+    def test_status_transitions_are_logged(self, store):
+        """Test creation and status changes, but not other updates, become events."""
+        task_id = store.create_task(_goal())["task_id"]
+        other = store.create_task(_goal())["task_id"]
+        store.update_task(task_id, status="running")
+        store.append_result(task_id, "partial")
+        store.update_task(task_id, status="running", iterations=2)
+        store.update_task(task_id, status="error", error="boom")
+
+        events = store.events_after(0, task_id)
+        assert [e["status"] for e in events] == ["pending", "running", "error"]
+        assert events[-1]["error"] == "boom"
+        assert [e["task_id"] for e in store.events_after(events[0]["id"])] == [other, task_id, task_id]
+        assert store.last_event_id() == events[-1]["id"]
+
+
+class TestLegacyImport:
+    """Tests for migrating tasks_db.json and older databases."""
+
+    @pytest.mark.unit
+    def test_new_columns_added_to_existing_db(self, tmp_path):
+        """Test a database created before checkpoints gains the new columns."""
+        import sqlite3
+
+        path = str(tmp_path / "tasks.db")
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, "
+            "goal TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending', iterations INTEGER NOT NULL "
+            "DEFAULT 0, results TEXT NOT NULL DEFAULT '[]', error TEXT, start_time TEXT NOT NULL, "
+            "updated_at TEXT NOT NULL)"
+        )
+        conn.execute("INSERT INTO tasks (title, goal, start_time, updated_at) VALUES ('a', '{}', 'x', 'x')")
+        conn.commit()
+        conn.close()
+
+        store = TaskStore(path)
+        try:
+            assert store.get_task("task-1")["checkpoint"] == {}
+            assert store.set_json_path("task-1", "checkpoint", "$.plan", ["a"])
+            assert store.get_task("task-1")["checkpoint"] == {"plan": ["a"]}
+        finally:
+            store.close()
+
+    @pytest.mark.unit
+    def test_import_keeps_ids_and_renames_file(self, tmp_path):
+        """Test legacy tasks keep their ids and the JSON file is imported once."""
+        legacy = tmp_path / "tasks_db.json"
+        legacy.write_text(json.dumps({
+            "task-1": {"task_id": "task-1", "goal": _goal(), "status": "completed",
+                       "iterations": 3, "start_time": "2024-01-01T00:00:00", "results": ["ok"]},
+            "task-2": {"task_id": "task-2", "goal": _goal(), "status": "error: timed out",
+                       "iterations": 0, "start_time": "2024-01-02T00:00:00", "results": []},
+        }))
+        store = open_task_store(str(tmp_path), str(legacy))
+        try:
+            assert not legacy.exists()
+            assert (tmp_path / "tasks_db.json.imported").exists()
+            assert store.get_task("task-1")["results"] == ["ok"]
+            failed = store.get_task("task-2")
+            assert failed["status"] == "error" and failed["error"] == "timed out"
+            assert store.create_task(_goal())["task_id"] == "task-3"
+        finally:
+            store.close()
+
+
+class TestArqEndpoints:
+    """Tests for the ARQ endpoints backed by the store."""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        store = TaskStore(str(tmp_path / "tasks.db"))
+        queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+        monkeypatch.setattr(arq_endpoints, "_task_store", store)
+        monkeypatch.setattr(arq_endpoints, "_job_queue", queue)
+        app = FastAPI()
+        app.include_router(arq_endpoints.router)
+        yield TestClient(app)
+        store.close()
+        queue.close()
+
+    @pytest.mark.unit
+    def test_start_and_health(self, client):
+        """Test started tasks get sequential ids and are queued for the workers."""
+        first = client.post("/api/v1/arq/start-development", json={"title": "a"}).json()
+        second = client.post("/api/v1/arq/start-development", json={"title": "b"}).json()
+        assert (first["task_id"], second["task_id"]) == ("task-1", "task-2")
+
+        health = client.get("/api/v1/arq/health").json()
+        assert health == {"status": "healthy", "active_tasks": 0}
+        stats = client.get("/api/v1/arq/tasks/stats").json()
+        assert stats["tasks"] == {"pending": 2} and stats["queue"]["queued"] == 2
+
+    @pytest.mark.unit
+    def test_task_listing(self, client):
+        """Test /tasks filters by status and pages with a cursor."""
+        for title in "abc":
+            client.post("/api/v1/arq/start-development", json={"title": title})
+        arq_endpoints.get_task_store().update_task("task-2", status="running")
+
+        page = client.get("/api/v1/arq/tasks", params={"limit": 2}).json()
+        assert [t["task_id"] for t in page["items"]] == ["task-3", "task-2"] and page["has_more"]
+        rest = client.get("/api/v1/arq/tasks", params={"limit": 2, "cursor": page["next_cursor"]}).json()
+        assert [t["task_id"] for t in rest["items"]] == ["task-1"] and not rest["has_more"]
+
+        running = client.get("/api/v1/arq/tasks", params={"status": "running"}).json()
+        assert [t["task_id"] for t in running["items"]] == ["task-2"]
+        assert client.get("/api/v1/arq/tasks/task-2").json()["status"] == "running"
+        assert client.get("/api/v1/arq/tasks/task-9").status_code == 404
+        assert client.get("/api/v1/arq/tasks", params={"cursor": "bad"}).status_code == 400
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_store_calls_leave_the_event_loop(self, client, monkeypatch):
+        """Test handlers run the synchronous SQLite calls in a worker thread."""
+        store = arq_endpoints.get_task_store()
+        calls = {}
+        for name in ("create_task", "get_task", "count_tasks", "list_tasks_page", "status_counts"):
+            def recording(*args, _name=name, _call=getattr(store, name), **kwargs):
+                calls.setdefault(_name, threading.current_thread())
+                return _call(*args, **kwargs)
+            monkeypatch.setattr(store, name, recording)
+
+        task_id = (await arq_endpoints.start_dev(arq_endpoints.DevelopmentGoal(title="a")))["task_id"]
+        await arq_endpoints.get_task(task_id)
+        await arq_endpoints.health()
+        await arq_endpoints.list_tasks(None, None, None, 20, None)
+        await arq_endpoints.task_stats()
+
+        assert len(calls) == 5
+        assert threading.main_thread() not in calls.values()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_event_stream(self, client, monkeypatch):
+        """Test the SSE stream pushes transitions made after it was opened."""
+        monkeypatch.setattr(arq_endpoints, "EVENTS_POLL_INTERVAL", 0.01)
+        store = arq_endpoints.get_task_store()
+        task_id = store.create_task(_goal())["task_id"]
+        disconnected = asyncio.Event()
+
+        class FakeRequest:
+            async def is_disconnected(self):
+                return disconnected.is_set()
+
+        polls = []
+        events_after = store.events_after
+
+        def recording_events_after(*args):
+            polls.append(threading.current_thread())
+            return events_after(*args)
+
+        monkeypatch.setattr(store, "events_after", recording_events_after)
+        response = await arq_endpoints.task_events(FakeRequest(), task_id, None, None)
+        chunks = response.body_iterator
+
+        store.update_task(task_id, status="running")
+        store.update_task(task_id, status="completed")
+        received = [await chunks.__anext__(), await chunks.__anext__()]
+        disconnected.set()
+        # Each poll runs in a worker thread, never on the event loop
+        assert polls and threading.main_thread() not in polls
+
+        payloads = [json.loads(chunk.split("data: ", 1)[1]) for chunk in received]
+        assert [p["status"] for p in payloads] == ["running", "completed"]
+        assert received[0].startswith(f"id: {payloads[0]['id']}\nevent: status\n")